@@ -0,0 +1 @@
+from .trade_list import TradeList
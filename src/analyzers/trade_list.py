@@ -0,0 +1,36 @@
+import backtrader as bt
+
+
+class TradeList(bt.Analyzer):
+    """
+    逐笔记录已平仓交易（TradeAnalyzer 只有汇总统计）。
+    get_analysis() 返回列表，每项包含开平仓时间、方向、数量、开仓价、盈亏（含 / 不含手续费）和持仓 K 线数。
+    """
+
+    def start(self):
+        self.trades = []
+        self.open_sizes = {}  # 平仓时 trade.size 已经归零，开仓时先记下数量
+
+    def notify_trade(self, trade):
+        if trade.justopened:
+            self.open_sizes[trade.ref] = trade.size
+            return
+        if not trade.isclosed:
+            return
+
+        size = self.open_sizes.pop(trade.ref, float('nan'))
+        self.trades.append({
+            'ref': trade.ref,
+            'direction': 'long' if size > 0 else 'short',
+            'open_datetime': bt.num2date(trade.dtopen).isoformat(),
+            'close_datetime': bt.num2date(trade.dtclose).isoformat(),
+            'size': abs(size),
+            'price': trade.price,
+            'pnl': trade.pnl,
+            'pnlcomm': trade.pnlcomm,
+            'commission': trade.commission,
+            'bars': trade.barlen,
+        })
+
+    def get_analysis(self):
+        return self.trades
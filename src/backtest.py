@@ -0,0 +1,101 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import backtrader as bt
+
+from analyzers import TradeList
+from brokers import BracketBroker
+from feeds import ColumnarData, SharedColumnarData, SharedColumns
+from strategies import ConfirmSignalStrategy
+
+
+def split_params(flat_params):
+    """
+    扁平参数 -> 策略参数。'类名.参数' 形式的键（例如 'BuySellSignal.duration_threshold'）
+    收集到 indicator_params，其余直接作为策略参数。类名拼错时策略开始运行前报错（见 check_indicator_params）。
+    """
+    params = {}
+    indicator_params = {}
+    for key, value in (flat_params or {}).items():
+        if '.' in key:
+            cls_name, name = key.split('.', 1)
+            indicator_params.setdefault(cls_name, {})[name] = value
+        else:
+            params[key] = value
+    if indicator_params:
+        params['indicator_params'] = indicator_params
+    return params
+
+
+def _get(analysis, *keys, default=0):
+    for key in keys:
+        if key not in analysis:
+            return default
+        analysis = analysis[key]
+    return analysis
+
+
+def add_analyzers(cerebro):
+    """挂上收益、回撤、交易统计和逐笔交易列表分析器"""
+    cerebro.addanalyzer(bt.analyzers.Returns, _name='returns', timeframe=bt.TimeFrame.Days, tann=365)
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
+    cerebro.addanalyzer(TradeList, _name='trade_list')
+
+
+def summarize(cerebro, result, elapsed):
+    """从 add_analyzers 挂上的分析器中汇总结果"""
+    returns = result.analyzers.returns.get_analysis()
+    trades = result.analyzers.trades.get_analysis()
+    drawdown = result.analyzers.drawdown.get_analysis()
+    bars = len(result.data)
+    return {
+        'final_value': cerebro.broker.getvalue(),
+        'return_pct': math.expm1(returns.get('rtot', 0.0)) * 100,
+        'annual_return_pct': returns.get('rnorm100', 0.0),
+        'trades': _get(trades, 'total', 'closed'),
+        'won': _get(trades, 'won', 'total'),
+        'lost': _get(trades, 'lost', 'total'),
+        'max_drawdown_pct': _get(drawdown, 'max', 'drawdown', default=0.0),
+        'open_size': result.position.size,  # 结束时未平的仓位，盈亏计入 final_value 但不在 trades 里
+        'bars': bars,
+        'seconds': elapsed,
+        'bars_per_sec': bars / elapsed if elapsed else 0.0,
+    }
+
+
+def run_backtest(store, fromdate=None, todate=None, params=None, strategy=ConfirmSignalStrategy,
+                 cash=10000.0, commission=0.0008, runonce=True, exactbars=0, fast_broker=False):
+    """
+    无绘图、无日志地跑一次回测，返回结果字典（期末资金、收益、交易次数、最大回撤、耗时）。
+    store 为 feeds.convert_csv 生成的列存储目录（内存映射读取，多进程共享同一份页缓存），
+    或 feeds.SharedArena.add 返回的 SharedColumns（直接读共享内存）。
+    exactbars 非 0 时为省内存模式（逐根 next，line 只保留指标声明的回看长度，见 indicators.lookback）。
+    fast_broker 为 True 时用 brokers.BracketBroker 代替默认的 BackBroker（成交逐笔相同，更快）。
+    """
+    cerebro = bt.Cerebro(stdstats=False, runonce=runonce, exactbars=exactbars)
+    if fast_broker:
+        cerebro.broker = BracketBroker()
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission=commission, commtype=bt.CommInfoBase.COMM_PERC)
+    feed = SharedColumnarData if isinstance(store, SharedColumns) else ColumnarData
+    cerebro.adddata(feed(dataname=store, fromdate=fromdate, todate=todate))
+    cerebro.addstrategy(strategy, printlog=False, **split_params(params))
+    add_analyzers(cerebro)
+
+    start = time.perf_counter()
+    result = cerebro.run()[0]
+    elapsed = time.perf_counter() - start
+    return summarize(cerebro, result, elapsed)
+
+
+def run_parallel(func, jobs, workers=None):
+    """
+    多进程执行 func(job)，按完成顺序逐个产出 (job, 结果)。
+    func 必须是模块级函数（子进程需要按名字导入）。
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(func, job): job for job in jobs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
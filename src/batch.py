@@ -0,0 +1,127 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+import time
+import traceback
+
+import pandas as pd
+
+from backtest import run_backtest, run_parallel
+from feeds import ensure_columnar, load_columns
+
+
+def parse_window(value):
+    """'2024-06-26:2024-07-28' -> (开始, 结束)，任意一端可以留空"""
+    start, _, end = value.partition(':')
+    return (datetime.datetime.fromisoformat(start) if start else None,
+            datetime.datetime.fromisoformat(end) if end else None)
+
+
+def tile_windows(store, days, step_days=None):
+    """把数据覆盖的时间段切成长度 days 天、间隔 step_days 天的窗口（最后一个不足长度的窗口保留）"""
+    timestamps = load_columns(store)['timestamp']
+    if len(timestamps) == 0:
+        return []
+    epoch = datetime.datetime(1970, 1, 1)
+    first = epoch + datetime.timedelta(milliseconds=int(timestamps[0]))
+    last = epoch + datetime.timedelta(milliseconds=int(timestamps[-1]))
+    length = datetime.timedelta(days=days)
+    step = datetime.timedelta(days=step_days or days)
+
+    windows = []
+    start = first
+    while start <= last:
+        # todate 包含端点，减 1 秒避免相邻窗口共用一根 K 线
+        windows.append((start, min(start + length - datetime.timedelta(seconds=1), last)))
+        start += step
+    return windows
+
+
+def _run_job(job):
+    """子进程入口：单个 (文件, 时间窗口) 回测，异常记录到结果里而不是中断整个批次"""
+    name, store, start, end, params = job
+    row = {
+        'file': name,
+        'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None,
+    }
+    try:
+        row.update(run_backtest(store, start, end, params))
+    except Exception:
+        row['error'] = traceback.format_exc(limit=3)
+    return row
+
+
+def batch(jobs, workers=None):
+    """并行跑全部任务，每完成一个立即输出，返回结果列表和汇总"""
+    rows = []
+    start = time.perf_counter()
+    for i, (_, row) in enumerate(run_parallel(_run_job, jobs, workers), 1):
+        rows.append(row)
+        window = f'{row["start"] or "-"} ~ {row["end"] or "-"}'
+        if 'error' in row:
+            print(f'[{i}/{len(jobs)}] {row["file"]} {window} 失败: {row["error"].strip().splitlines()[-1]}', flush=True)
+        else:
+            print(f'[{i}/{len(jobs)}] {row["file"]} {window} 期末资金={row["final_value"]:.2f}, '
+                  f'交易={row["trades"]}, 最大回撤={row["max_drawdown_pct"]:.2f}%, '
+                  f'K线={row["bars"]}, 耗时={row["seconds"]:.2f}s', flush=True)
+
+    elapsed = time.perf_counter() - start
+    ok = [row for row in rows if 'error' not in row]
+    summary = {
+        'jobs': len(rows),
+        'failed': len(rows) - len(ok),
+        'wall_seconds': elapsed,
+        'job_seconds': sum(row['seconds'] for row in ok),
+        'bars': sum(row['bars'] for row in ok),
+        'trades': sum(row['trades'] for row in ok),
+        'mean_final_value': sum(row['final_value'] for row in ok) / len(ok) if ok else None,
+    }
+    return rows, summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量回测 data/ 下全部 K 线文件（无绘图，多进程）')
+    parser.add_argument('--data-dir', type=str, default='data', help='数据目录')
+    parser.add_argument('--pattern', type=str, default='*_candlesticks*.csv', help='数据文件匹配模式')
+    parser.add_argument('--window', type=str, action='append', default=None,
+                        help='时间窗口 开始:结束，例如 2024-06-26:2024-07-28，可以传多个')
+    parser.add_argument('--window-days', type=float, default=None, help='按天数把每个文件切成滚动窗口')
+    parser.add_argument('--step-days', type=float, default=None, help='滚动窗口的步长（天），默认等于窗口长度')
+    parser.add_argument('--params', type=str, default=None,
+                        help='策略参数 JSON，内部指标参数写 类名.参数，例如 {"BuySellSignal.duration_threshold": 50}')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='进程数')
+    parser.add_argument('--out', type=str, default=os.path.join('data', 'batch_report'),
+                        help='报告路径前缀，生成 <out>.json 和 <out>.csv')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.data_dir, args.pattern)))
+    if not files:
+        print(f'错误: {args.data_dir} 下没有匹配 {args.pattern} 的文件')
+        exit(1)
+
+    params = json.loads(args.params) if args.params else {}
+    jobs = []
+    for path in files:
+        # 父进程统一转换列存储，子进程只内存映射读取
+        store = ensure_columnar(path)
+        if args.window:
+            windows = [parse_window(w) for w in args.window]
+        elif args.window_days:
+            windows = tile_windows(store, args.window_days, args.step_days)
+        else:
+            windows = [(None, None)]
+        jobs.extend((os.path.basename(path), store, start, end, params) for start, end in windows)
+
+    print(f'{len(files)} 个文件，{len(jobs)} 个任务，{args.workers} 个进程')
+    rows, summary = batch(jobs, args.workers)
+    print(f'完成 {summary["jobs"]} 个任务（失败 {summary["failed"]}），墙钟 {summary["wall_seconds"]:.1f}s，'
+          f'单任务累计 {summary["job_seconds"]:.1f}s，共 {summary["bars"]} 根 K 线')
+
+    rows.sort(key=lambda row: (row['file'], row['start'] or ''))
+    with open(f'{args.out}.json', 'w', encoding='utf-8') as f:
+        json.dump({'summary': summary, 'params': params, 'jobs': rows}, f, ensure_ascii=False, indent=2)
+    pd.DataFrame(rows).to_csv(f'{args.out}.csv', index=False)
+    print(f'报告已保存到 {args.out}.json / {args.out}.csv')
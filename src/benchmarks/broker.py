@@ -0,0 +1,104 @@
+"""
+BracketBroker 与 backtrader 默认的 BackBroker 对比：ConfirmSignalStrategy 逐笔核对成交（开平仓时间、数量、价格、盈亏、手续费）
+和每根 K 线的账户价值，并统计 broker.next 的耗时
+
+    cd src && python3 -m benchmarks.broker --bars 100000
+
+有任何一笔不一致时退出码为 1。
+"""
+import argparse
+import sys
+import time
+
+import backtrader as bt
+
+from analyzers import TradeList
+from benchmarks.synthetic import synthetic_store
+from brokers import BracketBroker
+from feeds import ColumnarData
+from strategies import ConfirmSignalStrategy
+
+
+class ValueLog(bt.Analyzer):
+    """每根 K 线结束时的现金和账户价值"""
+
+    def start(self):
+        self.values = []
+
+    def next(self):
+        self.values.append((self.strategy.broker.getcash(), self.strategy.broker.getvalue()))
+
+    def get_analysis(self):
+        return self.values
+
+
+def _timed(func, elapsed):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed[0] += time.perf_counter() - start
+    return wrapper
+
+
+def run(store, broker_cls, params):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker = broker_cls()
+    cerebro.broker.setcommission(commission=0.0008, commtype=bt.CommInfoBase.COMM_PERC)
+    cerebro.adddata(ColumnarData(dataname=store))
+    cerebro.addstrategy(ConfirmSignalStrategy, printlog=False, **params)
+    cerebro.addanalyzer(TradeList, _name='trade_list')
+    cerebro.addanalyzer(ValueLog, _name='values')
+
+    broker_seconds = [0.0]
+    cerebro.broker.next = _timed(cerebro.broker.next, broker_seconds)
+    start = time.perf_counter()
+    result = cerebro.run()[0]
+    total = time.perf_counter() - start
+    return (result.analyzers.trade_list.get_analysis(), result.analyzers.values.get_analysis(),
+            cerebro.broker.getvalue(), total, broker_seconds[0])
+
+
+def compare(name, expected, actual):
+    """逐项比较，返回不一致的条数（浮点要求逐位相同）"""
+    mismatches = 0
+    if len(expected) != len(actual):
+        print(f'{name}: 数量不同 {len(expected)} / {len(actual)}')
+        mismatches += 1
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if isinstance(a, dict):  # 交易 ref 是全局计数，两次回测在同一进程里不同
+            a, b = dict(a, ref=None), dict(b, ref=None)
+        if a != b:
+            if mismatches < 5:
+                print(f'{name} 第 {i} 项不一致:\n  BackBroker:    {a}\n  BracketBroker: {b}')
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BracketBroker 成交核对和基准测试')
+    parser.add_argument('--bars', type=int, default=100000, help='合成数据长度')
+    parser.add_argument('--seed', type=int, default=0, help='合成数据随机种子')
+    parser.add_argument('--max-brackets', type=int, default=1, help='ConfirmSignalStrategy 的 max_brackets')
+    args = parser.parse_args()
+
+    store = synthetic_store(args.bars, args.seed)
+    params = dict(max_brackets=args.max_brackets)
+    trades_a, values_a, final_a, total_a, broker_a = run(store, bt.brokers.BackBroker, params)
+    trades_b, values_b, final_b, total_b, broker_b = run(store, BracketBroker, params)
+
+    mismatches = compare('交易', trades_a, trades_b) + compare('账户价值', values_a, values_b)
+    if final_a != final_b:
+        print(f'期末资金不同: {final_a} / {final_b}')
+        mismatches += 1
+
+    print(f'{len(trades_a)} 笔交易, {len(values_a)} 根 K 线, 不一致 {mismatches} 项, 期末资金 {final_b:.2f}')
+    print(f'BackBroker:    broker.next {broker_a:.2f}s, 总耗时 {total_a:.2f}s')
+    print(f'BracketBroker: broker.next {broker_b:.2f}s, 总耗时 {total_b:.2f}s, '
+          f'broker 加速 {broker_a / broker_b:.1f}x')
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
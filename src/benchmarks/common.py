@@ -0,0 +1,29 @@
+import os
+import resource
+import sys
+
+import backtrader as bt
+import pandas as pd
+
+DEFAULT_DATA = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'SOL-USDT_candlesticks good.csv')
+
+
+def load_feed(path, bars=None):
+    """
+    读取 K 线 CSV（毫秒时间戳）为 backtrader 数据源，bars 只取前 N 根。
+    增量同步追加的行不一定按时间排列（见 fetcher.store.append_rows），先排序去重，与 feeds.write_columns 相同
+    """
+    df = pd.read_csv(path)
+    df = df.sort_values('timestamp', kind='stable').drop_duplicates('timestamp', keep='last')
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    if bars:
+        df = df.iloc[:bars]
+    df = df.set_index('timestamp')
+    return bt.feeds.PandasData(dataname=df, volume='vol', openinterest=None)
+
+
+def peak_rss_mb():
+    """当前进程的峰值内存（ru_maxrss），单位 MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位是 KB，macOS 是字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
@@ -0,0 +1,50 @@
+"""
+对比 KMeansRange 的 sklearn 实现与 fast 模式（热启动 Lloyd 迭代）的耗时和结果一致率
+
+    cd src && python3 -m benchmarks.k_means_range --bars 1000
+"""
+import argparse
+import time
+
+import backtrader as bt
+import numpy as np
+
+from benchmarks.common import DEFAULT_DATA, load_feed
+from indicators.k_means_range import KMeansRange
+
+
+class KMeansStrategy(bt.Strategy):
+    params = (('fast', False),)
+
+    def __init__(self):
+        self.k_means = KMeansRange(self.data, fast=self.p.fast)
+
+
+def run_once(path, bars, fast):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(load_feed(path, bars))
+    cerebro.addstrategy(KMeansStrategy, fast=fast)
+
+    start = time.perf_counter()
+    strategy = cerebro.run()[0]
+    elapsed = time.perf_counter() - start
+    return elapsed, np.array(strategy.k_means.lines.is_range.array)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='KMeansRange 基准测试')
+    parser.add_argument('path', nargs='?', default=DEFAULT_DATA, help='K 线 CSV 文件')
+    parser.add_argument('--bars', type=int, default=1000, help='只取前 N 根 K 线（sklearn 版本很慢）')
+    args = parser.parse_args()
+
+    t_sklearn, ref = run_once(args.path, args.bars, fast=False)
+    t_fast, res = run_once(args.path, args.bars, fast=True)
+
+    valid = ~np.isnan(ref)
+    agreement = np.mean(ref[valid] == res[valid]) * 100
+    print(f'sklearn: {t_sklearn:.2f}s, fast: {t_fast:.2f}s, 加速 {t_sklearn / t_fast:.1f}x, '
+          f'is_range 一致率 {agreement:.1f}% ({valid.sum()} 根)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+对比 exactbars 省内存模式前后 ConfirmSignalStrategy 的峰值内存（ru_maxrss）和耗时
+
+    cd src && python3 -m benchmarks.memory --bars 1000000
+
+每种模式在独立的子进程里跑，峰值内存互不影响；runonce 为默认的向量化模式，next / exactbars=1 都是逐根计算。
+"""
+import argparse
+import multiprocessing
+
+from backtest import run_backtest
+from benchmarks.common import peak_rss_mb
+from benchmarks.synthetic import synthetic_store
+
+MODES = (
+    ('runonce', dict(runonce=True)),
+    ('next', dict(runonce=False)),
+    ('exactbars=1', dict(runonce=False, exactbars=1)),
+)
+
+
+def _run(job):
+    """子进程入口：跑一次回测，返回 (结果, 峰值内存 MB)"""
+    store, kwargs = job
+    return run_backtest(store, **kwargs), peak_rss_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='省内存模式基准测试')
+    parser.add_argument('--bars', type=int, default=1000000, help='合成数据长度')
+    parser.add_argument('--seed', type=int, default=0, help='合成数据随机种子')
+    args = parser.parse_args()
+
+    store = synthetic_store(args.bars, args.seed)
+    context = multiprocessing.get_context('spawn')
+    for name, kwargs in MODES:
+        with context.Pool(1) as pool:
+            report, peak = pool.apply(_run, ((store, kwargs),))
+        print(f'{name:<12} 峰值内存 {peak:>8.1f} MB, 耗时 {report["seconds"]:>7.1f}s, '
+              f'期末资金 {report["final_value"]:.2f}, 交易 {report["trades"]} 笔', flush=True)
+
+
+if __name__ == '__main__':
+    main()
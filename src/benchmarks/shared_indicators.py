@@ -0,0 +1,52 @@
+"""
+对比指标复用（indicators.registry）开启 / 关闭时 ConfirmSignalStrategy 的耗时
+
+    cd src && python3 -m benchmarks.shared_indicators "../data/SOL-USDT_candlesticks good.csv"
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import backtrader as bt
+
+from benchmarks.common import DEFAULT_DATA, load_feed
+from indicators import registry
+from strategies import ConfirmSignalStrategy
+
+
+def run_once(path, sharing, runonce):
+    registry.SHARING_ENABLED = sharing
+    cerebro = bt.Cerebro(runonce=runonce, stdstats=False)
+    cerebro.broker.setcommission(commission=0.0008, commtype=bt.CommInfoBase.COMM_PERC)
+    cerebro.adddata(load_feed(path))
+    cerebro.addstrategy(ConfirmSignalStrategy)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # 策略日志太多，这里不输出
+        cerebro.run()
+    elapsed = time.perf_counter() - start
+    return elapsed, cerebro.broker.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='指标复用基准测试')
+    parser.add_argument('path', nargs='?', default=DEFAULT_DATA, help='K 线 CSV 文件')
+    parser.add_argument('--repeat', type=int, default=3, help='每种配置重复次数，取最小值')
+    args = parser.parse_args()
+
+    for runonce in (True, False):
+        results = {}
+        for sharing in (False, True):
+            runs = [run_once(args.path, sharing, runonce) for _ in range(args.repeat)]
+            results[sharing] = (min(t for t, _ in runs), runs[0][1])
+        registry.SHARING_ENABLED = True
+
+        (t_off, v_off), (t_on, v_on) = results[False], results[True]
+        mode = 'runonce' if runonce else 'next'
+        print(f'[{mode}] 不复用: {t_off:.2f}s, 复用: {t_on:.2f}s, 加速 {t_off / t_on:.2f}x, '
+              f'最终资金 {v_off:.2f} / {v_on:.2f}')
+
+
+if __name__ == '__main__':
+    main()
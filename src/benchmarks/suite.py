@@ -0,0 +1,170 @@
+"""
+基准测试套件：在合成数据上分别测 src/indicators 里每个指标和 ConfirmSignalStrategy 整体，
+next / runonce 两种模式，结果（耗时、每秒 K 线数、峰值内存）写成 JSON，可与保存的基线对比。
+
+    cd src && python3 -m benchmarks.suite run --bars 10000 100000 1000000 --repeat 1 --out benchmarks/baseline.json
+    cd src && python3 -m benchmarks.suite run --bars 10000 --out /tmp/current.json
+    cd src && python3 -m benchmarks.suite compare benchmarks/baseline.json /tmp/current.json
+
+每项测试在独立的子进程里跑，峰值内存（ru_maxrss）互不影响。
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+import backtrader as bt
+
+import indicators
+from benchmarks.common import peak_rss_mb
+from benchmarks.synthetic import synthetic_store
+from feeds import ColumnarData
+from strategies import ConfirmSignalStrategy
+
+STRATEGY = 'ConfirmSignalStrategy'
+
+# 单独测试时的指标参数，以及最多测到多少根 K 线（逐根调用 sklearn 的指标太慢）
+INDICATOR_PARAMS = {
+    'KMeansRange': dict(fast=True),
+}
+MAX_BARS = {
+    'KMeansRange': 100000,
+}
+
+
+def indicator_classes():
+    """indicators 包导出的全部指标类"""
+    return {name: obj for name, obj in sorted(vars(indicators).items())
+            if isinstance(obj, type) and issubclass(obj, bt.Indicator)}
+
+
+class SingleIndicator(bt.Strategy):
+    """只挂一个指标、什么也不做的策略，用来单独计时"""
+    params = (('indicator', None), ('kwargs', None))
+
+    def __init__(self):
+        self.indicator = self.p.indicator(self.data, **(self.p.kwargs or {}))
+
+
+def _run(job):
+    """子进程入口：跑一项测试 repeat 次取最快的一次，返回结果字典"""
+    name, bars, runonce, store, repeat = job
+    elapsed = float('inf')
+    for _ in range(repeat):
+        cerebro = bt.Cerebro(stdstats=False, runonce=runonce)
+        cerebro.adddata(ColumnarData(dataname=store))
+        if name == STRATEGY:
+            cerebro.broker.setcommission(commission=0.0008, commtype=bt.CommInfoBase.COMM_PERC)
+            cerebro.addstrategy(ConfirmSignalStrategy, printlog=False)
+        else:
+            cerebro.addstrategy(SingleIndicator, indicator=indicator_classes()[name],
+                                kwargs=INDICATOR_PARAMS.get(name))
+
+        start = time.perf_counter()
+        cerebro.run()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return {
+        'name': name,
+        'bars': bars,
+        'mode': 'runonce' if runonce else 'next',
+        'seconds': elapsed,
+        'bars_per_sec': bars / elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run(bars_list, names, seed=0, repeat=3):
+    jobs = []
+    for bars in bars_list:
+        store = synthetic_store(bars, seed)
+        for name in names:
+            if bars > MAX_BARS.get(name, bars):
+                continue
+            for runonce in (True, False):
+                jobs.append((name, bars, runonce, store, repeat))
+
+    # spawn：每项测试一个全新进程，计时和峰值内存不受前面的测试影响
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for i, job in enumerate(jobs, 1):
+        with context.Pool(1) as pool:
+            result = pool.apply(_run, (job,))
+        results.append(result)
+        print(f'[{i}/{len(jobs)}] {result["name"]:<28}{result["bars"]:>9} {result["mode"]:<8}'
+              f'{result["seconds"]:>9.2f}s {result["bars_per_sec"]:>11.0f} 根/秒 {result["peak_rss_mb"]:>8.1f} MB',
+              flush=True)
+    return results
+
+
+def compare(baseline, current, threshold):
+    """按 (名称, K 线数, 模式) 对比每秒 K 线数，下降超过 threshold 的标记为变慢，返回变慢的项数"""
+    base = {(r['name'], r['bars'], r['mode']): r for r in baseline['results']}
+    slower = 0
+    for r in current['results']:
+        b = base.get((r['name'], r['bars'], r['mode']))
+        if b is None:
+            continue
+        ratio = r['bars_per_sec'] / b['bars_per_sec']
+        flag = ''
+        if ratio < 1 - threshold:
+            flag = '  <-- 变慢'
+            slower += 1
+        elif ratio > 1 + threshold:
+            flag = '  (变快)'
+        print(f'{r["name"]:<28}{r["bars"]:>9} {r["mode"]:<8}{b["bars_per_sec"]:>11.0f} -> {r["bars_per_sec"]:>11.0f} 根/秒 '
+              f'{ratio:>6.2f}x  内存 {b["peak_rss_mb"]:.0f} -> {r["peak_rss_mb"]:.0f} MB{flag}')
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description='指标 / 策略基准测试')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help='运行基准测试')
+    run_parser.add_argument('--bars', type=int, nargs='+', default=[10000, 100000, 1000000], help='合成数据长度')
+    run_parser.add_argument('--only', type=str, nargs='+', default=None, help='只测这些指标 / 策略（类名）')
+    run_parser.add_argument('--seed', type=int, default=0, help='合成数据随机种子')
+    run_parser.add_argument('--repeat', type=int, default=3, help='每项重复次数，取最快的一次')
+    run_parser.add_argument('--out', type=str, required=True, help='结果 JSON 路径')
+
+    compare_parser = sub.add_parser('compare', help='与基线对比')
+    compare_parser.add_argument('baseline', type=str, help='基线结果 JSON')
+    compare_parser.add_argument('current', type=str, help='本次结果 JSON')
+    compare_parser.add_argument('--threshold', type=float, default=0.15, help='每秒 K 线数下降超过该比例视为变慢')
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        names = args.only or list(indicator_classes()) + [STRATEGY]
+        results = run(args.bars, names, args.seed, args.repeat)
+        report = {
+            'meta': {
+                'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'backtrader': bt.__version__,
+                'platform': platform.platform(),
+                'seed': args.seed,
+                'repeat': args.repeat,
+            },
+            'results': results,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'结果已保存到 {args.out}')
+    else:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.current, encoding='utf-8') as f:
+            current = json.load(f)
+        slower = compare(baseline, current, args.threshold)
+        print(f'{slower} 项变慢（阈值 {args.threshold:.0%}）')
+        sys.exit(1 if slower else 0)
+
+
+if __name__ == '__main__':
+    main()
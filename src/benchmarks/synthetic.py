@@ -0,0 +1,78 @@
+"""
+确定性的合成 K 线：带状态切换的随机游走（上涨 / 下跌 / 震荡 / 高波动），5 分钟周期，
+价格按 0.01 取整，列与 fetch-data.py 保存的 CSV 相同。同样的 (bars, seed) 总是生成同样的数据。
+"""
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+from feeds import write_columns
+
+# (每根 K 线的对数收益均值, 波动率)，趋势状态的方向在生成时决定
+REGIMES = (
+    (0.0004, 0.002),   # 上涨
+    (-0.0004, 0.002),  # 下跌
+    (0.0, 0.001),      # 震荡
+    (0.0, 0.004),      # 高波动
+)
+BAR_MS = 5 * 60 * 1000
+START = datetime.datetime(2024, 1, 1)
+
+
+def random_walk(bars, seed=0, start_price=100.0, mean_regime_bars=300):
+    """生成 bars 根 K 线，每段状态持续时间服从均值 mean_regime_bars 的几何分布"""
+    rng = np.random.default_rng(seed)
+
+    returns = np.empty(bars)
+    vol = np.empty(bars)
+    log_price = 0.0
+    i = 0
+    while i < bars:
+        length = min(rng.geometric(1.0 / mean_regime_bars), bars - i)
+        drift, sigma = REGIMES[rng.integers(len(REGIMES))]
+        if drift:
+            # 趋势方向偏向回到起始价格，避免百万根 K 线后价格漂移到离谱的数量级
+            up = rng.random() < 1.0 / (1.0 + np.exp(2.0 * log_price))
+            drift = abs(drift) if up else -abs(drift)
+        returns[i:i + length] = drift + sigma * rng.standard_normal(length)
+        vol[i:i + length] = sigma
+        log_price += returns[i:i + length].sum()
+        i += length
+
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+
+    # 影线长度与当前波动率成正比
+    wick_up = np.abs(rng.standard_normal(bars)) * vol * close * 0.5
+    wick_down = np.abs(rng.standard_normal(bars)) * vol * close * 0.5
+    high = np.maximum(open_, close) + wick_up
+    low = np.minimum(open_, close) - wick_down
+
+    vol_contracts = np.round(rng.lognormal(8.0, 1.0, bars), 2)
+    start_ms = int((START - datetime.datetime(1970, 1, 1)).total_seconds() * 1000)
+    return pd.DataFrame({
+        'timestamp': start_ms + np.arange(bars, dtype=np.int64) * BAR_MS,
+        'open': np.round(open_, 2),
+        'high': np.round(high, 2),
+        'low': np.round(low, 2),
+        'close': np.round(close, 2),
+        'vol': vol_contracts,
+        'volCcy': vol_contracts,
+        'volCcyQuote': np.round(vol_contracts * close, 2),
+        'confirm': 1,
+    })
+
+
+def synthetic_store(bars, seed=0, out_dir=None):
+    """生成（或复用已生成的）合成数据列存储，返回存储目录"""
+    if out_dir is None:
+        out_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'columnar')
+    path = os.path.join(out_dir, f'synthetic_{bars}_{seed}')
+    if not os.path.exists(path):
+        # 先写临时目录再改名，中途中断不会留下不完整的存储
+        tmp = f'{path}.tmp{os.getpid()}'
+        write_columns(random_walk(bars, seed), tmp)
+        os.replace(tmp, path)
+    return path
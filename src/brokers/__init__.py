@@ -0,0 +1 @@
+from .bracket_broker import BracketBroker
@@ -0,0 +1,141 @@
+import backtrader as bt
+from backtrader import Order
+
+
+class BracketBroker(bt.brokers.BackBroker):
+    """
+    针对 ConfirmSignalStrategy 这类止损 / 止盈括号单 + 百分比佣金场景精简的 BackBroker。
+
+    成交、资金和持仓的计算仍走 BackBroker 自己的 _try_exec / _execute / _bracketize，结果逐笔相同，
+    只省掉每根 K 线上对本场景没有作用的开销：
+    - 挂单先用当根 open / high / low 判断价格是否触及，没触及的 Stop / Limit 单直接跳过
+    - 没有利息（interest = 0）时跳过逐持仓的利息计算（每根 K 线一次 datetime 转换）
+    - 收盘结算（cashadjust）和账户价值只对非零持仓计算；空仓且没有挂单时资金和价值不会变，整根 K 线直接跳过
+    设置了滑点、cheat-on-close / open、成交量限制、历史订单 / 净值或利息时，整根 K 线退回 BackBroker.next。
+    """
+
+    def start(self):
+        super(BracketBroker, self).start()
+        self._fast = None  # 第一根 K 线时判断（setcommission 等可能在 start 之后）
+        self._idle = False  # 上一根 K 线结束时空仓、没有挂单，资金和价值都已是最新
+        self._comminfo_of = {}  # data -> 佣金设置
+
+    def _fast_path(self):
+        p = self.p
+        if p.filler is not None or p.slip_perc or p.slip_fixed or p.coc or p.coo or not p.shortcash:
+            return False
+        if self._userhist or self._fundhist:
+            return False
+        return all(not comminfo.p.interest for comminfo in self.comminfo.values())
+
+    @staticmethod
+    def _touched(order):
+        """当根 K 线是否触及 Stop / Limit 单的价格（与 BackBroker._try_exec_stop / _try_exec_limit 的成交条件一致）"""
+        exectype = order.exectype
+        if exectype != Order.Stop and exectype != Order.Limit:
+            return True
+
+        # 与 BackBroker._try_exec 相同，优先用 tick_*（重采样 / 回放时为当前的部分 K 线）
+        data = order.data
+        popen = getattr(data, 'tick_open', None)
+        if popen is None:
+            popen = data.open[0]
+        price = order.created.price
+        if (exectype == Order.Stop) == order.isbuy():  # 买入止损 / 卖出限价：向上触及
+            phigh = getattr(data, 'tick_high', None)
+            if phigh is None:
+                phigh = data.high[0]
+            return popen >= price or phigh >= price
+        plow = getattr(data, 'tick_low', None)
+        if plow is None:
+            plow = data.low[0]
+        return popen <= price or plow <= price
+
+    def next(self):
+        if self._fast is None:
+            self._fast = self._fast_path()
+        if not self._fast:
+            return super(BracketBroker, self).next()
+
+        if self._idle and not (self.submitted or self.pending or self._toactivate or self._cash_addition):
+            return
+
+        while self._toactivate:
+            self._toactivate.popleft().activate()
+
+        if self.submitted:
+            self.check_submitted()
+
+        pending = self.pending
+        if pending:
+            pending.append(None)
+            while True:
+                order = pending.popleft()
+                if order is None:
+                    break
+
+                if order.valid and order.expire():
+                    self.notify(order)
+                    self._ococheck(order)
+                    self._bracketize(order, cancel=True)
+
+                elif not order.active():
+                    pending.append(order)  # 括号单的子单，入场单成交前不处理
+
+                else:
+                    if self._touched(order):
+                        self._try_exec(order)
+                    if order.alive():
+                        pending.append(order)
+                    elif order.status == Order.Completed:
+                        self._bracketize(order)  # 入场单成交后激活止损 / 止盈单
+
+        self._settle()
+
+    def _settle(self):
+        """
+        收盘结算（cashadjust）+ BackBroker._get_value 的精简版，跳过数量为 0 的持仓，一次循环完成。
+        浮点运算的顺序与 BackBroker 相同（现金先逐个持仓结算再加入追加资金，持仓价值按持仓顺序累加），结果逐位相同。
+        """
+        cash = self.cash
+        pos_value = 0.0
+        pos_value_unlever = 0.0
+        unrealized = 0.0
+        idle = not self.pending
+        for data, position in self.positions.items():
+            size = position.size
+            if not size:
+                continue
+            idle = False
+            comminfo = self._comminfo_of.get(data)
+            if comminfo is None:
+                comminfo = self._comminfo_of[data] = self.getcommissioninfo(data)
+            close = data.close[0]
+            cash += comminfo.cashadjust(size, position.adjbase, close)
+            position.adjbase = close
+
+            dvalue = comminfo.getvaluesize(size, close)
+            dunrealized = comminfo.profitandloss(size, position.price, close)
+            pos_value += dvalue
+            unrealized += dunrealized
+            if dvalue > 0:  # 多头按杠杆还原
+                dvalue -= dunrealized
+                pos_value_unlever += (dvalue / comminfo.get_leverage())
+                pos_value_unlever += dunrealized
+            else:
+                pos_value_unlever += dvalue
+        self.cash = cash
+        self._idle = idle
+
+        while self._cash_addition:
+            c = self._cash_addition.popleft()
+            self._fundshares += c / self._fundval
+            self.cash += c
+
+        self._value = self.cash + pos_value_unlever
+        self._fundval = self._value / self._fundshares
+        self._valuemkt = pos_value_unlever
+        self._valuelever = self.cash + pos_value
+        self._valuemktlever = pos_value
+        self._leverage = pos_value / (pos_value_unlever or 1.0)
+        self._unrealized = unrealized
@@ -0,0 +1,29 @@
+import argparse
+import logging
+import os
+
+from feeds import convert_csv, ensure_resampled
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把 K 线 CSV 转换为按列存储的二进制文件（data/columnar/）")
+    parser.add_argument("instId", type=str, help="交易对，例如 SOL-USDT")
+    parser.add_argument("--resample", type=str, nargs="+", default=[], help="同时由 5m 数据合成的高周期，例如 15m 1H 4H")
+    args = parser.parse_args()
+
+    csv_path = os.path.join("data", f"{args.instId}_candlesticks.csv")
+    if not os.path.exists(csv_path):
+        logging.error(f"{csv_path} 文件不存在")
+        exit(1)
+
+    path = convert_csv(csv_path)
+    logging.info(f"已转换 {csv_path} -> {path}")
+
+    for bar in args.resample:
+        logging.info(f"已合成 {bar} -> {ensure_resampled(csv_path, bar)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+from .columnar import ColumnarData, convert_csv, ensure_columnar, load_columns, select_range, write_columns
+from .live import LiveData, QueueSource, SocketSource, parse_candles
+from .replay import ReplayServer, candle_messages
+from .resample import ensure_resampled, resample_columns, resampled_path
+from .shared import SharedArena, SharedColumnarData, SharedColumns, attach, detach
@@ -0,0 +1,160 @@
+import datetime
+import os
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+# 每列一个 .npy 文件；datetime 列是 backtrader 的日期数值（bt.date2num），转换时算好，加载时不再解析时间
+COLUMNS = {
+    'timestamp': np.int64,
+    'datetime': np.float64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'vol': np.float64,
+    'volCcy': np.float64,
+    'volCcyQuote': np.float64,
+    'confirm': np.int8,
+}
+
+
+def store_path(csv_path, out_dir=None):
+    """data/<symbol>_candlesticks.csv -> data/columnar/<symbol>_candlesticks"""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    if out_dir is None:
+        out_dir = os.path.join(os.path.dirname(csv_path), 'columnar')
+    return os.path.join(out_dir, name)
+
+
+def ms_to_num(timestamps):
+    """毫秒时间戳 -> backtrader 日期数值，逐个调用 bt.date2num 以保证与 CSV 解析得到的值逐位相同"""
+    epoch = datetime.datetime(1970, 1, 1)
+    return np.array([bt.date2num(epoch + datetime.timedelta(milliseconds=int(ts))) for ts in timestamps],
+                    dtype=np.float64)
+
+
+def write_columns(df, path):
+    """
+    把 CSV 格式的 DataFrame（毫秒时间戳 + OHLCV）按时间排序去重后写成列存储。
+    没有 datetime 列时由 timestamp 换算（合成的高周期 K 线自带 datetime，见 feeds.resample）
+    """
+    os.makedirs(path, exist_ok=True)
+
+    df = df.sort_values('timestamp', kind='stable').drop_duplicates('timestamp', keep='last')
+    if 'datetime' not in df:
+        df = df.assign(datetime=ms_to_num(df['timestamp'].to_numpy()))
+
+    for name, dtype in COLUMNS.items():
+        np.save(os.path.join(path, f'{name}.npy'), df[name].to_numpy(dtype=dtype))
+
+    return path
+
+
+def convert_csv(csv_path, out_dir=None):
+    """把 fetch-data.py 保存的 CSV 转成按列存储的二进制文件，返回存储目录"""
+    return write_columns(pd.read_csv(csv_path), store_path(csv_path, out_dir))
+
+
+def ensure_columnar(csv_path, out_dir=None):
+    """存储不存在或比 CSV 旧时重新转换"""
+    path = store_path(csv_path, out_dir)
+    stamp = os.path.join(path, 'timestamp.npy')
+    if not os.path.exists(stamp) or os.path.getmtime(stamp) < os.path.getmtime(csv_path):
+        convert_csv(csv_path, out_dir)
+    return path
+
+
+def load_columns(path):
+    """以内存映射方式打开所有列，不读入内存"""
+    return {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in COLUMNS}
+
+
+def select_range(columns, start=None, end=None):
+    """
+    在 timestamp 列上二分查找 [start, end] 区间（毫秒时间戳或 datetime，均含端点），
+    返回各列的切片视图（仍然是内存映射，不复制）
+    """
+    timestamps = columns['timestamp']
+    lo = 0 if start is None else int(np.searchsorted(timestamps, _to_ms(start), side='left'))
+    hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, _to_ms(end), side='right'))
+    return {name: values[lo:hi] for name, values in columns.items()}
+
+
+def _to_ms(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+
+class ColumnarData(bt.feed.DataBase):
+    """
+    读取 convert_csv 生成的列存储。dataname 为存储目录。
+
+    fromdate / todate 用二分查找直接定位；没有 filter / 时区转换时 preload 一次性把整段拷进
+    line 缓冲区，不再逐行解析。
+    """
+    params = (
+        ('volume', 'vol'),  # 作为 volume 的列
+    )
+
+    def start(self):
+        super(ColumnarData, self).start()
+        self.columns = self._open_columns()
+        self._pos = None
+        self._end = None
+
+    def _open_columns(self):
+        return load_columns(self.p.dataname)
+
+    def _bounds(self):
+        dt = self.columns['datetime']
+        lo = int(np.searchsorted(dt, self.fromdate, side='left'))
+        hi = int(np.searchsorted(dt, self.todate, side='right'))
+        return lo, hi
+
+    def _line_columns(self):
+        return (
+            (self.lines.datetime, 'datetime'),
+            (self.lines.open, 'open'),
+            (self.lines.high, 'high'),
+            (self.lines.low, 'low'),
+            (self.lines.close, 'close'),
+            (self.lines.volume, self.p.volume),
+        )
+
+    def preload(self):
+        bulk = not self._filters and not self._tzinput and \
+            all(line.mode == line.UnBounded for line in self.lines)
+        if not bulk:
+            return super(ColumnarData, self).preload()
+
+        lo, hi = self._bounds()
+        self._pos = self._end = hi  # 已全部载入，之后 _load 不再重复读取
+        size = hi - lo
+        filled = set()
+        for line, name in self._line_columns():
+            values = np.ascontiguousarray(self.columns[name][lo:hi], dtype=np.float64)
+            line.array.frombytes(values.tobytes())
+            filled.add(id(line))
+        for line in self.lines:
+            if id(line) not in filled:  # openinterest 等没有对应列的 line 填 NaN
+                line.array.frombytes(np.full(size, np.nan).tobytes())
+            line.idx += size
+            line.lencount += size
+
+        self._last()
+        self.home()
+
+    def _load(self):
+        if self._pos is None:
+            self._pos, self._end = self._bounds()
+        if self._pos >= self._end:
+            return False
+
+        i = self._pos
+        self._pos += 1
+        for line, name in self._line_columns():
+            line[0] = self.columns[name][i]
+        return True
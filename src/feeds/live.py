@@ -0,0 +1,181 @@
+import collections
+import datetime
+import json
+import logging
+import queue
+import socket
+import threading
+
+import backtrader as bt
+import numpy as np
+
+from feeds.columnar import ensure_columnar, load_columns
+from fetcher import BAR_MS, append_rows
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def parse_candles(message):
+    """
+    解析一条 K 线推送，返回 [(timestamp, open, high, low, close, vol, volCcy, volCcyQuote, confirm), ...]。
+    message 为 OKX websocket candle 频道格式（{"arg": {...}, "data": [[ts, o, h, l, c, vol, volCcy, volCcyQuote, confirm]]}），
+    可以是 JSON 字符串或已解析的 dict；订阅确认等没有 data 的消息返回空列表。
+    """
+    if isinstance(message, (str, bytes)):
+        message = json.loads(message)
+    candles = []
+    for row in message.get('data', ()):
+        candles.append((int(row[0]), *(float(v) for v in row[1:8]), int(row[8])))
+    return candles
+
+
+class QueueSource:
+    """
+    最简单的数据源：其它线程（websocket 客户端回调等）调用 put(message) 推入消息，LiveData 从队列取。
+    调用 close() 表示不会再有数据，回测随之结束。
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.closed = False
+
+    def put(self, message):
+        self.queue.put(message)
+
+    def close(self):
+        self.closed = True
+        self.queue.put(None)
+
+    def poll(self, timeout):
+        """等待最多 timeout 秒，返回这段时间收到的全部 K 线；数据源已关闭且没有剩余消息时返回 None"""
+        try:
+            message = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        candles = []
+        while True:
+            if message is None:
+                if candles:
+                    self.queue.put(None)  # 先交出已收到的 K 线，下次 poll 再报告结束
+                    return candles
+                return None
+            candles.extend(parse_candles(message))
+            try:
+                message = self.queue.get_nowait()
+            except queue.Empty:
+                return candles
+
+
+class SocketSource(QueueSource):
+    """从 TCP 连接按行读取 JSON 消息（feeds.replay.ReplayServer 的客户端），后台线程读、主线程 poll"""
+
+    def __init__(self, host='127.0.0.1', port=8765):
+        super(SocketSource, self).__init__()
+        self.sock = socket.create_connection((host, port))
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        with self.sock, self.sock.makefile('r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    self.put(line)
+        self.close()
+
+
+class LiveData(bt.feed.DataBase):
+    """
+    实时 K 线数据源。
+
+    - 先从本地缓存（warmup，fetch-data.py 保存的 CSV，经列存储读取）取最近 warmup_bars 根已确认 K 线预热指标，
+      期间状态为 DELAYED，之后切换到 LIVE（策略可在 notify_data 里据此决定是否下单）；
+      cache 为 True 时实时收到的已确认 K 线追加写回该 CSV，下次启动接着预热
+    - 之后从 source 取推送，只有 confirm == 1（K 线已走完）才交给指标，未走完的最新一根放在 partial；
+      重复或早于已处理的 K 线丢弃，中间缺 K 线时记录警告
+    - line 缓冲区固定为最近 history 根（QBuffer；cerebro 开 exactbars 时改为指标声明的回看长度），
+      另外 recent 保存最近 history 根原始 K 线，
+      长时间运行内存不增长
+
+    source 需要实现 poll(timeout) -> K 线列表（没有新数据时为空列表，结束时为 None）。
+    """
+    params = (
+        ('source', None),
+        ('warmup', None),  # 预热用的 K 线 CSV（本地缓存）
+        ('warmup_bars', 1000),
+        ('cache', False),  # 实时 K 线是否追加写回 warmup CSV
+        ('history', 2000),  # line 缓冲区和 recent 保存的 K 线数，需大于所有指标的最长回看
+        ('bar_ms', BAR_MS['5m']),
+        ('poll_timeout', 1.0),  # 没有数据时每次等待的秒数，避免 cerebro 空转
+    )
+
+    def islive(self):
+        return True
+
+    def start(self):
+        super(LiveData, self).start()
+        for line in self.lines:
+            line.qbuffer()
+            line.minbuffer(self.p.history)
+
+        self.recent = collections.deque(maxlen=self.p.history)
+        self.partial = None  # 最新一根尚未走完的 K 线
+        self.last_timestamp = None
+        self.pending = collections.deque()
+        self.pending.extend(self._warmup_candles())
+        self.warming_up = bool(self.pending)
+        self.put_notification(self.DELAYED if self.warming_up else self.LIVE)
+
+    def _warmup_candles(self):
+        if not self.p.warmup or not self.p.warmup_bars:
+            return []
+        columns = load_columns(ensure_columnar(self.p.warmup))
+        confirmed = np.flatnonzero(np.asarray(columns['confirm']) == 1)[-self.p.warmup_bars:]
+        names = ('timestamp', 'open', 'high', 'low', 'close', 'vol', 'volCcy', 'volCcyQuote', 'confirm')
+        values = [np.asarray(columns[name])[confirmed].tolist() for name in names]
+        return list(zip(*values))
+
+    def _fill(self):
+        """从数据源取新推送放进 pending，返回 False 表示数据源已结束"""
+        candles = self.p.source.poll(self.p.poll_timeout)
+        if candles is None:
+            return False
+        for candle in candles:
+            if candle[8] == 1:
+                self.pending.append(candle)
+                self.partial = None
+            else:
+                self.partial = candle
+        return True
+
+    def _load(self):
+        while True:
+            if not self.pending:
+                if self.warming_up:
+                    self.warming_up = False
+                    self.put_notification(self.LIVE)
+                if not self._fill():
+                    return False
+                if not self.pending:
+                    return None  # 暂时没有已确认的 K 线
+
+            candle = self.pending.popleft()
+            timestamp = candle[0]
+            if self.last_timestamp is not None:
+                if timestamp <= self.last_timestamp:
+                    continue  # 重复推送或预热数据里已有
+                if timestamp - self.last_timestamp > self.p.bar_ms:
+                    missing = (timestamp - self.last_timestamp) // self.p.bar_ms - 1
+                    logging.warning(f'K 线不连续: {self.last_timestamp} -> {timestamp}，缺少 {missing} 根')
+            self.last_timestamp = timestamp
+            self.recent.append(candle)
+            if self.p.cache and not self.warming_up:
+                append_rows(self.p.warmup, [candle])
+
+            self.lines.datetime[0] = bt.date2num(EPOCH + datetime.timedelta(milliseconds=timestamp))
+            self.lines.open[0] = candle[1]
+            self.lines.high[0] = candle[2]
+            self.lines.low[0] = candle[3]
+            self.lines.close[0] = candle[4]
+            self.lines.volume[0] = candle[5]
+            self.lines.openinterest[0] = float('nan')
+            return True
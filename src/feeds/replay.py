@@ -0,0 +1,61 @@
+import json
+import socketserver
+import threading
+import time
+
+import pandas as pd
+
+
+def candle_messages(df, instId='SOL-USDT', bar='5m', partials=2):
+    """
+    把 CSV 里的 K 线按 OKX websocket candle 频道的格式逐条生成。
+    每根 K 线先推 partials 条未走完（confirm = 0）的中间状态，再推一条 confirm = 1 的最终值，
+    模拟实盘里同一根 K 线多次更新的情况。
+    """
+    arg = {'channel': f'candle{bar}', 'instId': instId}
+    for row in df.itertuples(index=False):
+        for i in range(1, partials + 1):
+            frac = i / (partials + 1)
+            close = row.open + (row.close - row.open) * frac
+            partial = [row.timestamp, row.open, max(row.open, close), min(row.open, close), close,
+                       row.vol * frac, row.volCcy * frac, row.volCcyQuote * frac, 0]
+            yield {'arg': arg, 'data': [[str(v) for v in partial]]}
+        final = [row.timestamp, row.open, row.high, row.low, row.close, row.vol, row.volCcy, row.volCcyQuote, 1]
+        yield {'arg': arg, 'data': [[str(v) for v in final]]}
+
+
+class ReplayServer(socketserver.ThreadingTCPServer):
+    """
+    本地回放服务器：客户端连上后按 JSON 行推送 CSV 中 [start, end) 的 K 线，推完关闭连接。
+    interval 为每条消息之间的间隔秒数（0 为尽快推送）。用于在没有交易所连接时测试 LiveData。
+
+        server = ReplayServer('data/SOL-USDT_candlesticks.csv', port=8765, start=1000)
+        server.serve_in_background()
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, csv_path, host='127.0.0.1', port=8765, start=0, end=None, interval=0.0,
+                 instId='SOL-USDT', bar='5m', partials=2):
+        df = pd.read_csv(csv_path).sort_values('timestamp').drop_duplicates('timestamp', keep='last')
+        self.df = df.iloc[start:end]
+        self.interval = interval
+        self.instId = instId
+        self.bar = bar
+        self.partials = partials
+        super(ReplayServer, self).__init__((host, port), _ReplayHandler)
+
+    def serve_in_background(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class _ReplayHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        for message in candle_messages(server.df, server.instId, server.bar, server.partials):
+            self.wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+            if server.interval:
+                self.wfile.flush()
+                time.sleep(server.interval)
@@ -0,0 +1,73 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from feeds.columnar import ensure_columnar, load_columns, ms_to_num, write_columns
+from fetcher import BAR_MS
+
+VOLUME_COLUMNS = ('vol', 'volCcy', 'volCcyQuote')
+
+
+def resample_columns(columns, bar, base_bar='5m'):
+    """
+    把 base_bar 的列存储（load_columns 的结果）合成为 bar 周期的 K 线，整段一次向量化计算，返回 CSV 格式的 DataFrame。
+
+    - 按 UTC 整点对齐分桶：open 取第一根，close 取最后一根，high / low 取极值，三个成交量列求和
+    - timestamp 为周期开始时间（与 OKX 相同）；datetime 取周期内最后一根 base_bar 的时间，
+      回测时高周期 K 线与补全它的那根 5m K 线同时送出，不会提前看到未来数据
+    - confirm：周期内的 base_bar 都已确认且周期已走完才为 1；数据末尾未走完的一根保留，confirm 为 0。
+      中间缺 K 线的周期按已有部分计算
+    """
+    bar_ms, base_ms = BAR_MS[bar], BAR_MS[base_bar]
+    if bar_ms % base_ms:
+        raise ValueError(f'{bar} 不是 {base_bar} 的整数倍')
+
+    timestamps = np.asarray(columns['timestamp'], dtype=np.int64)
+    if not len(timestamps):
+        return pd.DataFrame({name: [] for name in ('timestamp', 'datetime', 'open', 'high', 'low', 'close',
+                                                   *VOLUME_COLUMNS, 'confirm')})
+
+    bucket = timestamps - timestamps % bar_ms
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.concatenate((starts[1:], [len(timestamps)])) - 1
+
+    confirmed = np.logical_and.reduceat(np.asarray(columns['confirm']) == 1, starts)
+    confirmed[-1] &= timestamps[-1] >= bucket[-1] + bar_ms - base_ms  # 最后一个周期是否已走完
+
+    frame = {
+        'timestamp': bucket[starts],
+        'datetime': ms_to_num(timestamps[ends]),
+        'open': np.asarray(columns['open'])[starts],
+        'high': np.maximum.reduceat(np.asarray(columns['high']), starts),
+        'low': np.minimum.reduceat(np.asarray(columns['low']), starts),
+        'close': np.asarray(columns['close'])[ends],
+    }
+    for name in VOLUME_COLUMNS:
+        frame[name] = np.add.reduceat(np.asarray(columns[name]), starts)
+    frame['confirm'] = confirmed.astype(np.int8)
+    return pd.DataFrame(frame)
+
+
+def resampled_path(store, bar):
+    """data/columnar/<symbol>_candlesticks -> data/columnar/resampled/<symbol>_candlesticks_<bar>"""
+    parent, name = os.path.split(os.path.normpath(store))
+    return os.path.join(parent, 'resampled', f'{name}_{bar}')
+
+
+def ensure_resampled(csv_path, bar, out_dir=None):
+    """
+    由 5m CSV 的列存储合成 bar 周期的列存储，返回存储目录。
+    每个周期缓存一份，5m 存储更新（CSV 追加了新数据）后重新合成。
+    """
+    base = ensure_columnar(csv_path, out_dir)
+    path = resampled_path(base, bar)
+    stamp = os.path.join(path, 'timestamp.npy')
+    if not os.path.exists(stamp) or os.path.getmtime(stamp) < os.path.getmtime(os.path.join(base, 'timestamp.npy')):
+        # 先写临时目录再替换，中途中断不会留下不完整的存储
+        tmp = f'{path}.tmp{os.getpid()}'
+        write_columns(resample_columns(load_columns(base), bar), tmp)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+    return path
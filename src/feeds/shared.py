@@ -0,0 +1,159 @@
+"""
+多进程回测共享的 K 线数据：主进程把列存储的各列拷进一块 multiprocessing.shared_memory，
+子进程按名字映射同一块内存（不复制、不解析），32 个进程也只占一份数据。
+
+    with SharedArena() as arena:
+        handle = arena.add(ensure_columnar('data/SOL-USDT_candlesticks.csv'))
+        # handle 可以 pickle 传给子进程
+        cerebro.adddata(SharedColumnarData(dataname=handle))
+
+主进程一侧 add / release 计数，同一份存储只拷贝一次，计数归零（或 arena 关闭）时释放共享内存；
+子进程一侧 attach / detach 计数，同一进程里多个数据源共用一次映射，最后一个 stop 时关闭。
+"""
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from feeds.columnar import COLUMNS, ColumnarData, load_columns
+
+ALIGN = 64  # 各列起始位置按缓存行对齐
+
+
+class SharedColumns:
+    """共享内存中一份列存储的描述（可 pickle）：共享内存名、行数、各列 (名称, dtype, 偏移)"""
+    __slots__ = ('name', 'size', 'layout')
+
+    def __init__(self, name, size, layout):
+        self.name = name
+        self.size = size
+        self.layout = layout
+
+    def __getstate__(self):
+        return self.name, self.size, self.layout
+
+    def __setstate__(self, state):
+        self.name, self.size, self.layout = state
+
+    def __repr__(self):
+        return f'SharedColumns({self.name!r}, size={self.size})'
+
+
+def _layout(size):
+    layout = []
+    offset = 0
+    for name, dtype in COLUMNS.items():
+        layout.append((name, np.dtype(dtype).str, offset))
+        offset += -(-size * np.dtype(dtype).itemsize // ALIGN) * ALIGN
+    return tuple(layout), max(offset, 1)
+
+
+def _views(buf, handle):
+    return {name: np.ndarray(handle.size, dtype=dtype, buffer=buf, offset=offset)
+            for name, dtype, offset in handle.layout}
+
+
+def _copy(columns, buf, handle):
+    # 视图只在函数内存在，之后 SharedMemory.close 不会因为仍有引用而失败
+    for name, values in _views(buf, handle).items():
+        values[:] = columns[name]
+
+
+class SharedArena:
+    """主进程一侧：创建、计数和释放共享内存"""
+
+    def __init__(self):
+        self.blocks = {}  # 存储目录 -> [SharedMemory, SharedColumns, 引用数]
+
+    def add(self, store):
+        """把 store（feeds.convert_csv 生成的列存储目录）拷进共享内存，返回 SharedColumns；已拷贝过的只增加计数"""
+        entry = self.blocks.get(store)
+        if entry is None:
+            columns = load_columns(store)
+            size = len(columns['timestamp'])
+            layout, nbytes = _layout(size)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            handle = SharedColumns(shm.name, size, layout)
+            _copy(columns, shm.buf, handle)
+            entry = self.blocks[store] = [shm, handle, 0]
+        entry[2] += 1
+        return entry[1]
+
+    def release(self, handle):
+        """与 add 配对，计数归零时释放共享内存（子进程已有的映射在它们 detach 前仍然有效）"""
+        for store, entry in list(self.blocks.items()):
+            if entry[1].name == handle.name:
+                entry[2] -= 1
+                if entry[2] <= 0:
+                    self._free(store)
+                return
+
+    def _free(self, store):
+        shm = self.blocks.pop(store)[0]
+        shm.close()
+        shm.unlink()
+
+    def close(self):
+        for store in list(self.blocks):
+            self._free(store)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# 子进程一侧：共享内存名 -> [SharedMemory, 引用数]
+_attached = {}
+
+
+def _open(name):
+    """按名字映射已有的共享内存。创建者负责释放，这里不登记到 resource_tracker，否则子进程退出时会被提前删除"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def attach(handle):
+    """返回 handle 对应的各列（共享内存上的只读 NumPy 视图，与 load_columns 的结果同格式）"""
+    entry = _attached.get(handle.name)
+    if entry is None:
+        entry = _attached[handle.name] = [_open(handle.name), 0]
+    entry[1] += 1
+    columns = _views(entry[0].buf, handle)
+    for values in columns.values():
+        values.flags.writeable = False
+    return columns
+
+
+def detach(handle):
+    """与 attach 配对，最后一个使用者 detach 时关闭映射（调用方需先丢弃 attach 返回的视图）"""
+    entry = _attached.get(handle.name)
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] <= 0:
+        del _attached[handle.name]
+        entry[0].close()
+
+
+class SharedColumnarData(ColumnarData):
+    """
+    与 ColumnarData 相同，但 dataname 为 SharedArena.add 返回的 SharedColumns，直接读共享内存。
+    preload 时拷进 line 缓冲区；stop 时 detach。
+    """
+
+    def _open_columns(self):
+        return attach(self.p.dataname)
+
+    def stop(self):
+        super(SharedColumnarData, self).stop()
+        if getattr(self, 'columns', None) is not None:
+            self.columns = None
+            detach(self.p.dataname)
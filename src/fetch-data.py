@@ -5,6 +5,8 @@ import logging
 import os
 import csv
 
+from fetcher import HEADER, csv_path, download, sync_candlesticks
+
 # 设置日志
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -19,12 +21,12 @@ def save_to_csv(data, filename):
 
     with open(filename, mode="w", newline="", encoding="utf-8") as file:
         writer = csv.writer(file)
-        writer.writerow(["timestamp", "open", "high", "low", "close", "vol", "volCcy", "volCcyQuote", "confirm"])  # 表头
+        writer.writerow(HEADER)  # 表头
         writer.writerows(data)
 
     logging.info(f"数据已按时间升序排序并保存到 {filename}")
 
-def fetch_all_candlesticks(marketDataAPI, instId, total_limit, sleep_time=0.1, max_retries=3):
+def fetch_all_candlesticks(marketDataAPI, instId, total_limit, sleep_time=0.1, max_retries=3, bar="5m"):
     """
     从 OKX API 获取历史 K 线数据，支持自动翻页。
     """
@@ -40,7 +42,7 @@ def fetch_all_candlesticks(marketDataAPI, instId, total_limit, sleep_time=0.1, m
 
         for retry in range(max_retries):
             try:
-                params = {"instId": instId, "limit": str(fetch_limit), "bar": "5m"}
+                params = {"instId": instId, "limit": str(fetch_limit), "bar": bar}
                 if after:
                     params["after"] = after
                 response = marketDataAPI.get_history_candlesticks(**params)
@@ -76,20 +78,36 @@ def fetch_all_candlesticks(marketDataAPI, instId, total_limit, sleep_time=0.1, m
 
 def main():
     parser = argparse.ArgumentParser(description="获取 OKX 历史 K 线数据")
-    parser.add_argument("instId", type=str, help="交易对，例如 BTC-USD")
+    parser.add_argument("instId", type=str, nargs="+", help="交易对，例如 BTC-USD，可以传多个")
+    parser.add_argument("--bar", type=str, nargs="+", default=["5m"], help="K 线周期，例如 1m 5m 1H，可以传多个")
     parser.add_argument("--flag", type=str, default="0", help="实盘:0 , 模拟盘：1")
     parser.add_argument("--limit", type=int, default=100000, help="返回数据条数")
     parser.add_argument("--sleep_time", type=float, default=0.1, help="API 请求间隔时间")
+    parser.add_argument("--sync", action="store_true", help="增量同步：只下载缺失的数据并追加到已有文件，支持断点续传")
+    parser.add_argument("--workers", type=int, default=8, help="多个交易对 / 周期并发下载的线程数")
+    parser.add_argument("--rate", type=float, default=10.0, help="并发下载时的总请求速率上限（次/秒）")
     
     args = parser.parse_args()
-    
+
+    if len(args.instId) > 1 or len(args.bar) > 1:
+        # 多个交易对或周期：线程池并发增量同步，共享令牌桶限速
+        download(lambda: MarketData.MarketAPI(flag=args.flag), args.instId, args.bar,
+                 total_limit=args.limit, workers=args.workers, rate=args.rate)
+        return
+
+    instId, bar = args.instId[0], args.bar[0]
     marketDataAPI = MarketData.MarketAPI(flag=args.flag)
-    result = fetch_all_candlesticks(marketDataAPI, args.instId, args.limit, sleep_time=args.sleep_time)
+
+    if args.sync:
+        sync_candlesticks(marketDataAPI, instId, csv_path(instId, bar), bar=bar, total_limit=args.limit, sleep_time=args.sleep_time)
+        return
+
+    result = fetch_all_candlesticks(marketDataAPI, instId, args.limit, sleep_time=args.sleep_time, bar=bar)
     
     logging.info(f"最终获取 {len(result)} 条数据")
     
     if result:
-        output_filename = os.path.join("data", f"{args.instId}_candlesticks.csv")
+        output_filename = csv_path(instId, bar)
         save_to_csv(result, output_filename)
 
 if __name__ == "__main__":
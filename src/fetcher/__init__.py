@@ -0,0 +1,3 @@
+from .store import BAR_MS, HEADER, append_rows, csv_path, drop_unconfirmed, find_gaps, read_timestamps
+from .sync import request_page, sync_candlesticks
+from .downloader import RateLimitedAPI, TokenBucket, download
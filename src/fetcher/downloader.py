@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from fetcher.store import csv_path
+from fetcher.sync import sync_candlesticks
+
+
+class TokenBucket(object):
+    """
+    线程安全的令牌桶：每秒补充 rate 个令牌，最多积攒 capacity 个，acquire 在没有令牌时阻塞。
+    令牌不够时先预支（余额可为负），在锁外睡到补齐为止，多个线程按到达顺序依次放行。
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimitedAPI(object):
+    """包装 MarketAPI，每次请求前从共享令牌桶取令牌"""
+
+    def __init__(self, marketDataAPI, bucket):
+        self.api = marketDataAPI
+        self.bucket = bucket
+
+    def get_history_candlesticks(self, **params):
+        self.bucket.acquire()
+        return self.api.get_history_candlesticks(**params)
+
+
+class JobProgress(object):
+    """单个 (交易对, 周期) 任务的进度与吞吐量"""
+
+    def __init__(self, instId, bar):
+        self.instId = instId
+        self.bar = bar
+        self.requests = 0
+        self.rows = 0
+        self.started = None
+        self.elapsed = 0.0
+        self.error = None
+
+    def on_page(self, rows):
+        self.requests += 1
+        self.rows += rows
+        self.elapsed = time.monotonic() - self.started
+        logging.info(f"{self.instId} {self.bar}: {self.requests} 次请求, {self.rows} 条, {self.throughput:.0f} 条/秒")
+
+    @property
+    def throughput(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def download(api_factory, instIds, bars, data_dir="data", total_limit=100000, workers=8, rate=10.0,
+             max_retries=5, backoff=0.5):
+    """
+    并发下载多个交易对、多个周期（每个组合一个 sync_candlesticks 任务，支持断点续传）。
+
+    api_factory() 为每个任务创建一个 MarketAPI；所有任务共享一个令牌桶，总请求速率不超过 rate 次/秒
+    （OKX 历史 K 线接口为 20 次 / 2 秒）。返回每个任务的 JobProgress 列表。
+    """
+    bucket = TokenBucket(rate)
+    jobs = [JobProgress(instId, bar) for instId in instIds for bar in bars]
+
+    def run(job):
+        job.started = time.monotonic()
+        api = RateLimitedAPI(api_factory(), bucket)
+        try:
+            sync_candlesticks(api, job.instId, csv_path(job.instId, job.bar, data_dir), bar=job.bar,
+                              total_limit=total_limit, sleep_time=0, max_retries=max_retries,
+                              backoff=backoff, on_page=job.on_page)
+        except Exception as e:  # 单个任务失败不影响其它任务，检查点保留，下次从断点继续
+            job.error = e
+            logging.error(f"{job.instId} {job.bar} 下载失败: {e}")
+        job.elapsed = time.monotonic() - job.started
+        return job
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in as_completed([executor.submit(run, job) for job in jobs]):
+            job = future.result()
+            status = "失败" if job.error else "完成"
+            logging.info(f"{job.instId} {job.bar} {status}: {job.rows} 条, {job.elapsed:.1f} 秒, {job.throughput:.0f} 条/秒")
+
+    total_rows = sum(job.rows for job in jobs)
+    total_elapsed = time.monotonic() - started
+    logging.info(f"全部完成: {len(jobs)} 个任务, {total_rows} 条, {total_elapsed:.1f} 秒, "
+                 f"{total_rows / total_elapsed if total_elapsed > 0 else 0:.0f} 条/秒")
+    return jobs
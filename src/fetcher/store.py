@@ -0,0 +1,85 @@
+import csv
+import os
+
+import numpy as np
+
+HEADER = ["timestamp", "open", "high", "low", "close", "vol", "volCcy", "volCcyQuote", "confirm"]
+
+# OKX bar 参数对应的毫秒数
+BAR_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1H": 3_600_000,
+    "2H": 7_200_000,
+    "4H": 14_400_000,
+    "1D": 86_400_000,
+}
+
+
+def csv_path(instId, bar="5m", data_dir="data"):
+    """5m 沿用原来的文件名 data/<instId>_candlesticks.csv，其它周期加后缀"""
+    suffix = "" if bar == "5m" else f"_{bar}"
+    return os.path.join(data_dir, f"{instId}_candlesticks{suffix}.csv")
+
+
+def read_timestamps(filename):
+    """只读取时间戳列，返回升序去重后的 int64 数组（文件不存在时为空）"""
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        return np.array([], dtype=np.int64)
+    timestamps = np.loadtxt(filename, delimiter=",", skiprows=1, usecols=0, dtype=np.int64, ndmin=1)
+    return np.unique(timestamps)
+
+
+def append_rows(filename, rows):
+    """
+    追加写入，不重写已有内容。行按到达顺序写入，回补的旧数据可能排在新数据之后，
+    读取方（feeds.convert_csv 等）负责按时间排序、去重。
+    """
+    if not rows:
+        return
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    new_file = not os.path.exists(filename) or os.path.getsize(filename) == 0
+    with open(filename, mode="a", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        if new_file:
+            writer.writerow(HEADER)
+        writer.writerows(rows)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def drop_unconfirmed(filename):
+    """
+    删除 confirm=0（当时还未收盘）的行，返回删除的条数。
+    旧版 save_to_csv 会把最新一根未确认的 K 线写进文件，删掉后由同步任务重新下载确认后的版本。
+    """
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        return 0
+    with open(filename, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        rows = list(reader)
+    kept = [row for row in rows if row and row[HEADER.index("confirm")] != "0"]
+    dropped = len(rows) - len(kept)
+    if dropped:
+        # 先写临时文件再替换，中断时原文件不受影响
+        tmp = filename + ".tmp"
+        with open(tmp, mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(header or HEADER)
+            writer.writerows(kept)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, filename)
+    return dropped
+
+
+def find_gaps(timestamps, bar_ms):
+    """相邻两根 K 线间隔大于一个周期的位置，返回 [(较早的时间戳, 较晚的时间戳), ...]"""
+    if len(timestamps) < 2:
+        return []
+    idx = np.nonzero(np.diff(timestamps) > bar_ms)[0]
+    return [(int(timestamps[i]), int(timestamps[i + 1])) for i in idx]
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import random
+import time
+
+from fetcher.store import BAR_MS, append_rows, drop_unconfirmed, find_gaps, read_timestamps
+
+LIMIT_PER_REQUEST = 100  # OKX 每次请求最多 100 条
+
+
+def request_page(marketDataAPI, params, sleep_time=0.1, max_retries=3):
+    """
+    请求一页 K 线（新到旧），失败按带随机抖动的指数退避重试（避免多个线程同时重试）。
+    返回数据列表；API 返回错误或重试耗尽时抛出 RuntimeError。
+    """
+    for retry in range(max_retries):
+        try:
+            response = marketDataAPI.get_history_candlesticks(**params)
+            if isinstance(response, dict) and response.get("code", "0") != "0":
+                raise RuntimeError(f"API 错误: {response.get('msg', '未知错误')}")
+            return response["data"]
+        except Exception as e:
+            logging.error(f"请求失败: {e}")
+            if retry < max_retries - 1:
+                sleep_duration = random.uniform(0.5, 1.5) * sleep_time * (2 ** retry)
+                logging.warning(f"重试 {retry + 1}/{max_retries}，等待 {sleep_duration} 秒")
+                time.sleep(sleep_duration)
+    raise RuntimeError("重试次数耗尽，终止请求")
+
+
+def checkpoint_path(filename):
+    return filename + ".sync.json"
+
+
+def load_checkpoint(filename):
+    path = checkpoint_path(filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(filename, state):
+    """先写临时文件再替换，保证中断时检查点不会写坏"""
+    path = checkpoint_path(filename)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def plan_tasks(timestamps, bar_ms, total_limit, empty_gaps=()):
+    """
+    根据已存数据规划需要下载的区间。每个任务从 after（不含，None 表示从最新开始）向更早翻页，
+    直到 newer（不含）为止；newer 为 None 时一直回补到凑够 remaining 条或没有更多数据。
+    empty_gaps 为之前请求过但交易所没有数据的缺口 [(较早的时间戳, 较晚的时间戳), ...]，不再请求。
+    """
+    if len(timestamps) == 0:
+        return [{"name": "full", "after": None, "newer": None, "remaining": total_limit}]
+
+    tasks = [{"name": "head", "after": None, "newer": int(timestamps[-1]), "remaining": None}]
+    skip = {tuple(gap) for gap in empty_gaps}
+    for older, newer in find_gaps(timestamps, bar_ms):
+        if (older, newer) in skip:
+            continue
+        tasks.append({"name": f"gap {older}-{newer}", "after": newer, "newer": older, "remaining": None,
+                      "gap": [older, newer], "written": 0})
+    backfill = total_limit - len(timestamps)
+    if backfill > 0:
+        tasks.append({"name": "backfill", "after": int(timestamps[0]), "newer": None, "remaining": backfill})
+    return tasks
+
+
+def run_task(marketDataAPI, instId, bar, filename, task, state, sleep_time=0.1, max_retries=3,
+             backoff=None, on_page=None):
+    """
+    执行一个下载任务：每页写入后立即更新检查点，中断后从 after 继续。
+    sleep_time 为翻页间隔，backoff 为重试退避的基数（默认同 sleep_time）；
+    on_page(rows_written) 每写完一页调用一次，用于进度统计。
+    """
+    backoff = sleep_time if backoff is None else backoff
+    while task["remaining"] is None or task["remaining"] > 0:
+        limit = LIMIT_PER_REQUEST if task["remaining"] is None else min(LIMIT_PER_REQUEST, task["remaining"])
+        params = {"instId": instId, "limit": str(limit), "bar": bar}
+        if task["after"] is not None:
+            params["after"] = str(task["after"])
+
+        data = request_page(marketDataAPI, params, backoff, max_retries)
+        if not data:
+            break
+
+        # 只保留已确认的 K 线，且不早于 newer
+        rows = [row for row in data
+                if row[8] == "1" and (task["newer"] is None or int(row[0]) > task["newer"])]
+        append_rows(filename, rows)
+
+        task["after"] = int(data[-1][0])
+        if task["remaining"] is not None:
+            task["remaining"] -= len(rows)
+        if "gap" in task:
+            task["written"] += len(rows)
+        save_checkpoint(filename, state)
+        logging.info(f"{instId} {bar} [{task['name']}] 写入 {len(rows)} 条，after={task['after']}")
+        if on_page is not None:
+            on_page(len(rows))
+
+        reached = task["newer"] is not None and task["after"] <= task["newer"]
+        if reached or len(data) < limit:
+            break
+
+        if sleep_time:
+            time.sleep(sleep_time)
+
+
+def sync_candlesticks(marketDataAPI, instId, filename, bar="5m", total_limit=100000, sleep_time=0.1, max_retries=3,
+                      backoff=None, on_page=None):
+    """
+    增量同步：只下载比已存最新时间更新的数据、中间缺口，以及不足 total_limit 时更早的历史。
+    数据追加写入 filename，进度记录在 <filename>.sync.json，中断后再次运行会从断点继续。
+    同步完成后检查点保留，记录交易所本身没有数据的缺口（empty_gaps），之后不再重复请求。
+    返回本次写入的条数。
+    """
+    state = load_checkpoint(filename)
+    if state is None or state.get("instId") != instId or state.get("bar") != bar:
+        state = {"instId": instId, "bar": bar, "tasks": []}
+    state.setdefault("empty_gaps", [])
+
+    if state["tasks"]:
+        logging.info(f"从检查点继续: 剩余 {len(state['tasks'])} 个任务")
+    else:
+        dropped = drop_unconfirmed(filename)
+        if dropped:
+            logging.info(f"{filename}: 删除 {dropped} 条未确认的 K 线，重新下载")
+        timestamps = read_timestamps(filename)
+        state["tasks"] = plan_tasks(timestamps, BAR_MS[bar], total_limit, state["empty_gaps"])
+        save_checkpoint(filename, state)
+
+    before = len(read_timestamps(filename))
+    while state["tasks"]:
+        task = state["tasks"][0]
+        run_task(marketDataAPI, instId, bar, filename, task, state, sleep_time, max_retries,
+                 backoff, on_page)
+        if "gap" in task and task["written"] == 0:
+            state["empty_gaps"].append(task["gap"])  # 交易所没有这段数据
+        state["tasks"].pop(0)
+        save_checkpoint(filename, state)
+
+    written = len(read_timestamps(filename)) - before
+    logging.info(f"{instId} {bar} 同步完成，新增 {written} 条")
+    return written
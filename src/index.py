@@ -3,33 +3,25 @@ from __future__ import (absolute_import, division, print_function,
 
 import backtrader as bt
 import argparse
+import datetime
 import os
-import pandas as pd
+import time
 from indicators import MarketPhase, PhaseLength
 from indicators.k_means_range import KMeansRange
 from indicators.market_phase import KlineMarketPhase, PivotMarketPhase
 from indicators.pivots import Pivots
 
-from bokeh.plotting import figure, show
-from bokeh.models import ColumnDataSource
-
 from indicators.range_zone import RangeZone, RangeZonePhaseIndicator
 from indicators import StdDevRange, ConsolidationIndicator
 from indicators.std_dev_histogram_range import StdDevHistogramRange
 from indicators.std_dev_range import BuySellSignal, ConsolidationDuration, LinearRegressionTrend
+from indicators import line_cache
 from strategies import ConfirmSignalStrategy
-
-class CSVData(bt.feeds.GenericCSVData):
-    params = (
-        ('dtformat', '%Y-%m-%d %H:%M:%S'),  # 解析标准时间格式
-        ('datetime', 0),
-        ('open', 1),
-        ('high', 2),
-        ('low', 3),
-        ('close', 4),
-        ('volume', 5),
-        ('openinterest', -1),
-    )
+from feeds import ColumnarData, ensure_columnar, ensure_resampled, load_columns, select_range
+from fetcher import BAR_MS
+from backtest import add_analyzers, summarize
+from brokers import BracketBroker
+from profiling import Profiler
 
 class MyStrategy(bt.Strategy):
     params = (
@@ -55,44 +47,91 @@ class MyStrategy(bt.Strategy):
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Backtrader回测程序')
     parser.add_argument('symbol', type=str, help='分析的交易对，例如 SOL-USDT')
+    parser.add_argument('--start', type=str, default='2024-06-26', help='开始日期')
+    parser.add_argument('--end', type=str, default='2024-07-28', help='结束日期')
+    parser.add_argument('--plot', action='store_true', help='回测结束后用 matplotlib 绘图（默认不绘图）')
+    parser.add_argument('--trades', action='store_true', help='输出逐笔交易列表')
+    parser.add_argument('--profile', action='store_true', help='统计各指标 / 策略的调用次数和耗时')
+    parser.add_argument('--profile-json', type=str, default=None, help='把耗时统计写入 JSON 文件（隐含 --profile）')
+    parser.add_argument('--timeframes', type=str, nargs='+', default=[],
+                        help='由 5m 数据合成的高周期（例如 15m 1H 4H），作为额外数据源计算多周期市场阶段；'
+                             '策略要等最长周期的指标预热完才开始')
+    parser.add_argument('--exactbars', type=int, default=0,
+                        help='省内存模式：1 时所有 line 只保留指标声明的回看长度（不能与 --plot 同用）')
+    parser.add_argument('--fast-broker', action='store_true',
+                        help='使用精简的括号单撮合（brokers.BracketBroker），成交与默认 broker 逐笔相同')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不使用指标缓存（data/indicator_cache），每次重新计算全部指标')
     args = parser.parse_args()
+    if args.plot and args.exactbars:
+        print('错误: --plot 需要完整的 line 数据，不能与 --exactbars 同用')
+        exit(1)
     
     data_path = os.path.join('data', f'{args.symbol}_candlesticks.csv')
     if not os.path.exists(data_path):
         print(f'错误: {data_path} 文件不存在')
         exit(1)
     
-    df = pd.read_csv(data_path)
-    # df.iloc[:, 0] = pd.to_datetime(df.iloc[:, 0], unit='ms')  # 仅转换为 datetime，不格式化
-    df.iloc[:, 0] = pd.to_datetime(df.iloc[:, 0], unit='ms')
+    # CSV 首次使用（或更新后）转换为列存储，之后内存映射加载，按时间二分查找区间，不再写临时文件
+    store = ensure_columnar(data_path)
 
-    start_date = '2024-06-26'
-    end_date = '2024-07-28'
-    df = df[(df.iloc[:, 0] >= start_date) & (df.iloc[:, 0] <= end_date)]
+    start_date = datetime.datetime.fromisoformat(args.start)
+    end_date = datetime.datetime.fromisoformat(args.end)
 
-    temp_path = os.path.join('data', f'temp_{args.symbol}_candlesticks.csv')
-    df.to_csv(temp_path, index=False, date_format='%Y-%m-%d %H:%M:%S')  # 确保 CSV 保存时格式正确
-    
-    data_length = len(df)
+    data_length = len(select_range(load_columns(store), start_date, end_date)['timestamp'])
     print(f'成功加载数据文件: {data_path}, 数据长度: {data_length}')
     
-    cerebro = bt.Cerebro()
+    profiling = args.profile or args.profile_json
+    # 数据和参数没变的指标直接读磁盘缓存；绘图要用到全部子指标的 line，
+    # 统计耗时要真的计算一遍指标，这两种情况都不走缓存
+    if not args.no_cache and not args.plot and not profiling:
+        line_cache.configure(os.path.join('data', 'indicator_cache'))
+
+    # 观察器只在绘图时需要
+    cerebro = bt.Cerebro(stdstats=args.plot, exactbars=args.exactbars)
+    if args.fast_broker:
+        cerebro.broker = BracketBroker()
     cerebro.broker.setcommission(commission=0.0008,  # 例如 0.1% 佣金
                              commtype=bt.CommInfoBase.COMM_PERC)  # 按百分比计算
 
     cerebro.addstrategy(ConfirmSignalStrategy)
     # cerebro.addstrategy(MyStrategy)
 
-    data = CSVData(dataname=temp_path)
-    cerebro.adddata(data)
-    cerebro.run()
-    
+    data = ColumnarData(dataname=store, fromdate=start_date, todate=end_date,
+                        timeframe=bt.TimeFrame.Minutes, compression=5)
+    cerebro.adddata(data, name='5m')
+    for bar in args.timeframes:
+        cerebro.adddata(ColumnarData(dataname=ensure_resampled(data_path, bar), fromdate=start_date, todate=end_date,
+                                     timeframe=bt.TimeFrame.Minutes, compression=BAR_MS[bar] // 60000), name=bar)
+    add_analyzers(cerebro)
+
     print('Starting Portfolio Value: %.2f' % cerebro.broker.getvalue())
+
+    profiler = Profiler() if profiling else None
+    run_start = time.perf_counter()
+    if profiler:
+        with profiler:
+            result = cerebro.run()[0]
+    else:
+        result = cerebro.run()[0]
+    report = summarize(cerebro, result, time.perf_counter() - run_start)
     
-    cerebro.run()
-    
-    print('Final Portfolio Value: %.2f' % cerebro.broker.getvalue())
+    print('Final Portfolio Value: %.2f' % report['final_value'])
+    print(f'收益率: {report["return_pct"]:.2f}%, 年化: {report["annual_return_pct"]:.2f}%, '
+          f'最大回撤: {report["max_drawdown_pct"]:.2f}%')
+    print(f'交易: {report["trades"]} 笔（盈 {report["won"]} / 亏 {report["lost"]}）')
+    print(f'耗时: {report["seconds"]:.2f}s, {report["bars"]} 根 K 线, {report["bars_per_sec"]:.0f} 根/秒')
+
+    if args.trades:
+        for trade in result.analyzers.trade_list.get_analysis():
+            print(f'{trade["open_datetime"]} -> {trade["close_datetime"]} {trade["direction"]}, '
+                  f'数量={trade["size"]:.4f}, 开仓价={trade["price"]:.2f}, '
+                  f'盈亏={trade["pnlcomm"]:.2f}（手续费 {trade["commission"]:.2f}）, K线={trade["bars"]}')
 
-    cerebro.plot(style='candle', barup='green', bardown='red')
+    if profiler:
+        profiler.print_table()
+        if args.profile_json:
+            profiler.to_json(args.profile_json)
 
-    #os.remove(temp_path)  # 运行结束后删除临时文件
+    if args.plot:
+        cerebro.plot(style='candle', barup='green', bardown='red')
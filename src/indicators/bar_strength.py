@@ -1,4 +1,23 @@
 import backtrader as bt
+import numpy as np
+
+from indicators.line_arrays import line_values, set_line_values
+from indicators.registry import shared_indicator
+
+def bar_strength_values(open, high, low, close, atr, close_percent):
+    """与 BarStrength.next 相同的打分规则，整段数组一次算完（once 和 signals 引擎共用）"""
+    bar_range = high - low
+    strength_score = (bar_range > atr).astype(np.float64)  # 振幅大于 ATR
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        body_ratio = np.where(bar_range > 0, np.abs(close - open) / bar_range, 0.0)
+    strength_score += body_ratio > 0.5  # body_ratio 大于 0.5
+
+    near_high = close >= (high - bar_range * (1 - close_percent))  # 阳线收盘接近最高价
+    near_low = close <= (low + bar_range * (1 - close_percent))  # 阴线收盘接近最低价
+    strength_score += np.where(close > open, near_high, near_low)
+    return strength_score
+
 
 class BarStrength(bt.Indicator):
     lines = ('strength',)  # 只输出一个强度分数
@@ -10,7 +29,7 @@ class BarStrength(bt.Indicator):
 
     def __init__(self):
         # 使用 ATR 指标计算振幅
-        self.atr = bt.indicators.AverageTrueRange(self.data, period=self.p.period)
+        self.atr = shared_indicator(self, bt.indicators.AverageTrueRange, self.data, period=self.p.period)
 
     def next(self):
         # 获取当前K线的价格
@@ -35,4 +54,15 @@ class BarStrength(bt.Indicator):
             if close <= (low + (high - low) * (1 - self.p.close_percent)):  # 收盘接近最低价
                 strength_score += 1
 
-        self.lines.strength[0] = strength_score  # 设置最终的强度值
\ No newline at end of file
+        self.lines.strength[0] = strength_score  # 设置最终的强度值
+
+    def once(self, start, end):
+        strength_score = bar_strength_values(
+            line_values(self.data.open, start, end),
+            line_values(self.data.high, start, end),
+            line_values(self.data.low, start, end),
+            line_values(self.data.close, start, end),
+            line_values(self.atr, start, end),
+            self.p.close_percent,
+        )
+        set_line_values(self.lines.strength, start, end, strength_score)
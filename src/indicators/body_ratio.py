@@ -1,4 +1,7 @@
 import backtrader as bt
+import numpy as np
+
+from indicators.line_arrays import line_values, set_line_values
 
 class BodyRatio(bt.Indicator):
     lines = ('body_ratio',)  # 现在有两个输出变量：当前的 body_ratio 和 最近 K 根K线的平均 body_ratio
@@ -15,3 +18,17 @@ class BodyRatio(bt.Indicator):
         total = abs(high - low)
 
         self.lines.body_ratio[0] = body / total if total > 0 else 0  # 计算当前K线的 body_ratio
+
+    def once(self, start, end):
+        # 每根 K 线只依赖自身 OHLC，整段用数组一次算完
+        high = line_values(self.data.high, start, end)
+        low = line_values(self.data.low, start, end)
+        open = line_values(self.data.open, start, end)
+        close = line_values(self.data.close, start, end)
+
+        body = np.abs(close - open)
+        total = np.abs(high - low)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            body_ratio = np.where(total > 0, body / total, 0.0)
+
+        set_line_values(self.lines.body_ratio, start, end, body_ratio)
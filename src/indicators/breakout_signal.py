@@ -1,6 +1,7 @@
 import backtrader as bt
 from indicators.range_zone import RangeZone
 from indicators.bar_strength import BarStrength
+from indicators.registry import shared_indicator
 
 class BreakoutSignal(bt.Indicator):
     lines = ('buy_signal',)
@@ -8,10 +9,11 @@ class BreakoutSignal(bt.Indicator):
     plotlines = dict(
         buy_signal=dict(marker='^', markersize=8.0, color='green', fillstyle='full'),
     )
+    lookback = 1  # 最多往回读几根（exactbars 模式下保留的历史长度，见 indicators.lookback）
 
     def __init__(self):
-        self.range_zone = RangeZone(self.data)
-        self.bar_strength = BarStrength(self.data)
+        self.range_zone = shared_indicator(self, RangeZone, self.data)
+        self.bar_strength = shared_indicator(self, BarStrength, self.data)
 
     def next(self):
         high, low, close = self.data.high[0], self.data.low[0], self.data.close[0]
@@ -1,14 +1,16 @@
 import backtrader as bt
 from indicators.bar_strength import BarStrength
+from indicators.registry import shared_indicator
 
 
 class KlineMarketPhase(bt.Indicator):
     lines = ('phase',)
     plotinfo = dict(subplot=True)
     plotlines = dict(phase=dict(color='green'))
+    lookback = 4  # 最多往回读几根（exactbars 模式下保留的历史长度，见 indicators.lookback）
 
     def __init__(self):
-        self.bar_strength = BarStrength(self.data)
+        self.bar_strength = shared_indicator(self, BarStrength, self.data)
         self.current_phase = 0
 
     def next(self):
@@ -1,18 +1,86 @@
 import backtrader as bt
 import numpy as np
-from sklearn.cluster import KMeans
 
+from indicators.line_cache import line_cache
+
+try:
+    from sklearn.cluster import KMeans
+except ImportError:  # fast 模式不依赖 sklearn
+    KMeans = None
+
+
+def _initial_centers(points, k):
+    """按收盘价排序后均分成 k 组，取各组均值作为初始中心（确定性，不需要随机数）"""
+    order = np.argsort(points[:, 2], kind='stable')
+    return np.array([points[idx].mean(axis=0) for idx in np.array_split(order, k)])
+
+
+def lloyd_kmeans(points, centers, max_iter=100):
+    """
+    从给定中心出发的 Lloyd 迭代，返回 (中心, SSE)。
+    窗口每次只滑动一根 K 线，用上一根的中心热启动通常 1~3 次迭代就收敛。
+    """
+    k = len(centers)
+    centers = centers.copy()
+    labels = None
+    for _ in range(max_iter):
+        dist = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = dist.argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+        counts = np.bincount(labels, minlength=k)
+        sums = np.column_stack([np.bincount(labels, weights=points[:, d], minlength=k)
+                                for d in range(points.shape[1])])
+        empty = counts == 0
+        centers[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            # 空簇：移到离自己中心最远的点上
+            farthest = np.argsort(dist[np.arange(len(points)), labels])[::-1]
+            centers[empty] = points[farthest[:empty.sum()]]
+    else:
+        # 达到 max_iter 仍未收敛：最后一次分配之后中心又更新过，按最终的中心重新计算距离
+        dist = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = dist.argmin(axis=1)
+
+    sse = dist[np.arange(len(points)), new_labels].sum()
+    return centers, sse
+
+
+@line_cache
 class KMeansRange(bt.Indicator):
     lines = ('is_range', 'range_count')
     # plotlines = {
     #     'is_range': {'_plot': True, 'color': 'black', 'ls': '-', 'subplot': True},
     #     'range_count': {'_plot': True, 'color': 'blue', 'ls': '-', 'subplot': True}
     # }
-    params = (('period', 50), ('k_max', 5), ('threshold', 0.03))  # 50根K线, 最大5个聚类, 震荡阈值 3%
+    params = (
+        ('period', 50),  # 50根K线
+        ('k_max', 5),  # 最大5个聚类
+        ('threshold', 0.03),  # 震荡阈值 3%
+        ('fast', False),  # True: 使用 NumPy 热启动 Lloyd 迭代代替每根 K 线多次 sklearn 拟合
+    )
+    cache_state = ('range_counter', 'fast_centers')  # 缓存续算时需要恢复的状态（见 indicators.line_cache）
+
+    @property
+    def lookback(self):
+        return self.p.period - 1  # 取最近 period 根 K 线聚类
 
     def __init__(self):
         self.addminperiod(self.p.period)
         self.range_counter = 0  # 震荡区间计数器
+        self.fast_centers = {}  # fast 模式下每个 k 上一根 K 线的聚类中心
+        if not self.p.fast and KMeans is None:
+            raise ImportError('KMeansRange 需要 scikit-learn，或使用 fast=True')
+
+    def elbow_k(self, sse, k_range):
+        """肘部法则：计算SSE的变化率，找到下降变缓的位置"""
+        sse_diff = np.diff(sse)
+        sse_diff2 = np.diff(sse_diff)
+        optimal_k = k_range[np.argmin(sse_diff2) + 1]  # 选择拐点处的 K 值
+        
+        return max(2, optimal_k)  # K 至少为 2
 
     def optimal_k(self, data_points):
         """使用肘部法则动态选择最佳 K 值"""
@@ -24,12 +92,26 @@ class KMeansRange(bt.Indicator):
             kmeans.fit(data_points)
             sse.append(kmeans.inertia_)  # SSE: 簇内平方误差
         
-        # 计算SSE的变化率，找到下降变缓的位置
-        sse_diff = np.diff(sse)
-        sse_diff2 = np.diff(sse_diff)
-        optimal_k = k_range[np.argmin(sse_diff2) + 1]  # 选择拐点处的 K 值
-        
-        return max(2, optimal_k)  # K 至少为 2
+        return self.elbow_k(sse, k_range)
+
+    def fast_cluster_centers(self, data_points):
+        """
+        每个 k 分别从确定性初始中心和上一根 K 线的中心（热启动）迭代，取 SSE 较小的结果。
+        肘部法则直接复用这些 SSE，选中的 k 不再重新拟合。
+        """
+        sse = []
+        k_range = range(2, self.p.k_max + 1)
+
+        for k in k_range:
+            centers, k_sse = lloyd_kmeans(data_points, _initial_centers(data_points, k))
+            if k in self.fast_centers:
+                warm_centers, warm_sse = lloyd_kmeans(data_points, self.fast_centers[k])
+                if warm_sse < k_sse:
+                    centers, k_sse = warm_centers, warm_sse
+            self.fast_centers[k] = centers
+            sse.append(k_sse)
+
+        return self.fast_centers[self.elbow_k(sse, k_range)]
 
     def next(self):
         highs = np.array(self.data.high.get(size=self.p.period))
@@ -38,13 +120,18 @@ class KMeansRange(bt.Indicator):
         
         data_points = np.column_stack((highs, lows, closes))
         
-        # 计算最优 K 值
-        best_k = self.optimal_k(data_points)
-        
-        # 运行 K-Means
-        kmeans = KMeans(n_clusters=best_k, n_init=10, random_state=42)
-        kmeans.fit(data_points)
-        centers = np.sort(kmeans.cluster_centers_[:, 2])  # 按收盘价排序
+        if self.p.fast:
+            cluster_centers = self.fast_cluster_centers(data_points)
+        else:
+            # 计算最优 K 值
+            best_k = self.optimal_k(data_points)
+
+            # 运行 K-Means
+            kmeans = KMeans(n_clusters=best_k, n_init=10, random_state=42)
+            kmeans.fit(data_points)
+            cluster_centers = kmeans.cluster_centers_
+
+        centers = np.sort(cluster_centers[:, 2])  # 按收盘价排序
         
         # 计算聚类中心的范围
         range_width = abs(centers[-1] - centers[0]) / centers[0]  # 归一化震荡幅度
@@ -0,0 +1,14 @@
+import array
+
+import numpy as np
+
+
+def line_values(line, start, end):
+    """以 NumPy 数组形式取出 line 在 [start, end) 区间的值（runonce 模式下 line.array 已完整填充）"""
+    return np.frombuffer(line.array[start:end], dtype=np.float64)
+
+
+def set_line_values(line, start, end, values):
+    """把 NumPy 计算结果写回 line 的 [start, end) 区间"""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    line.array[start:end] = array.array('d', values.tobytes())
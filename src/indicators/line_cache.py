@@ -0,0 +1,209 @@
+"""
+计算结果的磁盘缓存：runonce 模式下把耗时指标算好的 line 存成 .npz，下次输入数据和参数都没变时直接读取。
+
+- key：指标类 + 参数 + 所在模块的代码（整棵子指标树，包括 indicator_params 覆盖后的参数），
+  再加上输入数据（OHLCV、datetime）前 n 根的内容哈希
+- 完全命中：直接填入 line，只计算还被树外其它指标读取的子指标
+- 输入数据是缓存的延长（前 n 根相同，后面追加了新 K 线）：读入前 n 根的 line 和第 n 根时的状态
+  （cache_state 列出的属性），只计算新增的 K 线，然后用更长的结果替换旧缓存
+- 缓存目录总大小超过上限时按最近使用时间（文件 mtime）淘汰
+
+默认关闭，configure(cache_dir) 后生效（index.py 默认开启）。next 模式（实时数据、exactbars）不缓存。
+"""
+import hashlib
+import inspect
+import os
+import pickle
+
+import backtrader as bt
+import numpy as np
+from backtrader.lineiterator import LineIterator
+
+from indicators.line_arrays import line_values, set_line_values
+from indicators.registry import SharedIndicatorLink
+
+# 缓存目录，None 时不缓存
+CACHE_DIR = None
+# 缓存目录总大小上限（字节）
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def configure(cache_dir, max_bytes=MAX_BYTES):
+    global CACHE_DIR, MAX_BYTES
+    CACHE_DIR = cache_dir
+    MAX_BYTES = max_bytes
+
+
+def _children(indicator):
+    return indicator._lineiterators[bt.LineIterator.IndType] if hasattr(indicator, '_lineiterators') else []
+
+
+def _tree_key(indicator, digest):
+    """整棵子指标树的类、模块代码和参数写入 digest（模块内的辅助函数改动也会让缓存失效）"""
+    if isinstance(indicator, SharedIndicatorLink):
+        indicator = indicator.target
+    cls = type(indicator)
+    digest.update(f'{cls.__module__}.{cls.__qualname__}'.encode())
+    try:
+        digest.update(inspect.getsource(inspect.getmodule(cls)).encode())
+    except (OSError, TypeError):  # backtrader 动态生成的类没有源码，类名足够区分
+        pass
+    if hasattr(indicator, 'params'):
+        # 实例的参数值（p._getitems 是类方法，只有默认值）
+        digest.update(repr(list(indicator.p._getkwargs().items())).encode())
+    for child in _children(indicator):
+        _tree_key(child, digest)
+
+
+def _input_lines(indicator):
+    lines = []
+    for data in indicator.datas:
+        lines.extend(data.lines if isinstance(data, bt.LineSeries) else [data])
+    return lines
+
+
+def _data_hash(lines, n):
+    digest = hashlib.blake2b(digest_size=16)
+    for line in lines:
+        digest.update(line_values(line, 0, n).tobytes())
+    return digest.hexdigest()
+
+
+def _needed(indicator):
+    """树外还有其它指标（通过 SharedIndicatorLink）读取它或它的子指标时，命中缓存也要计算"""
+    if isinstance(indicator, SharedIndicatorLink) or getattr(indicator, '_shared_links', 0):
+        return True
+    return any(_needed(child) for child in _children(indicator))
+
+
+def _entries(prefix):
+    """同一 key 的缓存文件：[(K 线数, 数据哈希, 路径)]"""
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix) and name.endswith('.npz'):
+            _, n, data_hash = name[:-4].split('-')
+            entries.append((int(n), data_hash, os.path.join(CACHE_DIR, name)))
+    return entries
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:  # 并行回测的其它进程已经删除
+        pass
+
+
+def _evict():
+    stats = []
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith('.npz'):
+            try:
+                stat = os.stat(os.path.join(CACHE_DIR, name))
+            except FileNotFoundError:
+                continue
+            stats.append((stat.st_mtime, stat.st_size, os.path.join(CACHE_DIR, name)))
+    total = sum(size for _, size, _ in stats)
+    for _, size, path in sorted(stats):
+        if total <= MAX_BYTES:
+            break
+        _remove(path)
+        total -= size
+
+
+def _load(path):
+    with np.load(path) as stored:
+        lines = [stored[f'line{i}'] for i in range(len(stored.files) - 1)]
+        state = pickle.loads(stored['state'].tobytes())
+    os.utime(path)  # 记录最近使用
+    return lines, state
+
+
+def _store(indicator, prefix, n, lines_input):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    arrays = {f'line{i}': line_values(line, 0, n).copy() for i, line in enumerate(indicator.lines)}
+    state = {name: getattr(indicator, name) for name in indicator.cache_state}
+    arrays['state'] = np.frombuffer(pickle.dumps(state), dtype=np.uint8)
+    path = os.path.join(CACHE_DIR, f'{prefix}-{n}-{_data_hash(lines_input, n)}.npz')
+    # 先写临时文件再替换，其它进程不会读到写了一半的缓存
+    tmp = f'{path}.tmp{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+    _evict()
+
+
+def _cached_once(self):
+    if CACHE_DIR is None or not getattr(self, '_line_cache', False):
+        return _uncached_once(self)
+
+    size = self._clock.buflen()
+    inputs = _input_lines(self)
+    if any(len(line.array) < size for line in inputs):  # 输入不是完整预加载的数组
+        return _uncached_once(self)
+
+    digest = hashlib.blake2b(digest_size=16)
+    _tree_key(self, digest)
+    prefix = digest.hexdigest()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    hit = None
+    for n, data_hash, path in sorted(_entries(prefix), reverse=True):
+        if self._minperiod <= n <= size and _data_hash(inputs, n) == data_hash:
+            try:
+                hit = (n, path, *_load(path))
+            except FileNotFoundError:  # 刚被其它进程淘汰
+                continue
+            break
+
+    if hit is None:
+        _uncached_once(self)
+        _store(self, prefix, size, inputs)
+        return
+
+    n, path, lines, state = hit
+    children = _children(self)
+
+    # 与 LineIterator._once 相同的流程，只是跳过已缓存的部分
+    self.forward(size=size)
+    for child in children:
+        if n < size or _needed(child):
+            child._once()
+    for data in self.datas:
+        data.home()
+    for child in children:
+        child.home()
+    self.home()
+
+    for line, values in zip(self.lines, lines):
+        set_line_values(line, 0, n, values)
+    for name, value in state.items():
+        setattr(self, name, value)
+
+    if n < size:
+        # 各指针移到第 n - 1 根，从第 n 根继续计算新增的 K 线
+        for data in self.datas:
+            data.advance(size=n)
+        for child in children:
+            child.advance(size=n)
+        self.advance(size=n)
+        self.once(n, size)
+        _remove(path)
+        _store(self, prefix, size, inputs)
+
+    for line in self.lines:
+        line.oncebinding()
+
+
+# 缓存的分发放在唯一的 LineIterator._once 里，而不是替换各个类的 _once：
+# profiling.Profiler 只包 LineIterator._once，这样带缓存的指标在 runonce 模式下同样被计时
+_uncached_once = LineIterator._once
+LineIterator._once = _cached_once
+
+
+def line_cache(cls):
+    """
+    类装饰器：runonce 模式下为指标启用磁盘缓存。
+    指标需要用 cache_state 列出从第 n 根继续计算所需的属性（next / once 之间保存的状态）。
+    """
+    cls._line_cache = True
+    return cls
@@ -1,31 +1,87 @@
 import backtrader as bt
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators.line_arrays import line_values, set_line_values
+
+# 增量累加和每隔多少根 K 线按窗口重新求和一次，避免长时间运行的浮点误差累积
+RESYNC_BARS = 1000
+
+
+def rolling_slope_pct(values, period):
+    """
+    values 上每个长度 period 的滑动窗口的回归斜率百分比，返回长度 len(values) - period + 1。
+    runonce 模式的 once 和 signals 引擎共用，保证两边结果逐位相同。
+    """
+    x_mean = (period - 1) / 2.0
+    sxx = period * (period * period - 1) / 12.0
+    windows = sliding_window_view(values, period)
+
+    sum_y = windows.sum(axis=1)
+    x_centered = np.arange(period) - x_mean
+    m = windows @ x_centered / sxx if sxx else np.zeros(len(windows))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(sum_y != 0, m / (sum_y / period) * 100, 0.0)
+
 
 class LinearRegressionSlopePct(bt.Indicator):
     """
     计算最近 `period` 根 K 线的线性回归斜率，并转换为百分比变化
+
+    x 取 0..period-1，斜率用闭式解 m = (Σxy - x̄Σy) / Σ(x - x̄)²：
+    - next 模式下滚动维护 Σy、Σxy，每根 K 线 O(1)
+    - runonce 模式下 once 用 NumPy 一次算出整段
     """
     lines = ('slope_pct',)
     params = (('period', 20),)
 
+    @property
+    def lookback(self):
+        return self.p.period  # next 里读 data[-period]
+
     def __init__(self):
         self.addminperiod(self.p.period)
+        n = self.p.period
+        self.x_mean = (n - 1) / 2.0
+        self.sxx = n * (n * n - 1) / 12.0  # Σ(x - x̄)²
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self.bars_since_resync = 0
 
-    def next(self):
-        if len(self.data) < self.p.period:
-            self.lines.slope_pct[0] = 0
-            return
+    def _slope_pct(self, sum_y, sum_xy):
+        if self.sxx == 0 or sum_y == 0:
+            return 0
+        m = (sum_xy - self.x_mean * sum_y) / self.sxx
+        avg_price = sum_y / self.p.period
+        return (m / avg_price) * 100
 
-        # 取最近 period 根 K 线的索引（X）和收盘价（Y）
-        x = np.arange(self.p.period)
-        y = np.array(self.data.get(size=self.p.period))
+    def _resync(self):
+        y = self.data.get(size=self.p.period)
+        self.sum_y = sum(y)
+        self.sum_xy = sum(i * v for i, v in enumerate(y))
+        self.bars_since_resync = 0
 
-        # 计算线性回归斜率
-        A = np.vstack([x, np.ones(len(x))]).T
-        m, _ = np.linalg.lstsq(A, y, rcond=None)[0]  # 线性回归求解斜率
+    def nextstart(self):
+        self._resync()
+        self.lines.slope_pct[0] = self._slope_pct(self.sum_y, self.sum_xy)
 
-        # 计算平均价格
-        avg_price = np.mean(y)
+    def next(self):
+        self.bars_since_resync += 1
+        if self.bars_since_resync >= RESYNC_BARS:
+            self._resync()
+        else:
+            # 窗口右移一根：所有 x 减 1，移出最旧的 y，加入最新的 y（x = period - 1）
+            y_old = self.data[-self.p.period]
+            y_new = self.data[0]
+            self.sum_xy += (self.p.period - 1) * y_new - (self.sum_y - y_old)
+            self.sum_y += y_new - y_old
+
+        self.lines.slope_pct[0] = self._slope_pct(self.sum_y, self.sum_xy)
+
+    def once(self, start, end):
+        if end <= start:
+            return
 
-        # 计算斜率的百分比变化
-        self.lines.slope_pct[0] = (m / avg_price) * 100 if avg_price != 0 else 0
+        values = line_values(self.data, start - self.p.period + 1, end)
+        set_line_values(self.lines.slope_pct, start, end, rolling_slope_pct(values, self.p.period))
@@ -0,0 +1,43 @@
+"""
+exactbars（省内存）模式下 line 缓冲区的长度。
+
+backtrader 的 exactbars=1 把每条 line 换成长度为自身 minperiod 的环形缓冲区（collections.deque），
+但自定义指标输出 line 的 minperiod 是 1，读 [-1]、[-2] 就会越界。
+每个指标 / 策略用 lookback 属性声明自己最多往回读几根（[-n] 的 n，包括输入数据、子指标和自己的 line），
+策略 qbuffer 之后调用 reserve_lookback，把这些 line 的环形缓冲区扩到 lookback + 1。
+"""
+import backtrader as bt
+
+from indicators.registry import SharedIndicatorLink
+
+
+def _children(owner):
+    """owner 直接读取的子指标（复用的指标通过 SharedIndicatorLink 找到真正的实例）"""
+    for child in getattr(owner, '_lineiterators', {}).get(bt.LineIterator.IndType, ()):
+        yield child.target if isinstance(child, SharedIndicatorLink) else child
+
+
+def _reserve(obj, size):
+    if isinstance(obj, bt.LineSeries):
+        for line in obj.lines:
+            line.minbuffer(size)
+    else:
+        obj.minbuffer(size)
+
+
+def reserve_lookback(owner, seen=None):
+    """按 owner 及其下全部指标声明的 lookback，扩大它们读取的 line 的环形缓冲区"""
+    if seen is None:
+        seen = set()
+    if id(owner) in seen:
+        return
+    seen.add(id(owner))
+
+    children = list(_children(owner))
+    lookback = getattr(owner, 'lookback', 0)
+    if lookback:
+        for obj in [owner] + list(owner.datas) + children:
+            _reserve(obj, lookback + 1)
+
+    for child in children:
+        reserve_lookback(child, seen)
@@ -5,6 +5,7 @@ from indicators.bar_strength import BarStrength
 from indicators.k_line_market_phase import KlineMarketPhase
 from indicators.pivot_market_phase import PivotMarketPhase
 from indicators.pivots import Pivots
+from indicators.registry import shared_indicator
 
 class MarketPhase(bt.Indicator):
     lines = ('phase',)
@@ -12,8 +13,8 @@ class MarketPhase(bt.Indicator):
     plotlines = dict(phase=dict(color='purple'))
 
     def __init__(self):
-        self.kline_phase = KlineMarketPhase(self.data)
-        self.pivot_phase = PivotMarketPhase(self.data)
+        self.kline_phase = shared_indicator(self, KlineMarketPhase, self.data)
+        self.pivot_phase = shared_indicator(self, PivotMarketPhase, self.data)
 
     # def next(self):
     #     if self.kline_phase.lines.phase[0] != 0:
@@ -25,10 +26,11 @@ class PhaseLength(bt.Indicator):
     lines = ('phase_length',)
     plotinfo = dict(subplot=True)
     plotlines = dict(phase_length=dict(color='red'))
+    lookback = 1  # 最多往回读几根（exactbars 模式下保留的历史长度，见 indicators.lookback）
 
     def __init__(self):
         self.phase_length = 0
-        self.market_phase = MarketPhase(self.data)
+        self.market_phase = shared_indicator(self, MarketPhase, self.data)
 
     def next(self):
         if self.market_phase.lines.phase[0] == self.market_phase.lines.phase[-1]:
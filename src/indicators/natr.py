@@ -1,11 +1,19 @@
 import backtrader as bt
 
+from indicators.line_arrays import line_values, set_line_values
+from indicators.registry import shared_indicator
+
 class NormalizedATR(bt.Indicator):
     lines = ('natr',)
     params = (('period', 14),)
 
     def __init__(self):
-        self.atr = bt.indicators.ATR(self.data, period=self.p.period)
+        self.atr = shared_indicator(self, bt.indicators.ATR, self.data, period=self.p.period)
 
     def next(self):
         self.lines.natr[0] = (self.atr[0] / self.data.close[0]) * 100
+
+    def once(self, start, end):
+        atr = line_values(self.atr, start, end)
+        close = line_values(self.data.close, start, end)
+        set_line_values(self.lines.natr, start, end, (atr / close) * 100)
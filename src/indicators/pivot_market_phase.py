@@ -1,6 +1,6 @@
-import math
 import backtrader as bt
 from indicators.pivots import Pivots
+from indicators.registry import shared_indicator
 
 
 class PivotMarketPhase(bt.Indicator):
@@ -9,29 +9,23 @@ class PivotMarketPhase(bt.Indicator):
     plotlines = dict(phase=dict(color='blue'))
 
     def __init__(self):
-        self.pivots = Pivots(self.data)
+        self.pivots = shared_indicator(self, Pivots, self.data)
         self.current_phase = 0
 
     def next(self):
         idx = len(self.data) - 1
-        highs, lows = [], []
-        lookback_idx = 1
-
-        while len(highs) < 3 or len(lows) < 3:
-            if idx - lookback_idx < 0:
-                break
-            high_val = self.pivots.pivothigh[-lookback_idx]
-            low_val = self.pivots.pivotlow[-lookback_idx]
-            if not math.isnan(high_val):
-                highs.append(high_val)
-            if not math.isnan(low_val):
-                lows.append(low_val)
-            lookback_idx += 1
-
-        if len(highs) < 3 or len(lows) < 3:
+        # 往回找到同时凑够 3 个高点和 3 个低点为止，期间遇到的关键点全部参与判断
+        last_highs = self.pivots.high_index.last(3, idx)
+        last_lows = self.pivots.low_index.last(3, idx)
+
+        if len(last_highs) < 3 or len(last_lows) < 3:
             self.lines.phase[0] = 0
             return
 
+        first = min(last_highs[-1][0], last_lows[-1][0])
+        highs = self.pivots.high_index.since(first, idx)
+        lows = self.pivots.low_index.since(first, idx)
+
         new_phase = 0
         if all(x > y for x, y in zip(highs, highs[1:])) and all(x > y for x, y in zip(lows, lows[1:])):
             new_phase = 3
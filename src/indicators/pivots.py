@@ -1,8 +1,108 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+
 import backtrader as bt
 
+from indicators.line_cache import line_cache
+
+
+class PivotHistory:
+    """
+    定长环形缓冲区，保存最近 size 个关键点（关键点所在 K 线索引 + 价格），
+    供其它指标 / 策略直接读取，不必在 pivothigh / pivotlow 线上逐根往回找。
+    下标 0 为最新的关键点。
+    """
+    __slots__ = ('size', 'count', 'bars', 'values')
+
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self.bars = array('q', [0]) * size
+        self.values = array('d', [0.0]) * size
+
+    def append(self, bar, value):
+        i = self.count % self.size
+        self.bars[i] = bar
+        self.values[i] = value
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        j = (self.count - 1 - i) % self.size
+        return self.bars[j], self.values[j]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class PivotIndex:
+    """
+    全部关键点的按 K 线索引有序的列表（确认所在 K 线索引 + 价格），只追加。
+    查询“某根 K 线之前的最近 k 个关键点”用二分定位，O(log n + k)，
+    取代在 pivothigh / pivotlow 线上逐根往回找非 NaN 的扫描。
+    runonce 模式下 Pivots 先算完全部 K 线，所以查询总是带上 before（当前 K 线索引）。
+    maxlen 不为 None 时只保留最近 maxlen 个（攒到两倍时一次性删掉旧的，均摊 O(1)）。
+    """
+    __slots__ = ('bars', 'values', 'maxlen')
+
+    def __init__(self, maxlen=None):
+        self.bars = array('q')
+        self.values = array('d')
+        self.maxlen = maxlen
+
+    def append(self, bar, value):
+        self.bars.append(bar)
+        self.values.append(value)
+        if self.maxlen and len(self.bars) >= 2 * self.maxlen:
+            del self.bars[:-self.maxlen]
+            del self.values[:-self.maxlen]
+
+    def __len__(self):
+        return len(self.bars)
+
+    def last(self, k, before):
+        """索引小于 before 的最近 k 个关键点，最新的在前：[(索引, 价格), ...]"""
+        end = bisect_left(self.bars, before)
+        start = max(0, end - k)
+        return [(self.bars[i], self.values[i]) for i in range(end - 1, start - 1, -1)]
+
+    def since(self, first, before):
+        """索引在 [first, before) 内的全部关键点价格，最新的在前"""
+        end = bisect_left(self.bars, before)
+        start = bisect_left(self.bars, first)
+        return [self.values[i] for i in range(end - 1, start - 1, -1)]
+
+
+@line_cache
 class Pivots(bt.Indicator):
+    """
+    局部高低点：中间 K 线的 high / low 是前后各 lookback 根里的最高 / 最低。
+
+    只用已经走完的 K 线判断，关键点要等右侧 lookback 根 K 线走完才能确认，
+    因此在确认的那根 K 线上输出（比关键点本身晚 lookback 根），回测与实盘结果一致。
+    窗口极值用单调队列维护，每根 K 线均摊 O(1)。
+    最近 history 个关键点另存于 high_history / low_history（PivotHistory，索引为关键点所在 K 线），
+    全部关键点按确认 K 线索引记录在 high_index / low_index（PivotIndex），与线上的位置一致；
+    exactbars 模式下 high_index / low_index 也只保留最近 history 个。
+    """
     lines = ('pivothigh', 'pivotlow')
-    params = (('lookback', 3),)  # 移除 threshold 参数
+    params = (
+        ('lookback', 3),
+        ('history', 64),  # 环形缓冲区保存的关键点个数
+    )
+    # 缓存续算时需要恢复的状态（见 indicators.line_cache）
+    cache_state = ('last_pivot_high_idx', 'last_pivot_low_idx', 'high_window', 'low_window',
+                   'high_history', 'low_history', 'high_index', 'low_index')
+
+    @property
+    def lookback(self):
+        return self.p.lookback  # 中间 K 线 data.high[-lookback]
 
     # plotinfo = dict(subplot=False)  # 让指标绘制在主图
     # plotlines = dict(
@@ -12,44 +112,74 @@ class Pivots(bt.Indicator):
 
     def __init__(self):
         self.addminperiod(self.p.lookback * 2 + 1)
-        self.last_pivot_high_idx = None  # 记录上一个高点的索引
+        self.last_pivot_high_idx = None  # 记录上一个高点的索引（关键点所在 K 线）
         self.last_pivot_low_idx = None   # 记录上一个低点的索引
+        self.high_window = deque()  # (索引, high)，high 单调递减，队首为窗口最高
+        self.low_window = deque()   # (索引, low)，low 单调递增，队首为窗口最低
+        self.high_history = PivotHistory(self.p.history)
+        self.low_history = PivotHistory(self.p.history)
+        self.high_index = PivotIndex()
+        self.low_index = PivotIndex()
 
         # 让关键点跟随 K 线主图绘制
         self.plotinfo.plotmaster = self.data
 
-    def next(self):
-        lookback = self.p.lookback
+    def qbuffer(self, savemem=0):
+        super(Pivots, self).qbuffer(savemem=savemem)
+        if savemem:  # exactbars 模式下关键点索引也只保留最近 history 个
+            self.high_index.maxlen = self.low_index.maxlen = self.p.history
+
+    def _push(self):
+        """当前 K 线进入窗口，移出超出 2 * lookback + 1 根的旧 K 线"""
         idx = len(self.data) - 1
+        oldest = idx - 2 * self.p.lookback
+        high, low = self.data.high[0], self.data.low[0]
+
+        while self.high_window and self.high_window[-1][1] <= high:
+            self.high_window.pop()
+        self.high_window.append((idx, high))
+        if self.high_window[0][0] < oldest:
+            self.high_window.popleft()
+
+        while self.low_window and self.low_window[-1][1] >= low:
+            self.low_window.pop()
+        self.low_window.append((idx, low))
+        if self.low_window[0][0] < oldest:
+            self.low_window.popleft()
 
-        if idx < lookback:
-            return
+        return idx
 
-        try:
-            high_vals = [self.data.high[-i] for i in range(lookback, -lookback - 1, -1)]
-            low_vals = [self.data.low[-i] for i in range(lookback, -lookback - 1, -1)]
-        except IndexError:
-            return
+    def prenext(self):
+        self._push()
+
+    def next(self):
+        lookback = self.p.lookback
+        idx = self._push()
+        center = idx - lookback  # 待确认的中间 K 线
 
-        mid_high = self.data.high[0]
-        mid_low = self.data.low[0]
+        mid_high = self.data.high[-lookback]
+        mid_low = self.data.low[-lookback]
 
         # **局部高点**
-        if mid_high == max(high_vals):  # 最高点判断
-            if self.last_pivot_high_idx is None or (idx - self.last_pivot_high_idx > lookback):
+        if mid_high == self.high_window[0][1]:  # 最高点判断
+            if self.last_pivot_high_idx is None or (center - self.last_pivot_high_idx > lookback):
                 self.lines.pivothigh[0] = mid_high
-                self.last_pivot_high_idx = idx  # 记录最新的高点索引
+                self.last_pivot_high_idx = center  # 记录最新的高点索引
+                self.high_history.append(center, mid_high)
+                self.high_index.append(idx, mid_high)
             else:
                 self.lines.pivothigh[0] = float('nan')
         else:
             self.lines.pivothigh[0] = float('nan')
 
         # **局部低点**
-        if mid_low == min(low_vals):  # 最低点判断
-            if self.last_pivot_low_idx is None or (idx - self.last_pivot_low_idx > lookback):
+        if mid_low == self.low_window[0][1]:  # 最低点判断
+            if self.last_pivot_low_idx is None or (center - self.last_pivot_low_idx > lookback):
                 self.lines.pivotlow[0] = mid_low
-                self.last_pivot_low_idx = idx  # 记录最新的低点索引
+                self.last_pivot_low_idx = center  # 记录最新的低点索引
+                self.low_history.append(center, mid_low)
+                self.low_index.append(idx, mid_low)
             else:
                 self.lines.pivotlow[0] = float('nan')
         else:
-            self.lines.pivotlow[0] = float('nan')
\ No newline at end of file
+            self.lines.pivotlow[0] = float('nan')
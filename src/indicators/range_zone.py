@@ -2,6 +2,7 @@ import backtrader as bt
 from indicators.pivot_market_phase import PivotMarketPhase
 from indicators.k_line_market_phase import KlineMarketPhase
 from indicators.pivots import Pivots
+from indicators.registry import shared_indicator
 
 class RangeZone(bt.Indicator):
     lines = ('range_high', 'range_low', 'phase_indicator')
@@ -10,12 +11,13 @@ class RangeZone(bt.Indicator):
         range_high=dict(color='red', linestyle='dashed'),
         range_low=dict(color='blue', linestyle='dashed')
     )
+    lookback = 1  # 最多往回读几根（exactbars 模式下保留的历史长度，见 indicators.lookback）
 
     def __init__(self):
-        self.pivot_phase = PivotMarketPhase(self.data)
-        self.kline_phase = KlineMarketPhase(self.data)
-        self.pivots = Pivots(self.data)
-        self.atr = bt.indicators.ATR(self.data, period=14)  # 计算 ATR
+        self.pivot_phase = shared_indicator(self, PivotMarketPhase, self.data)
+        self.kline_phase = shared_indicator(self, KlineMarketPhase, self.data)
+        self.pivots = shared_indicator(self, Pivots, self.data)
+        self.atr = shared_indicator(self, bt.indicators.ATR, self.data, period=14)  # 计算 ATR
         self.range_high = None
         self.range_low = None
 
@@ -38,15 +40,13 @@ class RangeZone(bt.Indicator):
                     self.range_low = None
             
             elif self.range_high is None or self.range_low is None:
-                pivot_high, pivot_low = None, None
-                for i in range(1, len(self.data)):
-                    if pivot_high is None and not bt.math.isnan(self.pivots.lines.pivothigh[-i]):
-                        pivot_high = self.pivots.lines.pivothigh[-i]
-                    if pivot_low is None and not bt.math.isnan(self.pivots.lines.pivotlow[-i]):
-                        pivot_low = self.pivots.lines.pivotlow[-i]
-                    if pivot_high and pivot_low:
-                        break
-                
+                # 最近一个高点 / 低点
+                idx = len(self.data) - 1
+                last_high = self.pivots.high_index.last(1, idx)
+                last_low = self.pivots.low_index.last(1, idx)
+                pivot_high = last_high[0][1] if last_high else None
+                pivot_low = last_low[0][1] if last_low else None
+
                 # 检查 pivot 是否有效
                 self.range_high = high if pivot_high is None or abs(pivot_high - high) > atr_value else pivot_high
                 self.range_low = low if pivot_low is None or abs(pivot_low - low) > atr_value else pivot_low
@@ -68,7 +68,7 @@ class RangeZonePhaseIndicator(bt.Indicator):
     plotlines = dict(phase_indicator=dict(color='green'))
 
     def __init__(self):
-        self.range_zone = RangeZone(self.data)
+        self.range_zone = shared_indicator(self, RangeZone, self.data)
 
     def next(self):
         self.lines.phase_indicator[0] = self.range_zone.lines.phase_indicator[0]
@@ -0,0 +1,94 @@
+import backtrader as bt
+
+# 全局开关，关闭后每次都新建指标（用于基准测试对比）
+SHARING_ENABLED = True
+
+
+class SharedIndicatorLink(bt.Indicator):
+    """
+    复用指标在调用方下的占位子指标。
+
+    被复用的指标只由第一次创建它的 owner 计算，其它调用方拿到的是同一个实例，
+    但 backtrader 只会推进 / 复位自己的子指标。这个占位指标挂在调用方下面：
+    - minperiod 与目标指标一致，调用方的预热长度不变
+    - runonce 模式下随调用方一起 home / advance 目标指标的指针，调用方 next 里读 [0] 才是当前 K 线
+    自身不做任何计算，也不绘图。
+    """
+    lines = ('link',)
+    plotinfo = dict(plot=False)
+
+    def __init__(self, target):
+        self.target = target
+        for line in self.lines:
+            line.updateminperiod(target._minperiod)
+
+    def home(self):
+        super(SharedIndicatorLink, self).home()
+        self.target.home()
+
+    def advance(self, size=1):
+        self.target.advance(size=size)
+        super(SharedIndicatorLink, self).advance(size=size)
+
+
+def _find_root(owner):
+    """沿 _owner 向上找到所属的策略（注册表挂在策略实例上）"""
+    root = owner
+    while root is not None and not isinstance(root, bt.Strategy):
+        root = getattr(root, '_owner', None)
+    return root
+
+
+def _params_key(cls, kwargs):
+    """把显式参数和默认参数合并成可哈希的 key，保证默认值与显式传入的相同值视为同一个指标"""
+    items = [(name, kwargs.get(name, default)) for name, default in cls.params._getitems()]
+    extra = sorted((k, v) for k, v in kwargs.items() if not hasattr(cls.params, k))
+    return tuple(items + extra)
+
+
+def shared_indicator(owner, cls, data, **kwargs):
+    """
+    按 (指标类, 数据, 参数) 在同一个策略内复用指标实例。
+
+    第一次请求时正常创建（归属于调用方 owner），之后相同的请求直接返回已有实例，
+    并在 owner 下挂一个 SharedIndicatorLink，避免 ConsolidationIndicator、
+    LinearRegressionTrend 等在一个 feed 上重复计算。
+
+    策略的 indicator_params 参数（{类名: {参数: 值}}）会覆盖这里创建的同名指标的参数，
+    用于参数扫描时调整嵌套在其它指标内部的子指标。类名是否写对由 check_indicator_params 检查。
+    """
+    root = _find_root(owner)
+    if root is not None:
+        root.__dict__.setdefault('_shared_names', set()).add(cls.__name__)
+    overrides = getattr(root.p, 'indicator_params', None) if root is not None else None
+    if overrides and cls.__name__ in overrides:
+        kwargs = dict(kwargs, **overrides[cls.__name__])
+
+    if root is None or not SHARING_ENABLED:
+        return cls(data, **kwargs)
+
+    registry = root.__dict__.setdefault('_shared_indicators', {})
+    key = (cls, id(data), _params_key(cls, kwargs))
+    indicator = registry.get(key)
+    if indicator is None:
+        indicator = cls(data, **kwargs)
+        registry[key] = indicator
+    else:
+        SharedIndicatorLink(indicator._clock, target=indicator)
+        # 被其它调用方读取的次数（indicators.line_cache 据此判断命中缓存时是否还要计算）
+        indicator._shared_links = getattr(indicator, '_shared_links', 0) + 1
+
+    return indicator
+
+
+def check_indicator_params(strategy):
+    """
+    策略的指标都创建完之后调用：indicator_params 里有没有被任何 shared_indicator 用到的类名时抛出 ValueError，
+    避免参数网格里拼错的类名（例如 'BuySellSignl'）被静默忽略，跑出一张结果全都相同的表。
+    """
+    overrides = getattr(strategy.p, 'indicator_params', None) or {}
+    used = strategy.__dict__.get('_shared_names', set())
+    unused = sorted(set(overrides) - used)
+    if unused:
+        raise ValueError(f"indicator_params 中的指标没有被策略创建: {', '.join(unused)}"
+                         f"（可用: {', '.join(sorted(used))}）")
@@ -1,11 +1,140 @@
+import collections
+import math
+
 import backtrader as bt
 import numpy as np
-import math
 
 from indicators.bar_strength import BarStrength
+from indicators.line_cache import line_cache
 from indicators.linear_regression_slope_pct import LinearRegressionSlopePct
 from indicators.natr import NormalizedATR
+from indicators.registry import shared_indicator
+
+class SlidingHistogram(object):
+    """
+    固定长度窗口的收盘价统计，逐根 K 线增量维护：
+    - Σx、Σx² 计算均值 / 标准差；方差接近 0 时改用 np.mean / np.std 两遍计算，
+      保证 std 是否为 0（决定 is_range）与原实现一致
+    - 单调队列维护窗口最大 / 最小值
+    - 各 bin 的计数；只有窗口极值变化（bin 边界改变）时才重新分箱
+
+    分箱规则与 np.histogram(bins=bins, density=True) 完全一致，最大密度逐位相同。
+    """
+    RESYNC_BARS = 1000  # 每隔多少根 K 线重新求和一次，避免浮点误差累积
+    NEAR_ZERO_VAR = 1e-8  # 方差 / 均值² 低于此值时 Σx² / n - 均值² 的相消误差不可忽略
+
+    def __init__(self, size, bins):
+        self.size = size
+        self.bins = bins
+        self.reset([])
+
+    def reset(self, values):
+        self.window = collections.deque(float(v) for v in values)
+        self.pos = 0  # 已加入的值的序号，用于单调队列判断过期
+        self.max_deque = collections.deque()  # (序号, 值)，值单调递减
+        self.min_deque = collections.deque()  # (序号, 值)，值单调递增
+        for value in self.window:
+            self._push_extremes(value)
+        self._rebuild()
+
+    @property
+    def full(self):
+        return len(self.window) == self.size
+
+    def push(self, value):
+        value = float(value)
+        old = self.window.popleft()
+        self.window.append(value)
+        self._push_extremes(value)
+        self.sum += value - old
+        self.sum_sq += value * value - old * old
+        self.pushes_since_resync += 1
+
+        if (self.min_deque[0][1], self.max_deque[0][1]) != self.extremes:
+            self._rebuild()
+            return
+
+        old_bin = self.window_bins.popleft()
+        new_bin = self._bin_of(value)
+        self.window_bins.append(new_bin)
+        self.counts[old_bin] -= 1
+        self.counts[new_bin] += 1
+        if self.pushes_since_resync >= self.RESYNC_BARS:
+            self._resync_sums()
+
+    def _push_extremes(self, value):
+        pos = self.pos
+        self.pos += 1
+        while self.max_deque and self.max_deque[-1][1] <= value:
+            self.max_deque.pop()
+        self.max_deque.append((pos, value))
+        while self.min_deque and self.min_deque[-1][1] >= value:
+            self.min_deque.pop()
+        self.min_deque.append((pos, value))
+
+        expired = self.pos - self.size
+        if self.max_deque[0][0] < expired:
+            self.max_deque.popleft()
+        if self.min_deque[0][0] < expired:
+            self.min_deque.popleft()
+
+    def _resync_sums(self):
+        self.sum = sum(self.window)
+        self.sum_sq = sum(v * v for v in self.window)
+        self.pushes_since_resync = 0
+
+    def _rebuild(self):
+        """窗口极值变化：重新计算 bin 边界和所有值的分箱"""
+        self._resync_sums()
+        self.counts = [0] * self.bins
+        self.window_bins = collections.deque()
+        if not self.window:
+            self.extremes = None
+            return
+
+        self.extremes = (self.min_deque[0][1], self.max_deque[0][1])
+        first_edge, last_edge = self.extremes
+        if first_edge == last_edge:  # 与 np.histogram 相同，空区间左右各扩 0.5
+            first_edge -= 0.5
+            last_edge += 0.5
+        self.first_edge = first_edge
+        self.norm_denom = last_edge - first_edge
+        edges = np.linspace(first_edge, last_edge, self.bins + 1)
+        self.edges = edges.tolist()
+        self.bin_widths = np.diff(edges).tolist()
+
+        for value in self.window:
+            b = self._bin_of(value)
+            self.window_bins.append(b)
+            self.counts[b] += 1
+
+    def _bin_of(self, value):
+        """与 np.histogram 等宽分箱相同的下标计算（含边界 1 ULP 修正）"""
+        index = int((value - self.first_edge) / self.norm_denom * self.bins)
+        if index == self.bins:
+            index -= 1
+        if value < self.edges[index]:
+            index -= 1
+        if value >= self.edges[index + 1] and index != self.bins - 1:
+            index += 1
+        return index
+
+    def mean_std(self):
+        n = len(self.window)
+        mean = self.sum / n
+        var = self.sum_sq / n - mean * mean
+        if var <= self.NEAR_ZERO_VAR * mean * mean:
+            # 平坦 / 近乎平坦的窗口：np.std 常常是 1e-14 量级而不是 0，原样重算
+            closes = np.array(self.window)
+            return np.mean(closes), np.std(closes)
+        return mean, math.sqrt(var)
+
+    def max_density(self):
+        n = len(self.window)
+        return max(count / width / n for count, width in zip(self.counts, self.bin_widths))
 
+
+@line_cache
 class StdDevHistogramRange(bt.Indicator):
     lines = ('is_range', 'range_count')
     # plotlines = {
@@ -13,68 +142,87 @@ class StdDevHistogramRange(bt.Indicator):
     #     'range_count': {'_plot': True, 'color': 'blue', 'ls': '-', 'subplot': True}
     # }
     params = (('period', 50), ('density_threshold', 0.5), ('bins', 10), ('dynamic_factor', 2))
+    cache_state = ('range_counter', 'histogram')  # 缓存续算时需要恢复的状态（见 indicators.line_cache）
+
+    @property
+    def lookback(self):
+        return self.p.period - 1  # nextstart 取最近 period 根收盘价
 
     def __init__(self):
         self.addminperiod(self.p.period)
         self.range_counter = 0
+        self.histogram = SlidingHistogram(self.p.period, self.p.bins)
 
-    def next(self):
-        closes = np.array(self.data.close.get(size=self.p.period))
-        
+    def _is_range(self):
         # 计算过去 N 根 K 线的平均价格和标准差
-        avg_price_last_n = np.mean(closes)
-        std_price_last_n = np.std(closes)
-        
+        avg_price_last_n, std_price_last_n = self.histogram.mean_std()
+
         # 计算动态的 std_threshold（标准差阈值）
         # 通过历史的波动情况来设定阈值
         dynamic_std_threshold = self.p.dynamic_factor * std_price_last_n / avg_price_last_n
-        # print(f"Dynamic Std Threshold: {dynamic_std_threshold * 100}%")  # 输出动态标准差阈值
-        
+
         # 计算当前周期的标准差并转换为百分比
         std_price = std_price_last_n / avg_price_last_n
-        # print(f"Std Price (Percentage): {std_price * 100}%")  # 输出当前标准差百分比
-        
-        # 计算价格密度直方图
-        hist, bin_edges = np.histogram(closes, bins=self.p.bins, density=True)
-        max_density = max(hist) if len(hist) > 0 else 0
-        # print(f"Max Density: {max_density}")  # 输出最大密度
-        
+
+        # 价格密度直方图的最大密度
+        max_density = self.histogram.max_density()
+
         # 判断是否进入震荡区间
         is_range = 1 if (std_price < dynamic_std_threshold and max_density > self.p.density_threshold) else 0
-        # print(f"Is Range: {is_range}")  # 输出震荡区间标记
-        
-        self.lines.is_range[0] = is_range
 
         # 计算震荡区间的持续 K 线数
         if is_range:
             self.range_counter += 1
         else:
             self.range_counter = 0
-        self.lines.range_count[0] = self.range_counter
+        return is_range, self.range_counter
+
+    def nextstart(self):
+        self.histogram.reset(self.data.close.get(size=self.p.period))
+        self.lines.is_range[0], self.lines.range_count[0] = self._is_range()
+
+    def next(self):
+        self.histogram.push(self.data.close[0])
+        self.lines.is_range[0], self.lines.range_count[0] = self._is_range()
 
+    def once(self, start, end):
+        # 直接在数组上滚动，省掉 backtrader 逐根推进各条 line 的开销
+        closes = self.data.close.array
+        is_range = self.lines.is_range.array
+        range_count = self.lines.range_count.array
+        for i in range(start, end):
+            if self.histogram.full:
+                self.histogram.push(closes[i])
+            else:
+                self.histogram.reset(closes[i - self.p.period + 1:i + 1])
+            is_range[i], range_count[i] = self._is_range()
+
+@line_cache
 class LinearRegressionTrend(bt.Indicator):
     lines = ('strong_trend',)
     params = (('period', 20), ('scale_factor', 0.3))
     plotinfo = dict(subplot=True)  # 在子图中显示
+    cache_state = ()  # 无跨 K 线状态
 
     def __init__(self):
-        self.trend = LinearRegressionSlopePct(self.data.close, period=self.p.period)
-        self.natr = NormalizedATR(self.data, period=self.p.period)
+        self.trend = shared_indicator(self, LinearRegressionSlopePct, self.data.close, period=self.p.period)
+        self.natr = shared_indicator(self, NormalizedATR, self.data, period=self.p.period)
 
     def next(self):
         
         dynamic_threshold = self.natr[0] * self.p.scale_factor
 
         self.lines.strong_trend[0] = abs(self.trend[0]) > dynamic_threshold
+@line_cache
 class ConsolidationIndicator(bt.Indicator):
     lines = ('consol_upper', 'consol_lower')
     plotinfo = dict(subplot=False)
+    cache_state = ('consolidating', 'prev_upper', 'prev_lower')  # 缓存续算时需要恢复的状态（见 indicators.line_cache）
 
     def __init__(self):
-        self.stddev_range = StdDevHistogramRange(self.data)
-        self.linear_regression_trend = LinearRegressionTrend(self.data)
-        self.consolidating_highs = []
-        self.consolidating_lows = []
+        self.stddev_range = shared_indicator(self, StdDevHistogramRange, self.data)
+        self.linear_regression_trend = shared_indicator(self, LinearRegressionTrend, self.data)
+        self.consolidating = False  # 当前是否处于震荡区间内（区间上下界记录在 prev_upper / prev_lower）
         self.prev_upper = np.nan  # 记录上一个震荡区间的上界
         self.prev_lower = np.nan  # 记录上一个震荡区间的下界
 
@@ -82,27 +230,27 @@ class ConsolidationIndicator(bt.Indicator):
         # is_consolidating = self.stddev_range.is_range[0]
         is_consolidating = self.stddev_range.is_range[0] and not self.linear_regression_trend.strong_trend[0]
         if is_consolidating:  # 进入震荡状态
-            # 如果上一个震荡区间存在，且当前价格仍在上一个区间内，则沿用
-            if not np.isnan(self.prev_upper) and not np.isnan(self.prev_lower) and \
-               self.prev_lower <= self.data.close[0] <= self.prev_upper:
-                self.consolidating_highs.append(self.prev_upper)
-                self.consolidating_lows.append(self.prev_lower)
+            high = self.data.high[0]
+            low = self.data.low[0]
 
-            self.consolidating_highs.append(self.data.high[0])
-            self.consolidating_lows.append(self.data.low[0])
+            # 震荡持续中，或上一个震荡区间存在且当前价格仍在上一个区间内，则在原区间上扩展
+            if self.consolidating or (not np.isnan(self.prev_upper) and not np.isnan(self.prev_lower) and
+                                      self.prev_lower <= self.data.close[0] <= self.prev_upper):
+                high = max(self.prev_upper, high)
+                low = min(self.prev_lower, low)
 
-            # 更新震荡区间的上下界
-            self.prev_upper = max(self.consolidating_highs)
-            self.prev_lower = min(self.consolidating_lows)
+            # 更新震荡区间的上下界（只保留运行中的极值，O(1)）
+            self.prev_upper = high
+            self.prev_lower = low
+            self.consolidating = True
 
         else:  # 退出震荡状态，但保留之前的震荡区间
-            self.consolidating_highs.clear()
-            self.consolidating_lows.clear()
+            self.consolidating = False
 
         # 设置当前 K 线的震荡区间（如果存在）
-        if self.consolidating_highs and self.consolidating_lows:
-            self.lines.consol_upper[0] = max(self.consolidating_highs)
-            self.lines.consol_lower[0] = min(self.consolidating_lows)
+        if self.consolidating:
+            self.lines.consol_upper[0] = self.prev_upper
+            self.lines.consol_lower[0] = self.prev_lower
         elif not np.isnan(self.prev_upper) and not np.isnan(self.prev_lower) \
             and self.data.high[0] <= self.prev_upper and self.data.low[0] >= self.prev_lower:
             self.lines.consol_upper[0] = self.prev_upper
@@ -113,12 +261,14 @@ class ConsolidationIndicator(bt.Indicator):
             self.lines.consol_lower[0] = float('nan')
 
 
+@line_cache
 class ConsolidationDuration(bt.Indicator):
     lines = ('duration',)
     plotinfo = dict(subplot=True)
+    cache_state = ('counter',)  # 缓存续算时需要恢复的状态（见 indicators.line_cache）
 
     def __init__(self):
-        self.consolidation_indicator = ConsolidationIndicator(self.data)
+        self.consolidation_indicator = shared_indicator(self, ConsolidationIndicator, self.data)
         self.counter = 0  # 记录震荡区间的持续时间
 
     def next(self):
@@ -129,19 +279,22 @@ class ConsolidationDuration(bt.Indicator):
 
         self.lines.duration[0] = self.counter
 
+@line_cache
 class BuySellSignal(bt.Indicator):
     lines = ('suspect_signal', 'confirm_signal')
     plotinfo = dict(subplot=True)
+    cache_state = ()  # 只回读自己的 line，无其它跨 K 线状态
     
     params = (
         ('duration_threshold', 20),
         ('close_threshold', 0.5),
     )
+    lookback = 1  # 最多往回读几根（exactbars 模式下保留的历史长度，见 indicators.lookback）
     
     def __init__(self):
-        self.consolidation_duration = ConsolidationDuration(self.data)
-        self.consolidation_indicator = ConsolidationIndicator(self.data)
-        self.bar_strength = BarStrength(self.data)
+        self.consolidation_duration = shared_indicator(self, ConsolidationDuration, self.data)
+        self.consolidation_indicator = shared_indicator(self, ConsolidationIndicator, self.data)
+        self.bar_strength = shared_indicator(self, BarStrength, self.data)
     
     def next(self):
         self.lines.suspect_signal[0] = 0
@@ -4,8 +4,10 @@ import numpy as np
 import math
 
 from indicators.bar_strength import BarStrength
+from indicators.line_cache import line_cache
 from indicators.linear_regression_slope_pct import LinearRegressionSlopePct
 from indicators.natr import NormalizedATR
+from indicators.registry import shared_indicator
 
 class StdDevRange(bt.Indicator):
     lines = ('is_consolidating',)
@@ -13,8 +15,8 @@ class StdDevRange(bt.Indicator):
     plotinfo = dict(subplot=True)  # 在子图中显示
 
     def __init__(self):
-        sma = btind.SMA(self.data.close, period=self.p.period)
-        std = btind.StandardDeviation(self.data.close, period=self.p.period)
+        sma = shared_indicator(self, btind.SMA, self.data.close, period=self.p.period)
+        std = shared_indicator(self, btind.StandardDeviation, self.data.close, period=self.p.period)
 
         self.upper = sma + self.p.k * std
         self.lower = sma - self.p.k * std
@@ -22,14 +24,16 @@ class StdDevRange(bt.Indicator):
     def next(self):
         self.lines.is_consolidating[0] = 1 if self.lower[0] <= self.data.close[0] <= self.upper[0] else 0
 
+@line_cache
 class LinearRegressionTrend(bt.Indicator):
     lines = ('strong_trend',)
     params = (('period', 20), ('scale_factor', 0.3))
     plotinfo = dict(subplot=True)  # 在子图中显示
+    cache_state = ()  # 无跨 K 线状态
 
     def __init__(self):
-        self.trend = LinearRegressionSlopePct(self.data.close, period=self.p.period)
-        self.natr = NormalizedATR(self.data, period=self.p.period)
+        self.trend = shared_indicator(self, LinearRegressionSlopePct, self.data.close, period=self.p.period)
+        self.natr = shared_indicator(self, NormalizedATR, self.data, period=self.p.period)
 
     def next(self):
         
@@ -38,42 +42,43 @@ class LinearRegressionTrend(bt.Indicator):
         self.lines.strong_trend[0] = abs(self.trend[0]) > dynamic_threshold
 
 
+@line_cache
 class ConsolidationIndicator(bt.Indicator):
     lines = ('consol_upper', 'consol_lower')
     plotinfo = dict(subplot=False)
+    cache_state = ('consolidating', 'prev_upper', 'prev_lower')  # 缓存续算时需要恢复的状态（见 indicators.line_cache）
 
     def __init__(self):
-        self.stddev_range = StdDevRange(self.data)
-        self.linear_regression_trend = LinearRegressionTrend(self.data)
-        self.consolidating_highs = []
-        self.consolidating_lows = []
+        self.stddev_range = shared_indicator(self, StdDevRange, self.data)
+        self.linear_regression_trend = shared_indicator(self, LinearRegressionTrend, self.data)
+        self.consolidating = False  # 当前是否处于震荡区间内（区间上下界记录在 prev_upper / prev_lower）
         self.prev_upper = np.nan  # 记录上一个震荡区间的上界
         self.prev_lower = np.nan  # 记录上一个震荡区间的下界
 
     def next(self):
         is_consolidating = self.stddev_range.is_consolidating[0] and not self.linear_regression_trend.strong_trend[0]
         if is_consolidating:  # 进入震荡状态
-            # 如果上一个震荡区间存在，且当前价格仍在上一个区间内，则沿用
-            if not np.isnan(self.prev_upper) and not np.isnan(self.prev_lower) and \
-               self.prev_lower <= self.data.close[0] <= self.prev_upper:
-                self.consolidating_highs.append(self.prev_upper)
-                self.consolidating_lows.append(self.prev_lower)
+            high = self.data.high[0]
+            low = self.data.low[0]
 
-            self.consolidating_highs.append(self.data.high[0])
-            self.consolidating_lows.append(self.data.low[0])
+            # 震荡持续中，或上一个震荡区间存在且当前价格仍在上一个区间内，则在原区间上扩展
+            if self.consolidating or (not np.isnan(self.prev_upper) and not np.isnan(self.prev_lower) and
+                                      self.prev_lower <= self.data.close[0] <= self.prev_upper):
+                high = max(self.prev_upper, high)
+                low = min(self.prev_lower, low)
 
-            # 更新震荡区间的上下界
-            self.prev_upper = max(self.consolidating_highs)
-            self.prev_lower = min(self.consolidating_lows)
+            # 更新震荡区间的上下界（只保留运行中的极值，O(1)）
+            self.prev_upper = high
+            self.prev_lower = low
+            self.consolidating = True
 
         else:  # 退出震荡状态，但保留之前的震荡区间
-            self.consolidating_highs.clear()
-            self.consolidating_lows.clear()
+            self.consolidating = False
 
         # 设置当前 K 线的震荡区间（如果存在）
-        if self.consolidating_highs and self.consolidating_lows:
-            self.lines.consol_upper[0] = max(self.consolidating_highs)
-            self.lines.consol_lower[0] = min(self.consolidating_lows)
+        if self.consolidating:
+            self.lines.consol_upper[0] = self.prev_upper
+            self.lines.consol_lower[0] = self.prev_lower
         elif not np.isnan(self.prev_upper) and not np.isnan(self.prev_lower) \
             and self.data.high[0] <= self.prev_upper and self.data.low[0] >= self.prev_lower:
             self.lines.consol_upper[0] = self.prev_upper
@@ -83,12 +88,14 @@ class ConsolidationIndicator(bt.Indicator):
             self.lines.consol_upper[0] = float('nan')
             self.lines.consol_lower[0] = float('nan')
 
+@line_cache
 class ConsolidationDuration(bt.Indicator):
     lines = ('duration',)
     plotinfo = dict(subplot=True)
+    cache_state = ('counter',)  # 缓存续算时需要恢复的状态（见 indicators.line_cache）
 
     def __init__(self):
-        self.consolidation_indicator = ConsolidationIndicator(self.data)
+        self.consolidation_indicator = shared_indicator(self, ConsolidationIndicator, self.data)
         self.counter = 0  # 记录震荡区间的持续时间
 
     def next(self):
@@ -99,19 +106,22 @@ class ConsolidationDuration(bt.Indicator):
 
         self.lines.duration[0] = self.counter
 
+@line_cache
 class BuySellSignal(bt.Indicator):
     lines = ('suspect_signal', 'confirm_signal')
     plotinfo = dict(subplot=True)
+    cache_state = ()  # 只回读自己的 line，无其它跨 K 线状态
     
     params = (
         ('duration_threshold', 100),
         ('close_threshold', 0.5),
     )
+    lookback = 2  # 最多往回读几根（exactbars 模式下保留的历史长度，见 indicators.lookback）
     
     def __init__(self):
-        self.consolidation_duration = ConsolidationDuration(self.data)
-        self.consolidation_indicator = ConsolidationIndicator(self.data)
-        self.bar_strength = BarStrength(self.data)
+        self.consolidation_duration = shared_indicator(self, ConsolidationDuration, self.data)
+        self.consolidation_indicator = shared_indicator(self, ConsolidationIndicator, self.data)
+        self.bar_strength = shared_indicator(self, BarStrength, self.data)
     
     def next(self):
         self.lines.suspect_signal[0] = 0
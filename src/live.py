@@ -0,0 +1,44 @@
+import argparse
+import logging
+import os
+
+import backtrader as bt
+
+from feeds import LiveData, SocketSource
+from fetcher import csv_path
+from strategies import ConfirmSignalStrategy
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="实时运行 ConfirmSignalStrategy（模拟撮合），K 线来自推送服务")
+    parser.add_argument("instId", type=str, help="交易对，例如 SOL-USDT")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="推送服务地址（replay-server.py 或 websocket 转发）")
+    parser.add_argument("--port", type=int, default=8765, help="推送服务端口")
+    parser.add_argument("--warmup-bars", type=int, default=1000, help="从本地缓存预热的 K 线数")
+    parser.add_argument("--cache", action="store_true", help="把实时收到的已确认 K 线追加写入本地缓存 CSV")
+    parser.add_argument("--cash", type=float, default=10000.0, help="初始资金")
+    args = parser.parse_args()
+
+    warmup = csv_path(args.instId)
+    if not os.path.exists(warmup):
+        logging.warning(f"{warmup} 不存在，不预热")
+        warmup = None
+
+    # exactbars=1：指标 line 也只保留声明的回看长度，长时间运行内存不增长
+    cerebro = bt.Cerebro(stdstats=False, exactbars=1)
+    cerebro.adddata(LiveData(source=SocketSource(args.host, args.port), warmup=warmup,
+                             warmup_bars=args.warmup_bars, cache=args.cache and warmup is not None,
+                             timeframe=bt.TimeFrame.Minutes, compression=5))
+    cerebro.addstrategy(ConfirmSignalStrategy)
+    cerebro.broker.setcash(args.cash)
+    cerebro.broker.setcommission(commission=0.0008, commtype=bt.CommInfoBase.COMM_PERC)
+
+    logging.info(f"初始资金: {cerebro.broker.getvalue():.2f}")
+    cerebro.run()
+    logging.info(f"数据源已关闭，最终资金: {cerebro.broker.getvalue():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import json
+import time
+from collections import defaultdict
+
+import backtrader as bt
+from backtrader.lineiterator import LineIterator
+
+from indicators.registry import SharedIndicatorLink, _params_key
+
+# backtrader 每根 K 线驱动指标 / 策略的入口：_next / _once 先递归子指标再算自己，
+# 所以包住这几个方法就能得到含子指标的累计耗时，减去子指标耗时即为自身耗时
+_HOOKS = (
+    (LineIterator, '_next'),
+    (LineIterator, '_once'),
+    (bt.Strategy, '_next'),
+    (bt.Strategy, '_oncepost'),
+)
+
+
+class _Stats:
+    __slots__ = ('obj', 'calls', 'cumulative', 'self_time')
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.calls = 0
+        self.cumulative = 0.0
+        self.self_time = 0.0
+
+
+class Profiler:
+    """
+    按指标 / 策略实例统计调用次数、累计耗时（含子指标）和自身耗时，并统计每个类的实例数，
+    参数和数据都相同的重复实例单独列出（可以用 shared_indicator 复用）。
+
+    只在 with 块内替换 backtrader 的驱动方法，退出后还原，不开启时没有任何额外开销：
+
+        with Profiler() as profiler:
+            cerebro.run()
+        profiler.print_table()
+
+    modules 为统计的模块前缀，默认只统计 src/indicators 和 src/strategies 里的类，
+    传 None 统计全部（包括 backtrader 自带指标和观察器）。未统计的子指标耗时计入上层的自身耗时。
+    """
+
+    def __init__(self, modules=('indicators', 'strategies')):
+        self.modules = modules
+        self.stats = {}
+        self._stack = []  # 每层调用累计的子调用耗时
+        self._active = set()  # 正在计时的实例（Strategy._next 会再调用 LineIterator._next）
+        self._originals = []
+
+    def _wanted(self, cls):
+        if self.modules is None:
+            return True
+        return cls.__module__.split('.')[0] in self.modules
+
+    def _wrap(self, original):
+        profiler = self
+
+        def wrapper(obj, *args, **kwargs):
+            key = id(obj)
+            if key in profiler._active or not profiler._wanted(type(obj)):
+                return original(obj, *args, **kwargs)
+
+            stats = profiler.stats.get(key)
+            if stats is None:
+                stats = profiler.stats[key] = _Stats(obj)
+
+            profiler._active.add(key)
+            profiler._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(obj, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = profiler._stack.pop()
+                profiler._active.discard(key)
+                stats.calls += 1
+                stats.cumulative += elapsed
+                stats.self_time += elapsed - children
+                if profiler._stack:
+                    profiler._stack[-1] += elapsed
+
+        return wrapper
+
+    def __enter__(self):
+        for cls, name in _HOOKS:
+            original = cls.__dict__[name]
+            self._originals.append((cls, name, original))
+            setattr(cls, name, self._wrap(original))
+        return self
+
+    def __exit__(self, *exc):
+        while self._originals:
+            cls, name, original = self._originals.pop()
+            setattr(cls, name, original)
+        return False
+
+    @staticmethod
+    def _instance_key(obj):
+        """类 + 参数 + 数据相同的实例视为重复（SharedIndicatorLink 本身就是复用的结果，不算重复）"""
+        if isinstance(obj, SharedIndicatorLink):
+            return id(obj)
+        try:
+            params = _params_key(type(obj), obj.p._getkwargs())
+        except TypeError:  # 参数不可哈希
+            params = repr(obj.p._getkwargs())
+        return type(obj), params, tuple(id(d) for d in getattr(obj, 'datas', ()))
+
+    def report(self):
+        """按类汇总，按自身耗时降序"""
+        classes = defaultdict(lambda: {'instances': 0, 'calls': 0, 'cumulative': 0.0, 'self': 0.0, 'keys': set()})
+        for stats in self.stats.values():
+            cls = type(stats.obj)
+            row = classes[cls]
+            row['instances'] += 1
+            row['calls'] += stats.calls
+            row['cumulative'] += stats.cumulative
+            row['self'] += stats.self_time
+            row['keys'].add(self._instance_key(stats.obj))
+
+        total = sum(row['self'] for row in classes.values()) or 1.0
+        rows = []
+        for cls, row in classes.items():
+            rows.append({
+                'class': cls.__name__,
+                'module': cls.__module__,
+                'instances': row['instances'],
+                'duplicates': row['instances'] - len(row['keys']),
+                'calls': row['calls'],
+                'cumulative_s': row['cumulative'],
+                'self_s': row['self'],
+                'self_pct': row['self'] / total * 100,
+            })
+        return sorted(rows, key=lambda r: r['self_s'], reverse=True)
+
+    def print_table(self):
+        rows = self.report()
+        print(f'{"指标 / 策略":<32}{"实例":>6}{"重复":>6}{"调用次数":>12}{"累计(s)":>10}{"自身(s)":>10}{"自身%":>8}')
+        for row in rows:
+            print(f'{row["class"]:<32}{row["instances"]:>6}{row["duplicates"]:>6}{row["calls"]:>12}'
+                  f'{row["cumulative_s"]:>10.3f}{row["self_s"]:>10.3f}{row["self_pct"]:>8.1f}')
+
+    def to_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
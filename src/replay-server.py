@@ -0,0 +1,35 @@
+import argparse
+import logging
+import os
+
+from feeds import ReplayServer
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 K 线回放服务器：把 CSV 按 websocket 推送格式逐条发给 live.py，用于测试")
+    parser.add_argument("csv", type=str, help="K 线 CSV，例如 data/SOL-USDT_candlesticks.csv")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--start", type=int, default=0, help="从第几根 K 线开始推送（之前的部分留给预热）")
+    parser.add_argument("--end", type=int, default=None, help="推送到第几根 K 线为止（不含）")
+    parser.add_argument("--interval", type=float, default=0.0, help="每条消息间隔秒数")
+    parser.add_argument("--partials", type=int, default=2, help="每根 K 线走完前推送的未确认更新条数")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.csv):
+        logging.error(f"{args.csv} 文件不存在")
+        exit(1)
+
+    instId = os.path.basename(args.csv).split("_")[0]
+    server = ReplayServer(args.csv, port=args.port, start=args.start, end=args.end, interval=args.interval,
+                          instId=instId, partials=args.partials)
+    logging.info(f"回放 {args.csv} 第 {args.start} 根起共 {len(server.df)} 根 K 线，监听 127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from .engine import compute_signals, NUMBA_AVAILABLE
@@ -0,0 +1,169 @@
+"""
+不经过 backtrader 逐根循环的信号引擎：输入 OHLC 数组，一次算出 ConsolidationIndicator 的震荡区间、
+ConsolidationDuration 和 BuySellSignal 的 suspect_signal / confirm_signal。
+
+与 runonce 模式下的 backtrader 指标逐根相同（包括预热期的 NaN）：
+- 无状态的部分用 NumPy 整段计算，斜率和 K 线强度直接调用指标 once 用的同一个函数
+- ATR 平滑、震荡区间、持续时间和两段式确认逻辑在 signals.loops 里逐根计算（有 Numba 时编译）
+- 标准差通道用 NumPy 近似计算，收盘价离通道边界近到可能受舍入影响的 K 线，
+  再按 backtrader 的算法（math.fsum 求和）逐根重算，保证 is_consolidating 判断一致
+"""
+import math
+
+import numpy as np
+
+from indicators.bar_strength import bar_strength_values
+from indicators.linear_regression_slope_pct import rolling_slope_pct
+from signals import loops
+from signals.loops import NUMBA_AVAILABLE
+
+# NumPy 近似值相对 backtrader 精确值的误差上限（相对量），远大于实际误差
+_REL_ERR = 1e-12
+
+
+def _as_input(values, use_numba):
+    """Numba 编译的循环要 NumPy 数组，纯 Python 循环用 list 更快"""
+    return values if use_numba else values.tolist()
+
+
+def _output(n, use_numba):
+    return np.full(n, np.nan) if use_numba else [math.nan] * n
+
+
+def _rolling_sum(values, period):
+    """长度 len(values) - period + 1 的滑动窗口和（不需要 period 倍的临时内存）"""
+    return np.convolve(values, np.ones(period), mode='valid')
+
+
+def average_true_range(high, low, close, period, use_numba):
+    """bt.indicators.ATR：TrueRange 的 SmoothedMovingAverage，第一个值在下标 period"""
+    n = len(close)
+    out = _output(n, use_numba)
+    if n <= period:
+        return np.asarray(out, dtype=np.float64)
+
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+    seed = math.fsum(true_range[1:period + 1].tolist()) / period
+
+    loops.smoothed_average(_as_input(true_range, use_numba), period, period, seed, out)
+    return np.asarray(out, dtype=np.float64)
+
+
+def _std_dev_band_exact(close, i, period, k):
+    """按 backtrader SMA / StandardDeviation 的算法精确计算第 i 根的通道，返回 is_consolidating"""
+    window = close[i - period + 1:i + 1]
+    mean = math.fsum(window) / period
+    meansq = math.fsum([x ** 2 for x in window]) / period
+    std = abs(meansq - mean ** 2) ** 0.5
+    upper = mean + k * std
+    lower = mean - k * std
+    return 1.0 if lower <= close[i] <= upper else 0.0
+
+
+def std_dev_range(close, period, k):
+    """StdDevRange.is_consolidating，第一个值在下标 period - 1"""
+    n = len(close)
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+
+    mean = _rolling_sum(close, period) / period
+    meansq = _rolling_sum(close * close, period) / period
+    variance = np.abs(meansq - mean * mean)
+    std = np.sqrt(variance)
+    upper = mean + k * std
+    lower = mean - k * std
+
+    c = close[period - 1:]
+    out[period - 1:] = (lower <= c) & (c <= upper)
+
+    # 方差由两个大数相减得到，误差按 meansq 估计；std 在 0 附近时误差会被开方放大
+    var_err = _REL_ERR * meansq
+    std_err = var_err / (std + np.sqrt(var_err))
+    tolerance = 16 * (_REL_ERR * np.abs(mean) + k * std_err)
+    near = (np.abs(c - upper) <= tolerance) | (np.abs(c - lower) <= tolerance)
+
+    close_list = close.tolist()
+    for j in np.flatnonzero(near):
+        i = j + period - 1
+        out[i] = _std_dev_band_exact(close_list, i, period, k)
+    return out
+
+
+def compute_signals(open_, high, low, close,
+                    period=50, k=3,
+                    trend_period=20, scale_factor=0.3,
+                    strength_period=20, close_percent=0.8,
+                    duration_threshold=100, close_threshold=0.5,
+                    use_numba=None):
+    """
+    计算 std_dev_range 中 ConsolidationIndicator / ConsolidationDuration / BuySellSignal 的全部输出。
+
+    参数与指标参数对应：period / k -> StdDevRange，trend_period / scale_factor -> LinearRegressionTrend，
+    strength_period / close_percent -> BarStrength，duration_threshold / close_threshold -> BuySellSignal。
+    返回 {线名: 数组}，预热期为 NaN，与 backtrader 指标的 line.array 对齐。
+    """
+    if use_numba is None:
+        use_numba = NUMBA_AVAILABLE
+    open_, high, low, close = (np.ascontiguousarray(a, dtype=np.float64) for a in (open_, high, low, close))
+    n = len(close)
+
+    # StdDevRange
+    is_consolidating = std_dev_range(close, period, k)
+
+    # LinearRegressionTrend：斜率百分比与 NATR 动态阈值比较
+    slope = np.full(n, np.nan)
+    if n >= trend_period:
+        # backtrader 的 runonce 先用 oncestart 算第一根，再用 once 算剩余部分，这里按同样的切分调用
+        first = trend_period - 1
+        slope[first:first + 1] = rolling_slope_pct(close[:first + 1], trend_period)
+        slope[first + 1:] = rolling_slope_pct(close[1:], trend_period)
+    atr_cache = {}
+
+    def atr(p):
+        if p not in atr_cache:
+            atr_cache[p] = average_true_range(high, low, close, p, use_numba)
+        return atr_cache[p]
+
+    natr = (atr(trend_period) / close) * 100
+    strong_trend = np.full(n, np.nan)
+    strong_trend[trend_period:] = np.abs(slope[trend_period:]) > natr[trend_period:] * scale_factor
+
+    # BarStrength
+    strength = np.full(n, np.nan)
+    strength[strength_period:] = bar_strength_values(
+        open_[strength_period:], high[strength_period:], low[strength_period:], close[strength_period:],
+        atr(strength_period)[strength_period:], close_percent)
+
+    # ConsolidationIndicator / ConsolidationDuration：从子指标中最长的预热期开始
+    consol_start = max(period, trend_period + 1) - 1
+    consol_upper = _output(n, use_numba)
+    consol_lower = _output(n, use_numba)
+    high_in, low_in, close_in = (_as_input(a, use_numba) for a in (high, low, close))
+    loops.consolidation_bounds(_as_input(is_consolidating, use_numba), _as_input(strong_trend, use_numba),
+                               high_in, low_in, close_in, consol_start, consol_upper, consol_lower)
+    duration = _output(n, use_numba)
+    loops.consolidation_duration(consol_upper, consol_lower, consol_start, duration)
+
+    # BuySellSignal
+    signal_start = max(consol_start + 1, strength_period + 1) - 1
+    suspect = _output(n, use_numba)
+    confirm = _output(n, use_numba)
+    loops.buy_sell_signal(_as_input(open_, use_numba), high_in, low_in, close_in,
+                          _as_input(strength, use_numba), duration, consol_upper, consol_lower, signal_start,
+                          duration_threshold, close_threshold, suspect, confirm)
+
+    as_array = lambda values: np.asarray(values, dtype=np.float64)
+    return {
+        'is_consolidating': is_consolidating,
+        'slope_pct': slope,
+        'natr': natr,
+        'strong_trend': strong_trend,
+        'strength': strength,
+        'consol_upper': as_array(consol_upper),
+        'consol_lower': as_array(consol_lower),
+        'duration': as_array(duration),
+        'suspect_signal': as_array(suspect),
+        'confirm_signal': as_array(confirm),
+    }
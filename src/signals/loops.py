@@ -0,0 +1,126 @@
+"""
+信号引擎中有状态、必须逐根计算的部分。
+
+这些函数只用下标读写和浮点运算，安装了 Numba 时用 njit 编译；
+没有 Numba 时按纯 Python 运行（调用方传入 list，下标访问比 NumPy 数组快）。
+逻辑与对应的 backtrader 指标 next 逐行对应，包括预热期 NaN 参与比较时的行为。
+"""
+import math
+
+try:
+    from numba import njit
+except ImportError:  # Numba 是可选依赖
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+
+def _jit(func):
+    return njit(cache=True)(func) if NUMBA_AVAILABLE else func
+
+
+@_jit
+def smoothed_average(values, period, first, seed, out):
+    """SmoothedMovingAverage：first 处为种子（前 period 个值的均值），之后 prev * (1 - 1/period) + value / period"""
+    alpha = 1.0 / period
+    alpha1 = 1.0 - alpha
+    out[first] = prev = seed
+    for i in range(first + 1, len(values)):
+        prev = prev * alpha1 + values[i] * alpha
+        out[i] = prev
+
+
+@_jit
+def consolidation_bounds(is_consolidating, strong_trend, high, low, close, start, upper, lower):
+    """ConsolidationIndicator.next"""
+    consolidating = False
+    prev_upper = math.nan
+    prev_lower = math.nan
+    for i in range(start, len(close)):
+        if is_consolidating[i] != 0 and strong_trend[i] == 0:  # 进入震荡状态
+            h = high[i]
+            l = low[i]
+            if consolidating or (not math.isnan(prev_upper) and not math.isnan(prev_lower) and
+                                 prev_lower <= close[i] <= prev_upper):
+                h = max(prev_upper, h)
+                l = min(prev_lower, l)
+            prev_upper = h
+            prev_lower = l
+            consolidating = True
+        else:
+            consolidating = False
+
+        if consolidating:
+            upper[i] = prev_upper
+            lower[i] = prev_lower
+        elif not math.isnan(prev_upper) and not math.isnan(prev_lower) \
+                and high[i] <= prev_upper and low[i] >= prev_lower:
+            upper[i] = prev_upper
+            lower[i] = prev_lower
+        else:
+            upper[i] = math.nan
+            lower[i] = math.nan
+
+
+@_jit
+def consolidation_duration(upper, lower, start, out):
+    """ConsolidationDuration.next"""
+    counter = 0
+    for i in range(start, len(upper)):
+        if not (math.isnan(upper[i]) or math.isnan(lower[i])):
+            counter += 1
+        else:
+            counter = 0
+        out[i] = counter
+
+
+@_jit
+def _is_confirm_signal(direction, close, high, low, close_threshold):
+    if direction == 1:
+        return close >= (high - (high - low) * (1 - close_threshold))
+    elif direction == -1:
+        return close <= (low + (high - low) * (1 - close_threshold))
+    return False
+
+
+@_jit
+def buy_sell_signal(open_, high, low, close, strength, duration, upper, lower, start,
+                    duration_threshold, close_threshold, suspect, confirm):
+    """BuySellSignal.next"""
+    for i in range(start, len(close)):
+        suspect[i] = 0
+        confirm[i] = 0
+        c = close[i]
+        h = high[i]
+        l = low[i]
+
+        # 直接确认上一根的疑似信号
+        s1 = suspect[i - 1]
+        if s1 != 0 and _is_confirm_signal(s1, c, h, l, close_threshold):
+            confirm[i] = 2 if s1 == 1 else -2
+            continue
+
+        # 上上根的疑似信号：上一根方向一致，或方向相反但强度不高
+        s2 = suspect[i - 2]
+        if s2 != 0:
+            direction_m1 = 1 if close[i - 1] > open_[i - 1] else -1
+            if direction_m1 == s2 or (direction_m1 != s2 and strength[i - 1] < 2):
+                if _is_confirm_signal(s2, c, h, l, close_threshold):
+                    confirm[i] = 2 if s2 == 1 else -2
+                    continue
+
+        if duration[i - 1] < duration_threshold:
+            continue
+
+        if not (math.isnan(upper[i]) or math.isnan(lower[i])):
+            continue
+
+        prev_upper = upper[i - 1]
+        prev_lower = lower[i - 1]
+        if math.isnan(prev_upper) or math.isnan(prev_lower) or (prev_lower <= c <= prev_upper):
+            continue
+
+        if strength[i] <= 1:
+            continue
+
+        suspect[i] = 1 if c > prev_upper else -1
@@ -0,0 +1,73 @@
+"""
+括号单（入场 + 止损 + 止盈）记录。
+
+每组括号单一个 Bracket（__slots__，只存价格、数量和状态），BracketBook 按订单 ref 反查所属的括号单和角色，
+notify_order 里 O(1) 定位，不用遍历全部括号单；支持同时持有多组同方向的括号单（顺势加仓）。
+"""
+
+ENTRY, STOP, LIMIT = 0, 1, 2
+ROLE_NAMES = ('入场订单', '止损订单', '止盈订单')
+
+PENDING, OPEN, CLOSED = 0, 1, 2  # 入场单未成交 / 已持仓 / 已平仓或入场单失效
+
+
+class Bracket:
+    __slots__ = ('entry_ref', 'stop_ref', 'limit_ref', 'direction', 'size',
+                 'entry_price', 'stop_price', 'target_price', 'state')
+
+    def __init__(self, entry_ref, stop_ref, limit_ref, direction, size, entry_price, stop_price, target_price):
+        self.entry_ref = entry_ref
+        self.stop_ref = stop_ref
+        self.limit_ref = limit_ref
+        self.direction = direction  # 1 做多，-1 做空
+        self.size = size
+        self.entry_price = entry_price
+        self.stop_price = stop_price
+        self.target_price = target_price
+        self.state = PENDING
+
+
+class BracketBook:
+    """
+    进行中的括号单和订单 ref -> (Bracket, 角色) 的反查表。
+    括号单平仓（或入场单失效）后不再计入 active，但各订单的 ref 保留到它自己收到最终状态，
+    之后被取消的兄弟订单仍能认出角色。
+    """
+
+    def __init__(self):
+        self.by_ref = {}
+        self.active = 0  # 未平仓的括号单数（PENDING + OPEN）
+        self.direction = 0  # 未平仓括号单的方向（1 做多，-1 做空），没有时为 0
+
+    def __len__(self):
+        return self.active
+
+    def accepts(self, direction):
+        """只在没有未平仓括号单或方向相同时加开：反向入场会和已有持仓对冲，原括号单的止损止盈仍作用在对冲后的仓位上"""
+        return self.active == 0 or direction == self.direction
+
+    def add(self, bracket):
+        self.direction = bracket.direction
+        self.by_ref[bracket.entry_ref] = (bracket, ENTRY)
+        self.by_ref[bracket.stop_ref] = (bracket, STOP)
+        self.by_ref[bracket.limit_ref] = (bracket, LIMIT)
+        self.active += 1
+
+    def lookup(self, ref):
+        """返回 (Bracket, 角色)，不属于任何括号单时为 (None, None)"""
+        return self.by_ref.get(ref, (None, None))
+
+    def close(self, bracket):
+        if bracket.state != CLOSED:
+            bracket.state = CLOSED
+            self.active -= 1
+            if self.active == 0:
+                self.direction = 0
+
+    def close_all(self):
+        for bracket, _ in list(self.by_ref.values()):
+            self.close(bracket)
+
+    def finish(self, ref):
+        """订单收到最终状态（成交 / 取消 / 过期等），从反查表移除"""
+        self.by_ref.pop(ref, None)
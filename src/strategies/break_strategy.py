@@ -2,35 +2,74 @@ import backtrader as bt
 import math
 import datetime
 
+from indicators import std_dev_histogram_range, std_dev_range
+from indicators.k_line_market_phase import KlineMarketPhase
+from indicators.lookback import reserve_lookback
+from indicators.pivot_market_phase import PivotMarketPhase
 from indicators.pivots import Pivots
-from indicators.std_dev_range import BuySellSignal, ConsolidationDuration, ConsolidationIndicator
-# from indicators.std_dev_histogram_range import BuySellSignal, ConsolidationDuration, ConsolidationIndicator
+from indicators.registry import check_indicator_params, shared_indicator
+from strategies.brackets import ENTRY, OPEN, ROLE_NAMES, Bracket, BracketBook
 
 class ConfirmSignalStrategy(bt.Strategy):
     params = (
         ('risk_per_trade', 0.02),  # 单次交易最大风险占比
         ('lookback_bars', 3),  # 向前查找突破区间的最大K线数量
+        ('max_brackets', 1),  # 同时进行的括号单组数上限，大于 1 时允许在已有持仓上同方向加仓
+        ('trade_start', None),  # datetime，之前的 K 线只更新指标、不下单（walkforward.py 的测试窗口从训练窗口起点接着算指标）
+        ('trade_end', None),  # datetime，从这根 K 线起不再开仓，撤掉未成交的括号单并市价平仓（下一根开盘成交）
+        ('histogram', False),  # True: 使用直方图版本的震荡区间指标（std_dev_histogram_range）
+        ('indicator_params', None),  # 覆盖内部指标参数，格式: {类名: {参数: 值}}，例如 {'BuySellSignal': {'duration_threshold': 50}}
+        ('printlog', True),  # 是否输出日志（参数扫描时关闭）
     )
 
+    @property
+    def lookback(self):
+        return self.p.lookback_bars  # find_breakout_zone 读 consol_upper[-lookback_bars]
+
+    def qbuffer(self, savemem=0, replaying=False):
+        super(ConfirmSignalStrategy, self).qbuffer(savemem=savemem, replaying=replaying)
+        if savemem:  # exactbars 模式：按各指标声明的 lookback 扩大环形缓冲区
+            reserve_lookback(self)
+
     def log(self, txt):
         """ 输出日志信息 """
-        print(f"K线索引={len(self)}, {txt}")
+        if self.p.printlog:
+            print(f"K线索引={len(self)}, {txt}")
 
     def __init__(self):
-        self.consolidation_indicator = ConsolidationIndicator(self.data)
-        self.consolidation_duration = ConsolidationDuration(self.data)
-        self.buy_sell_signal = BuySellSignal(self.data)
+        ranges = std_dev_histogram_range if self.p.histogram else std_dev_range
+        self.consolidation_indicator = shared_indicator(self, ranges.ConsolidationIndicator, self.data)
+        self.consolidation_duration = shared_indicator(self, ranges.ConsolidationDuration, self.data)
+        self.buy_sell_signal = shared_indicator(self, ranges.BuySellSignal, self.data)
         self.confirm_signal = self.buy_sell_signal.lines.confirm_signal
-        self.pivots = Pivots(self.data)
-        self.pivot_high = self.pivots.lines.pivothigh
-        self.pivot_low = self.pivots.lines.pivotlow
+        self.pivots = shared_indicator(self, Pivots, self.data)
         self.consol_upper = self.consolidation_indicator.lines.consol_upper
         self.consol_lower = self.consolidation_indicator.lines.consol_lower
 
-        self.orders = {}  # 记录所有订单，格式: {entry_order_ref: (stop_order_ref, limit_order_ref)}
+        # 额外加入的高周期数据（index.py --timeframes）：各自的 K 线 / 关键点市场阶段，出现信号时一并输出
+        self.timeframe_phases = [
+            (data._name, shared_indicator(self, KlineMarketPhase, data), shared_indicator(self, PivotMarketPhase, data))
+            for data in self.datas[1:]
+        ]
+
+        self.brackets = BracketBook()  # 进行中的括号单，按订单 ref 反查（见 strategies.brackets）
+        self.warming_up = False  # 实时数据预热期间（DELAYED）只更新指标，不下单
+        self.trade_start = bt.date2num(self.p.trade_start) if self.p.trade_start is not None else None
+        self.trade_end = bt.date2num(self.p.trade_end) if self.p.trade_end is not None else None
+        self.flattened = False
     
+    def start(self):
+        check_indicator_params(self)  # 指标都已创建，拼错的 indicator_params 类名在这里报错
+
+    def notify_data(self, data, status, *args, **kwargs):
+        if status == data.DELAYED:
+            self.warming_up = True
+        elif status == data.LIVE:
+            self.warming_up = False
+            self.log("预热完成，开始实时交易")
+
     def has_open_position(self):
-        return bool(self.orders)
+        return bool(self.brackets)
 
     def find_breakout_zone(self):
         for i in range(-1, -self.p.lookback_bars - 1, -1):
@@ -39,28 +78,53 @@ class ConfirmSignalStrategy(bt.Strategy):
         return None, None
     
     def find_pivot_points(self):
-        highs, lows = [], []
-        i = -1
-        while abs(i) <= len(self.data):  # 直到数据耗尽
-            if not math.isnan(self.pivot_high[i]):
-                highs.append(self.pivot_high[i])
-            if not math.isnan(self.pivot_low[i]):
-                lows.append(self.pivot_low[i])
-            if highs and lows:
-                break
-            i -= 1
-        return highs, lows
+        """往回找到同时出现高点和低点为止，返回期间的全部高点和低点（最新的在前）"""
+        idx = len(self.data) - 1
+        last_high = self.pivots.high_index.last(1, idx)
+        last_low = self.pivots.low_index.last(1, idx)
+        if not last_high or not last_low:
+            return [v for _, v in last_high], [v for _, v in last_low]
+
+        first = min(last_high[0][0], last_low[0][0])
+        return self.pivots.high_index.since(first, idx), self.pivots.low_index.since(first, idx)
+
+    def flatten(self):
+        """撤掉全部未成交订单（入场单和持仓的止损止盈），括号单记为结束，剩余持仓市价平掉"""
+        for order in self.broker.get_orders_open():
+            self.cancel(order)
+        self.brackets.close_all()
+        if self.position:
+            self.log(f"交易结束，平仓 {self.position.size:.4f}")
+            self.close()
+        self.flattened = True
 
     def next(self):
+        if self.trade_end is not None and self.data.datetime[0] >= self.trade_end:
+            if not self.flattened:
+                self.flatten()
+            return
+
         if self.confirm_signal[0] == 0:
             return
         
         self.log(f"signal: {self.confirm_signal[0]}");
+        for name, kline_phase, pivot_phase in self.timeframe_phases:
+            self.log(f"{name} K线阶段={kline_phase.phase[0]:.0f}, 关键点阶段={pivot_phase.phase[0]:.0f}")
 
-        if self.has_open_position():
+        if self.warming_up:
             return
 
-        self.log(f"no open position");
+        if self.trade_start is not None and self.data.datetime[0] < self.trade_start:
+            return
+
+        if len(self.brackets) >= self.p.max_brackets:
+            return
+
+        if not self.brackets.accepts(1 if self.confirm_signal[0] > 0 else -1):
+            self.log("已有反方向的括号单，忽略信号")
+            return
+
+        self.log(f"no open position" if not self.has_open_position() else f"open brackets: {len(self.brackets)}");
 
         upper, lower = self.find_breakout_zone()
         if upper is None or lower is None:
@@ -110,29 +174,28 @@ class ConfirmSignalStrategy(bt.Strategy):
                       else self.buy(price=target_price, size=size, exectype=bt.Order.Limit, parent=entry_order, transmit=True)
         self.log(f"设定止盈订单{limit_order.ref}: 价格={target_price:.2f}, 方向={'卖出' if self.confirm_signal[0] > 0 else '买入'}, 金额={size * target_price:.2f}")
         
-        self.orders[entry_order.ref] = (stop_order.ref, limit_order.ref)
-        
+        self.brackets.add(Bracket(entry_order.ref, stop_order.ref, limit_order.ref, 1 if self.confirm_signal[0] > 0 else -1,
+                                  size, entry_price, stop_loss_price, target_price))
+
     
     def notify_order(self, order):
         if order.status in [bt.Order.Completed, bt.Order.Canceled, bt.Order.Margin, bt.Order.Rejected, bt.Order.Expired]:
-            order_type = "入场订单" if order.ref in self.orders else \
-                        "止盈订单" if any(order.ref == v[1] for v in self.orders.values()) else \
-                        "止损订单"
+            bracket, role = self.brackets.lookup(order.ref)
+            order_type = ROLE_NAMES[role] if bracket is not None else "其它订单"
 
             direction = "买入" if order.isbuy() else "卖出"
             self.log(f"订单状态变更 ({order_type}): 价格={order.executed.price:.2f}, 方向={direction}, 数量={order.executed.size}, 状态={order.getstatusname()}")
 
+            self.brackets.finish(order.ref)
+            if bracket is None:
+                return
+
             if order.status == bt.Order.Completed:
-                for entry_ref, (stop_ref, limit_ref) in list(self.orders.items()):
-                    if order.ref == stop_ref:
-                        del self.orders[entry_ref]
-                        break
-                    elif order.ref == limit_ref:
-                        del self.orders[entry_ref]
-                        break
-            
-            elif order.status in [bt.Order.Canceled, bt.Order.Margin, bt.Order.Rejected, bt.Order.Expired]:
-                for entry_ref in list(self.orders.keys()):
-                    if order.ref == entry_ref:
-                        self.log(f"入场订单 {order.ref} 被取消，原因: {order.getstatusname()}")
-                        del self.orders[entry_ref]
+                if role == ENTRY:
+                    bracket.state = OPEN
+                else:  # 止损或止盈成交，这组括号单结束
+                    self.brackets.close(bracket)
+
+            elif role == ENTRY:
+                self.log(f"入场订单 {order.ref} 被取消，原因: {order.getstatusname()}")
+                self.brackets.close(bracket)
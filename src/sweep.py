@@ -0,0 +1,111 @@
+import argparse
+import datetime
+import itertools
+import json
+import os
+import random
+import time
+
+import pandas as pd
+
+from backtest import run_backtest, run_parallel
+from feeds import SharedArena, ensure_columnar
+
+# 默认参数网格：策略参数直接写名字，内部指标参数写 '类名.参数'
+DEFAULT_GRID = {
+    'risk_per_trade': [0.01, 0.02],
+    'lookback_bars': [3, 5],
+    'BuySellSignal.duration_threshold': [50, 100],
+    'BuySellSignal.close_threshold': [0.5],
+    'StdDevRange.period': [30, 50],
+    'LinearRegressionTrend.scale_factor': [0.3],
+}
+
+
+def grid_combinations(grid):
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def random_combinations(grid, n, seed=None):
+    """随机搜索：每个参数独立从候选值中抽取，去重后最多 n 组"""
+    rng = random.Random(seed)
+    total = 1
+    for values in grid.values():
+        total *= len(values)
+    seen = set()
+    while len(seen) < min(n, total):
+        combo = tuple((k, rng.choice(v)) for k, v in grid.items())
+        if combo not in seen:
+            seen.add(combo)
+            yield dict(combo)
+
+
+def _run_job(job):
+    store, fromdate, todate, params = job
+    result = run_backtest(store, fromdate, todate, params)
+    return dict(params, **result)
+
+
+def sweep(store, combinations, fromdate=None, todate=None, workers=None):
+    """
+    多进程并行跑参数组合。数据只以列存储路径（或共享内存描述 SharedColumns）传给子进程，
+    各进程映射同一份数据，不会每个进程各自解析 CSV。按完成顺序输出进度，返回结果 DataFrame。
+    """
+    jobs = [(store, fromdate, todate, params) for params in combinations]
+    rows = []
+    start = time.perf_counter()
+    for i, (_, row) in enumerate(run_parallel(_run_job, jobs, workers), 1):
+        rows.append(row)
+        print(f'[{i}/{len(jobs)}] 期末资金={row["final_value"]:.2f}, 交易={row["trades"]}, '
+              f'最大回撤={row["max_drawdown_pct"]:.2f}%, 耗时={row["seconds"]:.1f}s')
+
+    elapsed = time.perf_counter() - start
+    cpu_seconds = sum(row['seconds'] for row in rows)
+    print(f'共 {len(rows)} 组，墙钟 {elapsed:.1f}s，单任务累计 {cpu_seconds:.1f}s，并行加速 {cpu_seconds / elapsed:.1f}x')
+    return pd.DataFrame(rows).sort_values('final_value', ascending=False)
+
+
+def load_grid(value):
+    if value is None:
+        return DEFAULT_GRID
+    if os.path.exists(value):
+        with open(value, encoding='utf-8') as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ConfirmSignalStrategy 参数扫描')
+    parser.add_argument('symbol', type=str, help='分析的交易对，例如 SOL-USDT')
+    parser.add_argument('--grid', type=str, default=None, help='参数网格 JSON 字符串或文件路径')
+    parser.add_argument('--random', type=int, default=None, help='随机搜索的组数（默认遍历整个网格）')
+    parser.add_argument('--seed', type=int, default=None, help='随机搜索种子')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='进程数')
+    parser.add_argument('--start', type=str, default=None, help='开始日期，例如 2024-06-26')
+    parser.add_argument('--end', type=str, default=None, help='结束日期，例如 2024-07-28')
+    parser.add_argument('--out', type=str, default=None, help='结果 CSV 路径（默认 data/sweep_<symbol>.csv）')
+    parser.add_argument('--shared-memory', action='store_true',
+                        help='先把 K 线拷进共享内存，各进程直接映射同一份（不经过文件页缓存）')
+    args = parser.parse_args()
+
+    data_path = os.path.join('data', f'{args.symbol}_candlesticks.csv')
+    if not os.path.exists(data_path):
+        print(f'错误: {data_path} 文件不存在')
+        exit(1)
+    store = ensure_columnar(data_path)
+
+    grid = load_grid(args.grid)
+    combinations = list(random_combinations(grid, args.random, args.seed) if args.random else grid_combinations(grid))
+    fromdate = datetime.datetime.fromisoformat(args.start) if args.start else None
+    todate = datetime.datetime.fromisoformat(args.end) if args.end else None
+
+    with SharedArena() as arena:
+        if args.shared_memory:
+            store = arena.add(store)
+        results = sweep(store, combinations, fromdate, todate, args.workers)
+    out = args.out or os.path.join('data', f'sweep_{args.symbol}.csv')
+    results.to_csv(out, index=False)
+    print(results.head(10).to_string(index=False))
+    print(f'结果已保存到 {out}')
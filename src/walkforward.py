@@ -0,0 +1,236 @@
+"""
+滚动窗口前向验证（walk-forward）：把历史数据切成连续的 训练 / 测试 窗口，
+每个 fold 在训练窗口上扫描参数、选出最优组合，再在紧接着的测试窗口上检验。
+
+- 第一阶段：全部 fold × 参数组合的训练回测一起并行
+- 第二阶段：各 fold 的测试回测并行。数据从训练窗口起点开始，策略参数 trade_start 设为测试窗口起点，
+  之前只更新指标不下单，测试窗口开始时指标已经是连续计算的状态，不会从头预热（前 period / duration_threshold 根无信号）
+- 测试窗口倒数第二根 K 线（trade_end）撤单并市价平仓，最后一根开盘成交，测试收益只含已平仓的交易
+- 训练回测把耗时指标的 line 和状态存进指标缓存（indicators.line_cache），测试回测的数据是训练数据的延长，
+  直接读入训练窗口结束时的 line 和状态，只计算测试窗口的 K 线
+
+    python3 src/walkforward.py SOL-USDT --train-days 30 --test-days 7 --workers 8
+"""
+import argparse
+import datetime
+import json
+import os
+import time
+import traceback
+
+import pandas as pd
+
+from backtest import run_backtest, run_parallel
+from feeds import SharedArena, SharedColumns, attach, detach, ensure_columnar, load_columns, select_range
+from indicators import line_cache
+from sweep import grid_combinations, load_grid, random_combinations
+
+CACHE_DIR = os.path.join('data', 'indicator_cache')
+
+
+def walk_forward_windows(store, train_days, test_days, step_days=None):
+    """
+    [(训练开始, 训练结束, 测试开始, 测试结束)]：训练 train_days 天，紧接着测试 test_days 天，
+    每个 fold 向后移动 step_days 天（默认等于 test_days，各测试窗口首尾相接）。最后一个不足长度的测试窗口保留
+    """
+    timestamps = load_columns(store)['timestamp']
+    if len(timestamps) == 0:
+        return []
+    epoch = datetime.datetime(1970, 1, 1)
+    first = epoch + datetime.timedelta(milliseconds=int(timestamps[0]))
+    last = epoch + datetime.timedelta(milliseconds=int(timestamps[-1]))
+    train = datetime.timedelta(days=train_days)
+    test = datetime.timedelta(days=test_days)
+    step = datetime.timedelta(days=step_days or test_days)
+    second = datetime.timedelta(seconds=1)  # todate 包含端点，减 1 秒避免相邻窗口共用一根 K 线
+
+    windows = []
+    start = first
+    while start + train <= last:
+        test_start = start + train
+        windows.append((start, test_start - second, test_start, min(test_start + test - second, last)))
+        start += step
+    return windows
+
+
+def _configure_cache(cache_dir):
+    # 子进程（spawn 启动时）不继承主进程的模块状态，每个任务自己设置
+    line_cache.configure(cache_dir)
+
+
+def _run_train(job):
+    """子进程入口：一个 fold 的训练窗口上跑一组参数"""
+    fold, index, store, start, end, params, cache_dir = job
+    _configure_cache(cache_dir)
+    try:
+        return run_backtest(store, start, end, params)
+    except Exception:
+        return {'error': traceback.format_exc(limit=3)}
+
+
+def flatten_time(store, start, end):
+    """[start, end] 内倒数第二根 K 线的时间：在这根 K 线平仓，市价单在最后一根开盘成交。不足两根时为 None"""
+    shared = isinstance(store, SharedColumns)
+    columns = attach(store) if shared else load_columns(store)
+    last = [int(ts) for ts in select_range(columns, start, end)['timestamp'][-2:]]
+    del columns  # 共享内存的视图要在 detach 之前丢掉
+    if shared:
+        detach(store)
+    if len(last) < 2:
+        return None
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(milliseconds=last[0])
+
+
+def _run_test(job):
+    """子进程入口：从训练窗口起点开始回测，测试窗口起点之前只更新指标，结束前平掉全部仓位"""
+    fold, store, train_start, test_start, test_end, params, cache_dir = job
+    _configure_cache(cache_dir)
+    try:
+        trade_end = flatten_time(store, test_start, test_end)
+        return run_backtest(store, train_start, test_end, dict(params, trade_start=test_start, trade_end=trade_end))
+    except Exception:
+        return {'error': traceback.format_exc(limit=3)}
+
+
+def _annualize(return_pct, days):
+    if days <= 0 or return_pct <= -100:
+        return None
+    return ((1 + return_pct / 100) ** (365 / days) - 1) * 100
+
+
+def walk_forward(store, windows, combinations, metric='final_value', workers=None, cache_dir=None):
+    """
+    并行跑全部 fold，返回每个 fold 一行的报告和汇总。
+    metric 为 run_backtest 结果中用于选参数的字段（越大越好），并列时取 combinations 中靠前的一组
+    """
+    start = time.perf_counter()
+
+    # 第一阶段：全部 fold × 参数组合的训练回测
+    jobs = [(fold, index, store, train_start, train_end, params, cache_dir)
+            for fold, (train_start, train_end, _, _) in enumerate(windows)
+            for index, params in enumerate(combinations)]
+    train_results = {}
+    for i, (job, result) in enumerate(run_parallel(_run_train, jobs, workers), 1):
+        fold, index = job[0], job[1]
+        train_results[fold, index] = result
+        if 'error' in result:
+            print(f'[训练 {i}/{len(jobs)}] fold {fold} 组合 {index} 失败: {result["error"].strip().splitlines()[-1]}', flush=True)
+        elif i % max(1, len(jobs) // 20) == 0 or i == len(jobs):
+            print(f'[训练 {i}/{len(jobs)}] 已完成', flush=True)
+    train_seconds = time.perf_counter() - start
+
+    rows = []
+    for fold, (train_start, train_end, test_start, test_end) in enumerate(windows):
+        row = {
+            'fold': fold,
+            'train_start': train_start.isoformat(),
+            'train_end': train_end.isoformat(),
+            'test_start': test_start.isoformat(),
+            'test_end': test_end.isoformat(),
+        }
+        ok = [(index, train_results[fold, index]) for index in range(len(combinations))
+              if 'error' not in train_results[fold, index]]
+        if not ok:
+            row['error'] = '训练窗口上全部参数组合都失败'
+        else:
+            index, best = max(ok, key=lambda item: (item[1][metric], -item[0]))
+            row['params'] = combinations[index]
+            row.update({f'train_{key}': best[key]
+                        for key in ('final_value', 'return_pct', 'trades', 'max_drawdown_pct')})
+        rows.append(row)
+
+    # 第二阶段：各 fold 用选出的参数跑测试窗口
+    jobs = [(row['fold'], store, windows[row['fold']][0], windows[row['fold']][2], windows[row['fold']][3],
+             row['params'], cache_dir)
+            for row in rows if 'error' not in row]
+    for job, result in run_parallel(_run_test, jobs, workers):
+        row = rows[job[0]]
+        if 'error' in result:
+            row['error'] = result['error']
+            print(f'[测试] fold {row["fold"]} 失败: {result["error"].strip().splitlines()[-1]}', flush=True)
+            continue
+        # trade_start 之前空仓、资金不变，trade_end 平仓，收益和回撤都只来自测试窗口内已平仓的交易
+        days = (windows[job[0]][3] - windows[job[0]][2]).total_seconds() / 86400
+        row.update({
+            'test_final_value': result['final_value'],
+            'test_return_pct': result['return_pct'],
+            'test_annual_return_pct': _annualize(result['return_pct'], days),
+            'test_trades': result['trades'],
+            'test_won': result['won'],
+            'test_lost': result['lost'],
+            'test_max_drawdown_pct': result['max_drawdown_pct'],
+            'test_open_size': result['open_size'],
+            'test_seconds': result['seconds'],
+        })
+        print(f'[测试] fold {row["fold"]} {row["test_start"]} ~ {row["test_end"]} 收益={row["test_return_pct"]:.2f}%, '
+              f'交易={row["test_trades"]}, 最大回撤={row["test_max_drawdown_pct"]:.2f}%, '
+              f'耗时={row["test_seconds"]:.2f}s, 参数={row["params"]}', flush=True)
+
+    tested = [row for row in rows if 'test_return_pct' in row]
+    compounded = 1.0
+    for row in tested:
+        compounded *= 1 + row['test_return_pct'] / 100
+    summary = {
+        'folds': len(rows),
+        'failed': len(rows) - len(tested),
+        'combinations': len(combinations),
+        'metric': metric,
+        'wall_seconds': time.perf_counter() - start,
+        'train_wall_seconds': train_seconds,
+        'test_job_seconds': sum(row['test_seconds'] for row in tested),
+        'compounded_test_return_pct': (compounded - 1) * 100 if tested else None,
+        'mean_test_return_pct': sum(row['test_return_pct'] for row in tested) / len(tested) if tested else None,
+        'profitable_folds': sum(row['test_return_pct'] > 0 for row in tested),
+        'test_trades': sum(row['test_trades'] for row in tested),
+    }
+    return rows, summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ConfirmSignalStrategy 滚动窗口前向验证（训练窗口选参数，测试窗口检验）')
+    parser.add_argument('symbol', type=str, help='分析的交易对，例如 SOL-USDT')
+    parser.add_argument('--train-days', type=float, default=30, help='训练窗口长度（天）')
+    parser.add_argument('--test-days', type=float, default=7, help='测试窗口长度（天）')
+    parser.add_argument('--step-days', type=float, default=None, help='fold 之间的步长（天），默认等于测试窗口长度')
+    parser.add_argument('--grid', type=str, default=None, help='参数网格 JSON 字符串或文件路径（默认同 sweep.py）')
+    parser.add_argument('--random', type=int, default=None, help='随机搜索的组数（默认遍历整个网格）')
+    parser.add_argument('--seed', type=int, default=None, help='随机搜索种子')
+    parser.add_argument('--metric', type=str, default='final_value', help='选参数的指标（run_backtest 结果字段，越大越好）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='进程数')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'不使用指标缓存（{CACHE_DIR}），测试窗口从训练窗口起点重新计算指标')
+    parser.add_argument('--shared-memory', action='store_true',
+                        help='先把 K 线拷进共享内存，各进程直接映射同一份（不经过文件页缓存）')
+    parser.add_argument('--out', type=str, default=None,
+                        help='报告路径前缀，生成 <out>.json 和 <out>.csv（默认 data/walkforward_<symbol>）')
+    args = parser.parse_args()
+
+    data_path = os.path.join('data', f'{args.symbol}_candlesticks.csv')
+    if not os.path.exists(data_path):
+        print(f'错误: {data_path} 文件不存在')
+        exit(1)
+    store = ensure_columnar(data_path)
+
+    windows = walk_forward_windows(store, args.train_days, args.test_days, args.step_days)
+    if not windows:
+        print(f'错误: 数据不足 {args.train_days} 天，无法切出训练窗口')
+        exit(1)
+    grid = load_grid(args.grid)
+    combinations = list(random_combinations(grid, args.random, args.seed) if args.random else grid_combinations(grid))
+    cache_dir = None if args.no_cache else CACHE_DIR
+
+    print(f'{len(windows)} 个 fold，每个 {len(combinations)} 组参数，{args.workers} 个进程')
+    with SharedArena() as arena:
+        if args.shared_memory:
+            store = arena.add(store)
+        rows, summary = walk_forward(store, windows, combinations, args.metric, args.workers, cache_dir)
+    print(f'完成 {summary["folds"]} 个 fold（失败 {summary["failed"]}），墙钟 {summary["wall_seconds"]:.1f}s，'
+          f'测试窗口累计收益 {summary["compounded_test_return_pct"] or 0:.2f}%，'
+          f'盈利 {summary["profitable_folds"]} 个 fold，共 {summary["test_trades"]} 笔交易')
+
+    out = args.out or os.path.join('data', f'walkforward_{args.symbol}')
+    with open(f'{out}.json', 'w', encoding='utf-8') as f:
+        json.dump({'summary': summary, 'grid': grid, 'folds': rows}, f, ensure_ascii=False, indent=2)
+    pd.DataFrame([dict(row, params=json.dumps(row.get('params'), ensure_ascii=False)) for row in rows]) \
+        .to_csv(f'{out}.csv', index=False)
+    print(f'报告已保存到 {out}.json / {out}.csv')
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from feeds import convert_csv  # noqa: E402
+
+# 仓库自带的 SOL-USDT 5 分钟 K 线
+DATA_DIR = os.path.join(ROOT, 'data')
+BUNDLED = ('1', '2', 'good')  # SOL-USDT_candlesticks <name>.csv
+
+
+@pytest.fixture(scope='session', params=BUNDLED)
+def sol_store(request, tmp_path_factory):
+    """data/ 下每个自带 CSV 转成的列存储（写在临时目录，不动 data/columnar）"""
+    return convert_csv(os.path.join(DATA_DIR, f'SOL-USDT_candlesticks {request.param}.csv'), str(tmp_path_factory.mktemp('columnar')))
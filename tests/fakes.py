@@ -0,0 +1,33 @@
+"""测试用的假 OKX MarketAPI"""
+
+BAR_MS = 300_000
+T0 = 1_700_000_000_000
+
+
+def bar_timestamps(n, start=T0, bar_ms=BAR_MS):
+    return [start + i * bar_ms for i in range(n)]
+
+
+def candle(ts, confirm="1", close="1.5"):
+    return [str(ts), "1", "2", "0.5", close, "10", "10", "10", confirm]
+
+
+class FakeMarketAPI(object):
+    """
+    按 get_history_candlesticks 的语义返回 timestamps 中的 K 线：after（不含）之前最多 limit 条，新到旧，
+    最新一根 confirm=0（还未收盘）。fail_calls 中的调用序号（从 1 开始）抛出 ConnectionError。
+    """
+
+    def __init__(self, timestamps, fail_calls=()):
+        self.timestamps = sorted(timestamps)
+        self.fail_calls = set(fail_calls)
+        self.calls = []  # 每次请求的 after（None 表示从最新开始）
+
+    def get_history_candlesticks(self, instId, limit="100", bar="5m", after=None, before=None):
+        self.calls.append(None if after is None else int(after))
+        if len(self.calls) in self.fail_calls:
+            raise ConnectionError("连接中断")
+        newer_first = [ts for ts in reversed(self.timestamps) if after is None or ts < int(after)]
+        latest = self.timestamps[-1]
+        return {"code": "0", "msg": "", "data": [candle(ts, "0" if ts == latest else "1")
+                                                 for ts in newer_first[:int(limit)]]}
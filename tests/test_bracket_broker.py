@@ -0,0 +1,35 @@
+"""BracketBroker 与 BackBroker 逐笔核对：ConfirmSignalStrategy 的每笔交易、每根 K 线的现金 / 账户价值和期末资金逐位相同"""
+import backtrader as bt
+import pytest
+
+from benchmarks.broker import compare, run
+from benchmarks.synthetic import synthetic_store
+from brokers import BracketBroker
+
+
+@pytest.fixture(scope='module')
+def synthetic(tmp_path_factory):
+    return synthetic_store(30000, seed=0, out_dir=str(tmp_path_factory.mktemp('columnar')))
+
+
+def check_same_fills(store, max_brackets):
+    """两个 broker 各跑一次并逐项核对，返回成交列表"""
+    params = dict(max_brackets=max_brackets)
+    trades_a, values_a, final_a, _, _ = run(store, bt.brokers.BackBroker, params)
+    trades_b, values_b, final_b, _, _ = run(store, BracketBroker, params)
+
+    assert compare('交易', trades_a, trades_b) == 0
+    assert compare('账户价值', values_a, values_b) == 0
+    assert final_a == final_b
+    return trades_a
+
+
+@pytest.mark.parametrize('max_brackets', [1, 3])
+def test_synthetic_matches_back_broker(synthetic, max_brackets):
+    trades = check_same_fills(synthetic, max_brackets)
+    assert trades  # 合成数据上确实有成交
+
+
+@pytest.mark.parametrize('max_brackets', [1, 3])
+def test_bundled_matches_back_broker(sol_store, max_brackets):
+    check_same_fills(sol_store, max_brackets)
@@ -0,0 +1,61 @@
+"""BracketBook 只允许同方向加仓；ConfirmSignalStrategy 在 max_brackets > 1 时不会同时持有反方向的括号单"""
+import backtrader as bt
+import pytest
+
+from benchmarks.synthetic import synthetic_store
+from feeds import ColumnarData
+from strategies import ConfirmSignalStrategy
+from strategies.brackets import CLOSED, Bracket, BracketBook
+
+
+def bracket(ref, direction):
+    return Bracket(ref, ref + 1, ref + 2, direction, 1.0, 100.0, 99.0 if direction > 0 else 101.0, 105.0)
+
+
+def test_book_accepts_same_direction_only():
+    book = BracketBook()
+    assert book.accepts(1) and book.accepts(-1)
+
+    first, second = bracket(1, 1), bracket(4, 1)
+    book.add(first)
+    assert book.accepts(1)
+    assert not book.accepts(-1)
+    book.add(second)
+    assert len(book) == 2
+
+    book.close(first)
+    assert not book.accepts(-1)  # 还有一组多单
+    book.close(second)
+    assert book.accepts(-1)  # 全部平仓后可以反向开仓
+
+    book.add(bracket(7, -1))
+    assert book.accepts(-1) and not book.accepts(1)
+
+
+class DirectionLog(ConfirmSignalStrategy):
+    """每根 K 线结束时记录未平仓括号单的方向"""
+
+    def __init__(self):
+        super(DirectionLog, self).__init__()
+        self.open_directions = []
+
+    def next(self):
+        super(DirectionLog, self).next()
+        brackets = {bracket for bracket, _ in self.brackets.by_ref.values() if bracket.state != CLOSED}
+        self.open_directions.append(sorted(bracket.direction for bracket in brackets))
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    return synthetic_store(30000, seed=0, out_dir=str(tmp_path_factory.mktemp('columnar')))
+
+
+def test_strategy_pyramids_in_one_direction(store):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcommission(commission=0.0008, commtype=bt.CommInfoBase.COMM_PERC)
+    cerebro.adddata(ColumnarData(dataname=store))
+    cerebro.addstrategy(DirectionLog, max_brackets=3, printlog=False)
+    strategy = cerebro.run()[0]
+
+    assert any(len(directions) > 1 for directions in strategy.open_directions)  # 确实有加仓
+    assert all(len(set(directions)) <= 1 for directions in strategy.open_directions)
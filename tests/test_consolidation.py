@@ -0,0 +1,76 @@
+"""
+ConsolidationIndicator（两个版本）的 consol_upper / consol_lower 与改为运行极值之前、
+用列表记录震荡区间全部高低点的实现逐根比较（data/ 下每个自带文件）
+"""
+import backtrader as bt
+import numpy as np
+import pytest
+
+from feeds import ColumnarData
+from indicators import std_dev_histogram_range, std_dev_range
+
+
+def list_based(base):
+    """base（某个版本的 ConsolidationIndicator）换成原来的列表实现，子指标不变"""
+
+    class ListConsolidationIndicator(base):
+        def __init__(self):
+            super(ListConsolidationIndicator, self).__init__()
+            self.consolidating_highs = []
+            self.consolidating_lows = []
+
+        def next(self):
+            is_consolidating = self.stddev_range.lines[0][0] and not self.linear_regression_trend.strong_trend[0]
+            if is_consolidating:
+                if not np.isnan(self.prev_upper) and not np.isnan(self.prev_lower) and \
+                   self.prev_lower <= self.data.close[0] <= self.prev_upper:
+                    self.consolidating_highs.append(self.prev_upper)
+                    self.consolidating_lows.append(self.prev_lower)
+
+                self.consolidating_highs.append(self.data.high[0])
+                self.consolidating_lows.append(self.data.low[0])
+
+                self.prev_upper = max(self.consolidating_highs)
+                self.prev_lower = min(self.consolidating_lows)
+
+            else:
+                self.consolidating_highs.clear()
+                self.consolidating_lows.clear()
+
+            if self.consolidating_highs and self.consolidating_lows:
+                self.lines.consol_upper[0] = max(self.consolidating_highs)
+                self.lines.consol_lower[0] = min(self.consolidating_lows)
+            elif not np.isnan(self.prev_upper) and not np.isnan(self.prev_lower) \
+                    and self.data.high[0] <= self.prev_upper and self.data.low[0] >= self.prev_lower:
+                self.lines.consol_upper[0] = self.prev_upper
+                self.lines.consol_lower[0] = self.prev_lower
+            else:
+                self.lines.consol_upper[0] = float('nan')
+                self.lines.consol_lower[0] = float('nan')
+
+    return ListConsolidationIndicator
+
+
+class BothVersions(bt.Strategy):
+    params = (('module', None),)
+
+    def __init__(self):
+        indicator = self.p.module.ConsolidationIndicator
+        self.current = indicator(self.data)
+        self.reference = list_based(indicator)(self.data)
+
+
+@pytest.mark.parametrize('runonce', [True, False])
+@pytest.mark.parametrize('module', [std_dev_range, std_dev_histogram_range], ids=['std_dev', 'histogram'])
+def test_matches_list_based(sol_store, module, runonce):
+    cerebro = bt.Cerebro(stdstats=False, runonce=runonce)
+    cerebro.adddata(ColumnarData(dataname=sol_store))
+    cerebro.addstrategy(BothVersions, module=module)
+    strategy = cerebro.run()[0]
+
+    for name in ('consol_upper', 'consol_lower'):
+        current = np.array(getattr(strategy.current.lines, name).array)
+        reference = np.array(getattr(strategy.reference.lines, name).array)
+        assert len(current) == len(strategy.data)
+        assert not np.isnan(current).all()
+        np.testing.assert_array_equal(current, reference, err_msg=name)
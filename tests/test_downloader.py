@@ -0,0 +1,111 @@
+"""fetcher.downloader：令牌桶限速、请求重试退避、多任务下载的断点续传（假时钟，不真的等待）"""
+import threading
+
+import pytest
+
+import fetcher.downloader as downloader
+import fetcher.sync as sync
+from fakes import FakeMarketAPI, bar_timestamps
+from fetcher import RateLimitedAPI, TokenBucket, csv_path, download, read_timestamps, request_page
+from fetcher.sync import load_checkpoint
+
+
+class FakeClock(object):
+    """monotonic() 返回假时间，sleep() 只把假时间往后拨"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self.lock = threading.Lock()
+
+    def monotonic(self):
+        with self.lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.sleeps.append(seconds)
+            self.now += max(seconds, 0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(downloader, 'time', clock)
+    monkeypatch.setattr(sync, 'time', clock)
+    return clock
+
+
+class RecordingAPI(object):
+    def __init__(self, clock):
+        self.clock = clock
+        self.times = []
+
+    def get_history_candlesticks(self, **params):
+        self.times.append(self.clock.monotonic())
+        return {'code': '0', 'msg': '', 'data': []}
+
+
+def test_token_bucket_limits_rate(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+    api = RateLimitedAPI(RecordingAPI(clock), bucket)
+    for _ in range(35):
+        api.get_history_candlesticks(instId='SOL-USDT')
+
+    times = api.api.times
+    assert times[:5] == [0.0] * 5  # 桶里先有 capacity 个令牌
+    for k, t in enumerate(times):
+        assert t >= (k + 1 - 5) / 10 - 1e-9  # 之后每秒最多 rate 次
+    assert times[-1] == pytest.approx(3.0)
+
+
+def test_token_bucket_refill_is_capped(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+    clock.sleep(100)  # 空闲很久也只攒 capacity 个
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.sleeps == [100]
+    bucket.acquire()
+    assert clock.sleeps[1:] == [pytest.approx(0.1)]
+
+
+def test_request_page_backoff(clock, monkeypatch):
+    monkeypatch.setattr(sync.random, 'uniform', lambda a, b: 1.0)
+    api = FakeMarketAPI(bar_timestamps(10), fail_calls={1, 2})
+    data = request_page(api, {'instId': 'SOL-USDT', 'limit': '100', 'bar': '5m'}, sleep_time=0.5, max_retries=3)
+    assert len(data) == 10
+    assert clock.sleeps == [0.5, 1.0]  # 指数退避
+
+    api = FakeMarketAPI(bar_timestamps(10), fail_calls={1, 2, 3})
+    with pytest.raises(RuntimeError):
+        request_page(api, {'instId': 'SOL-USDT', 'limit': '100', 'bar': '5m'}, sleep_time=0.5, max_retries=3)
+
+
+def test_download_resumes_failed_job(clock, tmp_path):
+    timestamps = bar_timestamps(450)
+    apis = []
+
+    def factory(fail_calls=()):
+        def make():
+            api = FakeMarketAPI(timestamps, fail_calls)
+            apis.append(api)
+            return api
+        return make
+
+    data_dir = str(tmp_path)
+    # 每个任务第 3 次请求起一直失败：已写入的两页和检查点保留
+    jobs = download(factory(fail_calls=range(3, 100)), ['SOL-USDT', 'BTC-USDT'], ['5m'], data_dir=data_dir,
+                    total_limit=1000, workers=2, rate=1000, max_retries=2, backoff=0.1)
+    assert all(job.error is not None for job in jobs)
+    for instId in ('SOL-USDT', 'BTC-USDT'):
+        filename = csv_path(instId, '5m', data_dir)
+        assert len(read_timestamps(filename)) == 199
+        assert load_checkpoint(filename)['tasks'][0]['after'] == timestamps[250]
+
+    apis.clear()
+    jobs = download(factory(), ['SOL-USDT', 'BTC-USDT'], ['5m'], data_dir=data_dir,
+                    total_limit=1000, workers=2, rate=1000, max_retries=2, backoff=0.1)
+    assert all(job.error is None for job in jobs)
+    assert all(api.calls[0] == timestamps[250] for api in apis)  # 从断点继续
+    for instId in ('SOL-USDT', 'BTC-USDT'):
+        assert list(read_timestamps(csv_path(instId, '5m', data_dir))) == timestamps[:-1]
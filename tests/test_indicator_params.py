@@ -0,0 +1,36 @@
+"""ConfirmSignalStrategy 的 indicator_params：拼错的类名在策略开始时报错，嵌套子指标的类名正常生效"""
+import backtrader as bt
+import pytest
+
+from backtest import split_params
+from benchmarks.synthetic import synthetic_store
+from feeds import ColumnarData
+from strategies import ConfirmSignalStrategy
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    return synthetic_store(500, seed=0, out_dir=str(tmp_path_factory.mktemp('columnar')))
+
+
+def run(store, params):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(ColumnarData(dataname=store))
+    cerebro.addstrategy(ConfirmSignalStrategy, printlog=False, **split_params(params))
+    return cerebro.run()[0]
+
+
+def test_unknown_class_name_raises(store):
+    with pytest.raises(ValueError, match='BuySellSignl'):
+        run(store, {'BuySellSignl.duration_threshold': 50})
+
+
+def test_histogram_only_class_rejected_without_histogram(store):
+    with pytest.raises(ValueError, match='StdDevHistogramRange'):
+        run(store, {'StdDevHistogramRange.bins': 5})
+
+
+def test_nested_class_names_accepted(store):
+    strategy = run(store, {'BuySellSignal.duration_threshold': 50, 'StdDevRange.period': 30,
+                           'LinearRegressionSlopePct.period': 20})
+    assert strategy.buy_sell_signal.p.duration_threshold == 50
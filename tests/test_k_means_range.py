@@ -0,0 +1,18 @@
+"""lloyd_kmeans 返回的 SSE 与返回的中心对应"""
+import numpy as np
+import pytest
+
+from indicators.k_means_range import _initial_centers, lloyd_kmeans
+
+
+def sse_of(points, centers):
+    return ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).min(axis=1).sum()
+
+
+@pytest.mark.parametrize('max_iter', [1, 2, 100])
+def test_sse_matches_returned_centers(max_iter):
+    rng = np.random.default_rng(0)
+    points = np.concatenate([rng.normal(loc, 1.0, size=(40, 4)) for loc in (0.0, 3.0, 7.0)])
+    for k in (2, 3, 5):
+        centers, sse = lloyd_kmeans(points, _initial_centers(points, k), max_iter=max_iter)
+        assert sse == pytest.approx(sse_of(points, centers), rel=1e-12)
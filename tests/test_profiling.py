@@ -0,0 +1,39 @@
+"""Profiler 在 runonce 模式下给带磁盘缓存（indicators.line_cache）的指标计时"""
+import backtrader as bt
+import pytest
+
+from benchmarks.synthetic import synthetic_store
+from feeds import ColumnarData
+from indicators import KMeansRange, line_cache
+from profiling import Profiler
+from strategies import ConfirmSignalStrategy
+
+CACHED = ('ConsolidationIndicator', 'ConsolidationDuration', 'BuySellSignal', 'Pivots', 'LinearRegressionTrend',
+          'StdDevHistogramRange', 'KMeansRange')
+
+
+class WithKMeans(ConfirmSignalStrategy):
+    def __init__(self):
+        super(WithKMeans, self).__init__()
+        self.k_means_range = KMeansRange(self.data, fast=True)
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    return synthetic_store(2000, seed=0, out_dir=str(tmp_path_factory.mktemp('columnar')))
+
+
+@pytest.mark.parametrize('cache', [False, True], ids=['no-cache', 'cache-miss'])
+def test_runonce_times_cached_indicators(store, cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(line_cache, 'CACHE_DIR', str(tmp_path) if cache else None)
+    cerebro = bt.Cerebro(stdstats=False, runonce=True)
+    cerebro.adddata(ColumnarData(dataname=store))
+    cerebro.addstrategy(WithKMeans, histogram=True, printlog=False)
+    with Profiler() as profiler:
+        cerebro.run()
+
+    rows = {row['class']: row for row in profiler.report()}
+    for name in CACHED:
+        assert name in rows, name
+        assert rows[name]['calls'] > 0, name
+        assert rows[name]['self_s'] > 0, name
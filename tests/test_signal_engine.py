@@ -0,0 +1,36 @@
+"""signals.compute_signals 与 backtrader 的 std_dev_range.BuySellSignal 逐根一致（data/ 下每个自带文件）"""
+import backtrader as bt
+import numpy as np
+
+from feeds import ColumnarData, load_columns
+from indicators.std_dev_range import BuySellSignal
+from signals import compute_signals
+
+
+class SignalOnly(bt.Strategy):
+    def __init__(self):
+        self.signal = BuySellSignal(self.data)
+
+
+def test_matches_buy_sell_signal(sol_store):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(ColumnarData(dataname=sol_store))
+    cerebro.addstrategy(SignalOnly)
+    signal = cerebro.run()[0].signal
+
+    columns = load_columns(sol_store)
+    result = compute_signals(columns['open'], columns['high'], columns['low'], columns['close'])
+
+    consolidation = signal.consolidation_indicator
+    expected = {
+        'suspect_signal': signal.suspect_signal,
+        'confirm_signal': signal.confirm_signal,
+        'consol_upper': consolidation.consol_upper,
+        'consol_lower': consolidation.consol_lower,
+        'duration': signal.consolidation_duration.duration,
+    }
+    for name, line in expected.items():
+        values = np.array(line.array)
+        assert len(values) == len(result[name]), name
+        np.testing.assert_array_equal(values, result[name], err_msg=name)
+    assert np.count_nonzero(np.nan_to_num(result['confirm_signal'])) > 0  # 确实有信号
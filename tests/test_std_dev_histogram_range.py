@@ -0,0 +1,121 @@
+"""
+StdDevHistogramRange / SlidingHistogram 与原来每根 K 线调用 np.mean / np.std / np.histogram 的实现逐根比较，
+数据包含完全平坦和只差一个最小价位的窗口（np.std 在这些窗口上是 0 还是 1e-14 量级决定 is_range）
+"""
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from feeds import ColumnarData, write_columns
+from indicators.std_dev_histogram_range import SlidingHistogram, StdDevHistogramRange
+
+
+def flat_closes(bars=3001, seed=0, price=100.01, tick=0.01):
+    """两位小数的收盘价：平坦段、偶尔跳一个价位的近乎平坦段和随机游走段交替"""
+    rng = np.random.default_rng(seed)
+    closes = []
+    while len(closes) < bars:
+        kind = rng.integers(3)
+        length = int(rng.integers(30, 150))
+        if kind == 0:
+            segment = np.full(length, price)
+        elif kind == 1:
+            segment = np.full(length, price)
+            jumps = rng.integers(length, size=rng.integers(1, 4))
+            segment[jumps] += tick * rng.choice([-1, 1], size=len(jumps))
+        else:
+            segment = price + tick * np.cumsum(rng.integers(-2, 3, size=length))
+        closes.extend(np.round(segment, 2))
+        price = closes[-1]
+    return np.array(closes[:bars])
+
+
+def numpy_is_range(closes, bins=10, density_threshold=0.5, dynamic_factor=2):
+    """原实现的判断"""
+    avg_price_last_n = np.mean(closes)
+    std_price_last_n = np.std(closes)
+    dynamic_std_threshold = dynamic_factor * std_price_last_n / avg_price_last_n
+    std_price = std_price_last_n / avg_price_last_n
+    hist, bin_edges = np.histogram(closes, bins=bins, density=True)
+    max_density = max(hist) if len(hist) > 0 else 0
+    return 1 if (std_price < dynamic_std_threshold and max_density > density_threshold) else 0
+
+
+@pytest.mark.parametrize('period, bins', [(50, 10), (20, 5)])
+def test_sliding_histogram_matches_numpy(period, bins):
+    closes = flat_closes()
+    histogram = SlidingHistogram(period, bins)
+    histogram.reset(closes[:period])
+    flat = 0
+    for end in range(period, len(closes) + 1):
+        if end > period:
+            histogram.push(closes[end - 1])
+        window = closes[end - period:end]
+        mean, std = histogram.mean_std()
+        flat += np.ptp(window) == 0
+
+        assert (std > 0) == (np.std(window) > 0), end
+        assert histogram.max_density() == max(np.histogram(window, bins=bins, density=True)[0]), end
+        dynamic_std_threshold = 2 * std / mean
+        is_range = 1 if (std / mean < dynamic_std_threshold and histogram.max_density() > 0.5) else 0
+        assert is_range == numpy_is_range(window, bins), end
+    assert flat > 0
+
+
+class NumpyStdDevHistogramRange(bt.Indicator):
+    """改为增量统计之前的实现"""
+    lines = ('is_range', 'range_count')
+    params = (('period', 50), ('density_threshold', 0.5), ('bins', 10), ('dynamic_factor', 2))
+
+    def __init__(self):
+        self.addminperiod(self.p.period)
+        self.range_counter = 0
+
+    def next(self):
+        closes = np.array(self.data.close.get(size=self.p.period))
+        is_range = numpy_is_range(closes, self.p.bins, self.p.density_threshold, self.p.dynamic_factor)
+        self.lines.is_range[0] = is_range
+        if is_range:
+            self.range_counter += 1
+        else:
+            self.range_counter = 0
+        self.lines.range_count[0] = self.range_counter
+
+
+class BothVersions(bt.Strategy):
+    def __init__(self):
+        self.current = StdDevHistogramRange(self.data)
+        self.reference = NumpyStdDevHistogramRange(self.data)
+
+
+@pytest.fixture(scope='module')
+def flat_store(tmp_path_factory):
+    closes = flat_closes()
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    df = pd.DataFrame({
+        'timestamp': 1_700_000_000_000 + np.arange(len(closes), dtype=np.int64) * 300_000,
+        'open': opens,
+        'high': np.maximum(opens, closes),
+        'low': np.minimum(opens, closes),
+        'close': closes,
+        'vol': 1.0,
+        'volCcy': 1.0,
+        'volCcyQuote': closes,
+        'confirm': 1,
+    })
+    return write_columns(df, str(tmp_path_factory.mktemp('columnar') / 'flat'))
+
+
+@pytest.mark.parametrize('runonce', [True, False])
+def test_matches_numpy(flat_store, runonce):
+    cerebro = bt.Cerebro(stdstats=False, runonce=runonce)
+    cerebro.adddata(ColumnarData(dataname=flat_store))
+    cerebro.addstrategy(BothVersions)
+    strategy = cerebro.run()[0]
+
+    for name in ('is_range', 'range_count'):
+        current = np.array(getattr(strategy.current.lines, name).array)
+        reference = np.array(getattr(strategy.reference.lines, name).array)
+        assert len(current) == len(strategy.data)
+        np.testing.assert_array_equal(current, reference, err_msg=name)
@@ -0,0 +1,104 @@
+"""fetcher.sync：增量同步、断点续传、未确认 K 线、交易所本身的数据缺口，以及追加乱序后的读取"""
+import csv
+
+import pytest
+
+from benchmarks.common import load_feed
+from fakes import BAR_MS, FakeMarketAPI, bar_timestamps, candle
+from fetcher import HEADER, read_timestamps, sync_candlesticks
+from fetcher.sync import load_checkpoint
+
+
+def read_rows(filename):
+    with open(filename, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+def write_rows(filename, rows):
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def sync(api, filename, **kwargs):
+    kwargs.setdefault("total_limit", 1000)
+    return sync_candlesticks(api, "SOL-USDT", str(filename), sleep_time=0, backoff=0, **kwargs)
+
+
+def test_full_sync_skips_forming_bar(tmp_path):
+    filename = tmp_path / "SOL-USDT_candlesticks.csv"
+    timestamps = bar_timestamps(250)
+    assert sync(FakeMarketAPI(timestamps), filename) == 249
+
+    rows = read_rows(filename)
+    assert sorted(int(row[0]) for row in rows) == timestamps[:-1]
+    assert all(row[8] == "1" for row in rows)
+
+
+def test_incremental_sync_fetches_only_new_bars(tmp_path):
+    filename = tmp_path / "SOL-USDT_candlesticks.csv"
+    timestamps = bar_timestamps(400)
+    sync(FakeMarketAPI(timestamps[:300]), filename)
+
+    api = FakeMarketAPI(timestamps)
+    assert sync(api, filename, total_limit=299) == 100
+    assert api.calls == [None, timestamps[300]]  # 只翻到已存的最新一根为止
+    assert list(read_timestamps(str(filename))) == timestamps[:-1]
+
+
+def test_resume_after_interruption(tmp_path):
+    filename = tmp_path / "SOL-USDT_candlesticks.csv"
+    timestamps = bar_timestamps(450)
+    with pytest.raises(RuntimeError):
+        sync(FakeMarketAPI(timestamps, fail_calls={3}), filename, max_retries=1)
+    assert len(read_rows(filename)) == 199  # 第一页不含未收盘的最新一根
+    assert load_checkpoint(str(filename))["tasks"][0]["after"] == timestamps[250]
+
+    api = FakeMarketAPI(timestamps)
+    sync(api, filename)
+    assert api.calls[0] == timestamps[250]  # 从断点继续，不从头下载
+    assert sorted(int(row[0]) for row in read_rows(filename)) == timestamps[:-1]
+
+
+def test_unconfirmed_bar_from_old_csv_is_refetched(tmp_path):
+    filename = tmp_path / "SOL-USDT_candlesticks.csv"
+    timestamps = bar_timestamps(150)
+    # 旧版 save_to_csv 写入的文件：最后一根是当时还未收盘的 K 线
+    write_rows(filename, [candle(ts) for ts in timestamps[:99]] + [candle(timestamps[99], "0", close="9.9")])
+
+    sync(FakeMarketAPI(timestamps), filename, total_limit=100)
+    rows = read_rows(filename)
+    assert sorted(int(row[0]) for row in rows) == timestamps[:-1]
+    refetched = [row for row in rows if int(row[0]) == timestamps[99]]
+    assert refetched == [candle(timestamps[99])]
+
+
+def test_exchange_gap_requested_once(tmp_path):
+    filename = tmp_path / "SOL-USDT_candlesticks.csv"
+    timestamps = bar_timestamps(300)
+    available = timestamps[:100] + timestamps[120:]  # 交易所本身缺 20 根
+    write_rows(filename, [candle(ts) for ts in available[:-1]])
+
+    api = FakeMarketAPI(available)
+    assert sync(api, filename, total_limit=100) == 0
+    assert timestamps[120] in api.calls
+    assert load_checkpoint(str(filename))["empty_gaps"] == [[timestamps[99], timestamps[120]]]
+
+    api = FakeMarketAPI(available + [timestamps[-1] + BAR_MS])
+    assert sync(api, filename, total_limit=100) == 1
+    assert api.calls == [None]  # 只同步新 K 线，缺口不再请求
+
+
+def test_backfilled_file_loads_in_order(tmp_path):
+    filename = tmp_path / "SOL-USDT_candlesticks.csv"
+    timestamps = bar_timestamps(400)
+    sync(FakeMarketAPI(timestamps[200:]), filename)
+    sync(FakeMarketAPI(timestamps), filename, total_limit=1000)  # 回补的旧数据追加在文件末尾
+    rows = read_rows(filename)
+    rows.append(rows[0])  # 重复的一行
+    write_rows(filename, rows)
+    assert [int(row[0]) for row in rows] != sorted(int(row[0]) for row in rows)
+
+    df = load_feed(str(filename), bars=250).p.dataname
+    assert list(df.index.astype("int64") // 1_000_000) == timestamps[:250]
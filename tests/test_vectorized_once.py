@@ -0,0 +1,38 @@
+"""BodyRatio / BarStrength / NormalizedATR 的向量化 once 与逐根 next 结果一致"""
+import backtrader as bt
+import numpy as np
+import pytest
+
+from feeds import ColumnarData
+from indicators import BarStrength, BodyRatio, NormalizedATR
+
+
+class SingleIndicator(bt.Strategy):
+    params = (('indicator', None), ('kwargs', None))
+
+    def __init__(self):
+        self.indicator = self.p.indicator(self.data, **(self.p.kwargs or {}))
+
+
+def run_lines(store, indicator, kwargs, runonce):
+    cerebro = bt.Cerebro(stdstats=False, runonce=runonce)
+    cerebro.adddata(ColumnarData(dataname=store))
+    cerebro.addstrategy(SingleIndicator, indicator=indicator, kwargs=kwargs)
+    strategy = cerebro.run()[0]
+    return [np.array(line.array) for line in strategy.indicator.lines]
+
+
+@pytest.mark.parametrize('indicator, kwargs', [
+    (BodyRatio, {}),
+    (BarStrength, {}),
+    (BarStrength, dict(period=5, close_percent=0.6)),
+    (NormalizedATR, {}),
+    (NormalizedATR, dict(period=50)),
+], ids=['BodyRatio', 'BarStrength', 'BarStrength-5', 'NormalizedATR', 'NormalizedATR-50'])
+def test_once_matches_next(sol_store, indicator, kwargs):
+    once = run_lines(sol_store, indicator, kwargs, runonce=True)
+    step = run_lines(sol_store, indicator, kwargs, runonce=False)
+    for a, b in zip(once, step):
+        assert len(a) == len(b)
+        assert not np.isnan(a).all()
+        np.testing.assert_allclose(a, b, rtol=1e-12, atol=0, equal_nan=True)
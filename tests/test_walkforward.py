@@ -0,0 +1,106 @@
+"""walkforward：窗口切分、trade_start 之前不下单（有无指标缓存结果相同）、trade_end 平仓"""
+import datetime
+
+import backtrader as bt
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import BAR_MS, START, synthetic_store
+from feeds import ColumnarData
+from indicators import line_cache
+from strategies import ConfirmSignalStrategy
+from walkforward import flatten_time, walk_forward_windows
+
+BAR = datetime.timedelta(milliseconds=BAR_MS)
+SECOND = datetime.timedelta(seconds=1)
+
+
+@pytest.fixture(scope='module')
+def store(tmp_path_factory):
+    return synthetic_store(30000, seed=0, out_dir=str(tmp_path_factory.mktemp('columnar')))
+
+
+def test_walk_forward_windows(tmp_path):
+    store = synthetic_store(2880, seed=0, out_dir=str(tmp_path))  # 10 天
+    last = START + 2879 * BAR
+    day = datetime.timedelta(days=1)
+
+    windows = walk_forward_windows(store, train_days=3, test_days=2)
+    assert windows == [(START + k * 2 * day, START + (k * 2 + 3) * day - SECOND,
+                        START + (k * 2 + 3) * day, min(START + (k * 2 + 5) * day - SECOND, last))
+                       for k in range(4)]
+    for (_, _, _, test_end), (_, _, next_test_start, _) in zip(windows, windows[1:]):
+        assert next_test_start == test_end + SECOND  # 测试窗口首尾相接
+
+    assert len(walk_forward_windows(store, train_days=3, test_days=2, step_days=1)) == 7
+    assert walk_forward_windows(store, train_days=11, test_days=2) == []
+
+
+def test_flatten_time(store):
+    assert flatten_time(store, START, START + 10 * BAR) == START + 9 * BAR
+    assert flatten_time(store, START, START) is None
+
+
+class OrderLog(ConfirmSignalStrategy):
+    """记录每个订单的创建时间和每根 K 线结束时的持仓（K 线序号 -> 数量，预热期没有记录）"""
+
+    def __init__(self):
+        super(OrderLog, self).__init__()
+        self.created = []
+        self.sizes = {}
+
+    def notify_order(self, order):
+        super(OrderLog, self).notify_order(order)
+        if order.status == bt.Order.Submitted:
+            self.created.append(order.created.dt)
+
+    def next(self):
+        super(OrderLog, self).next()
+        self.sizes[len(self.data) - 1] = self.position.size
+
+
+def run(store, todate=None, **params):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcommission(commission=0.0008, commtype=bt.CommInfoBase.COMM_PERC)
+    cerebro.adddata(ColumnarData(dataname=store, todate=todate))
+    cerebro.addstrategy(OrderLog, printlog=False, **params)
+    return cerebro.run()[0]
+
+
+def lines(strategy):
+    return [np.array(line.array) for line in (strategy.consol_upper, strategy.consol_lower,
+                                              strategy.buy_sell_signal.suspect_signal, strategy.confirm_signal)]
+
+
+def test_trade_start_gating_with_and_without_cache(store, tmp_path, monkeypatch):
+    trade_start = START + 15000 * BAR
+
+    monkeypatch.setattr(line_cache, 'CACHE_DIR', None)
+    uncached = run(store, trade_start=trade_start)
+    assert uncached.created  # 测试区间内确实有下单
+    assert min(uncached.created) >= bt.date2num(trade_start)
+    assert not any(size for bar, size in uncached.sizes.items() if bar < 15000)
+
+    # 与 walkforward 相同：先跑到 trade_start 之前写入缓存，再从缓存续算
+    monkeypatch.setattr(line_cache, 'CACHE_DIR', str(tmp_path))
+    run(store, todate=trade_start - SECOND)
+    cached = run(store, trade_start=trade_start)
+
+    assert cached.created == uncached.created
+    assert cached.broker.getvalue() == uncached.broker.getvalue()
+    for a, b in zip(lines(uncached), lines(cached)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_trade_end_flattens(store):
+    sizes = run(store).sizes
+    open_bar = next(i for i in range(15000, max(sizes)) if sizes[i] and sizes[i + 1] == sizes[i])
+    todate = START + (open_bar + 1) * BAR
+    trade_end = flatten_time(store, START, todate)
+    assert trade_end == START + open_bar * BAR
+
+    assert run(store, todate=todate).position.size != 0  # 不平仓时结束时还有持仓
+    strategy = run(store, todate=todate, trade_end=trade_end)
+    assert strategy.position.size == 0
+    assert not strategy.broker.get_orders_open()
+    assert len(strategy.brackets) == 0